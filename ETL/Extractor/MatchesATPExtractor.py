@@ -1,9 +1,12 @@
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Set, Tuple, Optional
 import os
+import cx_Oracle
 from lxml import html
 
-from matches_base_extractor import MatchesBaseExtractor  
-from constants import ATP_URL_PREFIX, DURATION_IN_DAYS
+from MatchesBaseExtractor import MatchesBaseExtractor  
+from delta_hash import atp_matches_delta_hash
+from page_selectors import get_selectors
+from constants import ATP_URL_PREFIX, DURATION_IN_DAYS, MATCHES_FETCH_WORKERS
 
 
 class MatchesATPExtractor(MatchesBaseExtractor):
@@ -12,7 +15,8 @@ class MatchesATPExtractor(MatchesBaseExtractor):
 
     Workflow:
       1) Build tournament URL list (by year or 'last N days').
-      2) For each tournament results page, parse all match nodes.
+      2) Fetch tournament results pages concurrently (`workers`) and parse all
+         match nodes in tournament order.
       3) Resolve players, seeds, score (including tiebreaks / special cases), stats URL, duration.
       4) Normalize and aggregate set-level info via `parse_score()` from base class.
       5) Append rows to `self.data` in the order that matches `INSERT_STR`.
@@ -22,11 +26,14 @@ class MatchesATPExtractor(MatchesBaseExtractor):
       - Special cases for NextGen/Laver Cup and walkovers/retirements are handled upstream in `parse_score()`.
     """
 
-    def __init__(self, year: Optional[int]):
+    def __init__(self, year: Optional[int], workers: int = MATCHES_FETCH_WORKERS):
         super().__init__()
         self.year: Optional[int] = year
+        self.workers: int = workers
         self.url: str = ""
         self._tournaments_list: List[Tuple[str, int]] = []
+        self._refdata = None                # Reference-data cache (None when parsing without a DB)
+        self._new_players: Set[str] = set()  # Codes sp_process_atp_matches will add to atp_players
 
     # --------------------------------------------------------------------- #
     # Init / metadata                                                       #
@@ -47,6 +54,13 @@ class MatchesATPExtractor(MatchesBaseExtractor):
             "winner_games_won, loser_games_won, winner_tiebreaks_won, loser_tiebreaks_won, match_duration"
             ") VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9, :10, :11, :12, :13, :14, :15, :16, :17, :18, :19, :20)"
         )
+        num = cx_Oracle.DB_TYPE_NUMBER
+        self.INSERT_TYPES = [
+            64, 64, 4, 8, 12, 256, 12, 256,   # id .. loser_url (match_order is sent as text)
+            8, 8, 32, 256, 10,                # seeds, score, stats_url, match_ret
+            num, num, num, num, num, num,     # sets / games / tiebreaks
+            num,                              # match_duration
+        ]
         self.PROCESS_PROC_NAMES = [
             "sp_process_atp_matches",
             "sp_apply_points_rules",
@@ -54,39 +68,59 @@ class MatchesATPExtractor(MatchesBaseExtractor):
             "sp_evolve_atp_draws",
             "sp_enrich_atp_draws",
         ]
+        self.ENRICH_PROC_NAME = "sp_enrich_atp_matches"
+        self.CHANGED_IDS_SQL = (
+            "SELECT m.id FROM atp_matches m "
+            "WHERE m.batch_id > :mark AND m.id IN (SELECT s.id FROM stg_matches s)"
+        )
+        self.DELTA_TABLE = "stg_matches"
+        self.DELTA_CORE_TABLE = "atp_matches"
         super()._init()
 
+    def _delta_key_hash(self, row: list) -> Tuple[str, int]:
+        """Match id and the `sf_atp_matches_delta_hash` of the match-level columns."""
+        return row[0], atp_matches_delta_hash(
+            id=row[0], tournament_id=row[1], stadie_id=row[2], match_order=row[3],
+            winner_code=row[4], loser_code=row[6], winner_seed=row[8], loser_seed=row[9],
+            score=row[10], stats_url=None if row[12] else row[11], match_ret=row[12],
+            winner_sets_won=row[13], loser_sets_won=row[14],
+            winner_games_won=row[15], loser_games_won=row[16],
+            winner_tiebreaks_won=row[17], loser_tiebreaks_won=row[18],
+            match_duration=row[19],
+        )
+
     # --------------------------------------------------------------------- #
     # Discovery                                                             #
     # --------------------------------------------------------------------- #
 
     def _build_tournaments_list(self) -> None:
         """
-        Populate `self._tournaments_list` with (results_url, year) tuples.
+        Set `self._tournaments_list` to an iterable of (results_url, year) tuples.
 
         If `self.year` is None:
             - Load tournaments in a rolling window: [sysdate - DURATION_IN_DAYS, sysdate + 5].
         Else:
             - Load tournaments for the specific year.
+        Tournaments are streamed in keyset pages (see `_iter_keyset`); the list is
+        recorded to / replayed from the page archive when one is active.
         """
-        cur = None
-        try:
-            cur = self.con.cursor()
-            if self.year is None:
-                sql = (
-                    "SELECT url, year "
-                    "FROM atp_tournaments "
-                    "WHERE start_dtm BETWEEN sysdate - :duration AND sysdate + 5"
-                )
-                self._tournaments_list = cur.execute(sql, {"duration": DURATION_IN_DAYS}).fetchall()
-                self.logger.info(f"Loading matches for the last {DURATION_IN_DAYS} days")
-            else:
-                sql = "SELECT url, year FROM atp_tournaments WHERE year = :year"
-                self._tournaments_list = cur.execute(sql, {"year": self.year}).fetchall()
-                self.logger.info(f"Loading matches for year {self.year}")
-        finally:
-            if cur:
-                cur.close()
+        self._tournaments_list = self._worklist("matches_tournaments_list", self._fetch_tournaments_list)
+        if self.year is None:
+            self.logger.info(f"Loading matches for the last {DURATION_IN_DAYS} days")
+        else:
+            self.logger.info(f"Loading matches for year {self.year}")
+
+    def _fetch_tournaments_list(self) -> Iterator[Tuple[str, int]]:
+        """Stream (results_url, year) tuples for the configured scope."""
+        if self.year is None:
+            sql = (
+                "SELECT url, year, id AS page_key "
+                "FROM atp_tournaments "
+                "WHERE start_dtm BETWEEN sysdate - :duration AND sysdate + 5"
+            )
+            return self._iter_keyset(sql, {"duration": DURATION_IN_DAYS})
+        sql = "SELECT url, year, id AS page_key FROM atp_tournaments WHERE year = :year"
+        return self._iter_keyset(sql, {"year": self.year})
 
     # --------------------------------------------------------------------- #
     # Parse orchestration                                                   #
@@ -97,15 +131,24 @@ class MatchesATPExtractor(MatchesBaseExtractor):
         Main parse routine:
           - Build tournaments list.
           - Load adjustment dictionaries.
-          - Parse each tournament page and append rows to `self.data`.
+          - Fetch tournament pages with `self.workers` concurrent fetchers and
+            parse them in tournament order, appending rows to `self.data`.
         """
+        self._refdata = self._reference_data()
         self._build_tournaments_list()
         self._fill_dic_match_scores_adj()
         self._fill_dic_match_scores_stats_url_adj()
         self._fill_dic_match_scores_skip_adj()
 
-        for tournament_tpl in self._tournaments_list:
-            self._parse_tournament(tournament_tpl)
+        pages = self._iter_fetched(
+            self._tournaments_list, lambda tpl: tpl[0], expect="match-header", workers=self.workers
+        )
+        for tournament_tpl, response_str in pages:
+            self._journaled(
+                tournament_tpl[0], lambda: self._parse_tournament(tournament_tpl, response_str or "")
+            )
+        if self._new_players:
+            self.logger.info(f"{len(self._new_players)} player(s) not in atp_players yet (added by the process step).")
 
     # --------------------------------------------------------------------- #
     # Helpers                                                               #
@@ -145,21 +188,27 @@ class MatchesATPExtractor(MatchesBaseExtractor):
     # Per-tournament parsing                                                #
     # --------------------------------------------------------------------- #
 
-    def _parse_tournament(self, tournament_tpl: Tuple[str, int]) -> None:
+    def _parse_tournament(self, tournament_tpl: Tuple[str, int], response_str: Optional[str] = None) -> bool:
         """
         Parse all matches for a single tournament results page.
 
         Args:
             tournament_tpl: (results_url, year) tuple; when `self.year` is not None,
                             the second item is ignored in favor of `self.year`.
+            response_str: Already fetched page HTML; fetched here when None.
+
+        Returns:
+            True if the page was fetched and parsed (False on an empty page or error).
         """
         url, row_year = tournament_tpl[0], str(tournament_tpl[1])
         try:
             self.url = url
-            self.response_str = self._request_url_by_chrome(url) or ""
+            if response_str is None:
+                response_str = self._request_url(url, expect="match-header")
+            self.response_str = response_str or ""
             if not self.response_str:
                 self.logger.warning(f"Empty HTML for tournament page: {url}")
-                return
+                return False
 
             # Extract tournament code from URL:
             # expected: .../en/scores/archive/<slug>/<code>/<year>/results
@@ -172,6 +221,8 @@ class MatchesATPExtractor(MatchesBaseExtractor):
 
             tournament_year = str(self.year) if self.year is not None else row_year
             tournament_id = f"{tournament_year}-{code}" if code else tournament_year
+            if self._refdata is not None and self._refdata.tournament(tournament_id) is None:
+                self.logger.warning(f"Tournament {tournament_id} is not in atp_tournaments (from {url}).")
 
             # Limit to the content block that contains group matches (legacy pages); fallback full HTML
             pos_begin = self.response_str.find('<div class="content content--group">')
@@ -182,16 +233,17 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                 else self.response_str
             )
             tree = html.fromstring(snippet)
+            sel = get_selectors("results", tree)
 
             # Find all match containers
-            match_nodes = tree.findall("./div/div/div/div/div/div/div[@class='match']")
+            match_nodes = sel.match_nodes(tree)
             if not match_nodes:
                 # fallback: broader XPath
-                match_nodes = tree.xpath("//div[contains(@class,'match') and contains(@class,'match')]")
+                match_nodes = sel.match_nodes_any(tree)
 
             for match_node in match_nodes:
                 # --- Stadie/Round ---
-                raw_stadie = match_node.xpath("./div[@class='match-header']/span/strong/text()")
+                raw_stadie = sel.stadie(match_node)
                 stadie_name = (raw_stadie[0] if raw_stadie else "").split("-")[0]
                 # strip day suffixes commonly present
                 for t in ("Day 1", "Day 2", "Day 3", "Day 4", "Day 5", "Day 6"):
@@ -205,9 +257,7 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                 stadie_id = self.remap_stadie_code(stadie_name) or ""
 
                 # --- Player info blocks (two players) ---
-                player_info_nodes = match_node.xpath(
-                    "./div[@class='match-content']/div[@class='match-stats']/div[@class='stats-item']/div[@class='player-info']"
-                )
+                player_info_nodes = sel.player_info(match_node)
                 if len(player_info_nodes) != 2:
                     self.logger.warning(f"Unexpected player-info blocks: {len(player_info_nodes)}")
                     continue
@@ -215,35 +265,33 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                 p1, p2 = player_info_nodes[0], player_info_nodes[1]
 
                 # Player 1 URL/Name/Seed
-                p1_url_rel = (p1.xpath("./div[@class='name']/a/@href") or [""])[0].lower()
+                p1_url_rel = (sel.player_href(p1) or [""])[0].lower()
                 if not p1_url_rel:
                     self.logger.warning("Cannot resolve player_1_url; skipping node.")
                     continue
-                p1_name = (p1.xpath("./div[@class='name']/a/text()") or [""])[0].strip()
+                p1_name = (sel.player_name(p1) or [""])[0].strip()
                 p1_seed = (
-                    (p1.xpath("./div[@class='name']/span/text()") or [""])[0]
+                    (sel.player_seed(p1) or [""])[0]
                     .replace("(", "")
                     .replace(")", "")
                     .strip()
                 )
 
                 # Winner flag (presence of a `.winner` div)
-                p1_is_winner = bool(p1.xpath("./div[@class='winner']"))
+                p1_is_winner = bool(sel.player_winner(p1))
 
                 # Player 2 URL/Name/Seed
-                p2_url_rel = (p2.xpath("./div[@class='name']/a/@href") or [""])[0].lower()
-                p2_name = (p2.xpath("./div[@class='name']/a/text()") or [""])[0].strip()
+                p2_url_rel = (sel.player_href(p2) or [""])[0].lower()
+                p2_name = (sel.player_name(p2) or [""])[0].strip()
                 p2_seed = (
-                    (p2.xpath("./div[@class='name']/span/text()") or [""])[0]
+                    (sel.player_seed(p2) or [""])[0]
                     .replace("(", "")
                     .replace(")", "")
                     .strip()
                 )
 
                 # --- Scores per set (two score columns) ---
-                score_cols = match_node.xpath(
-                    "./div[@class='match-content']/div[@class='match-stats']/div[@class='stats-item']/div[@class='scores']"
-                )
+                score_cols = sel.score_cols(match_node)
                 if len(score_cols) != 2:
                     self.logger.warning(f"Unexpected score columns: {len(score_cols)}")
 
@@ -253,8 +301,8 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                 tiebreaks: List[str] = []
 
                 # Column 0 → player 1 set scores (and maybe tiebreaks)
-                for item in (score_cols[0].xpath("./div[@class='score-item']") if score_cols else []):
-                    cells = item.xpath("./*")
+                for item in (sel.score_items(score_cols[0]) if score_cols else []):
+                    cells = sel.children(item)
                     if not cells:
                         continue
                     p1_scores.append((cells[0].text or "").strip())
@@ -262,8 +310,8 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                     tiebreaks.append((cells[1].text or "").strip() if len(cells) > 1 else "")
 
                 # Column 1 → player 2 set scores (second may override tiebreak if present)
-                for i, item in enumerate(score_cols[1].xpath("./div[@class='score-item']") if score_cols else []):
-                    cells = item.xpath("./*")
+                for i, item in enumerate(sel.score_items(score_cols[1]) if score_cols else []):
+                    cells = sel.children(item)
                     if not cells:
                         continue
                     p2_scores.append((cells[0].text or "").strip())
@@ -304,6 +352,11 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                     self.logger.error(f"Cannot parse loser code from URL: {loser_url}; err={e}")
                     continue
 
+                if self._refdata is not None:
+                    self._new_players.update(
+                        c for c in (winner_code, loser_code) if not self._refdata.known_player(c)
+                    )
+
                 # Match identifier (year-code-winner-loser-round)
                 match_id = f"{tournament_id}-{winner_code}-{loser_code}-{stadie_id}"
 
@@ -317,7 +370,7 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                     self.logger.warning(f"Score adjustment for {match_id}: {match_score}")
                 else:
                     # Some pages have a 'match-notes' block with raw text like 'X wins the match 64 76(5)'
-                    raw_notes = (match_node.xpath("./div[@class='match-notes']/text()") or [""])[0]
+                    raw_notes = (sel.notes(match_node) or [""])[0]
                     if raw_notes and "walkover" in raw_notes.lower():
                         match_score = "W/O"
                     elif raw_notes and "wins the match" in raw_notes:
@@ -347,17 +400,14 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                     match_stats_url = self._dic_match_scores_stats_url_adj[match_id]
                     self.logger.warning(f"Stats URL adjustment for {match_id}: {match_stats_url}")
                 else:
-                    stats_href = match_node.xpath(
-                        "./div[@class='match-footer']/div[@class='match-cta']"
-                        "/a[text()='Match Stats' or text()='Stats']/@href"
-                    )
+                    stats_href = sel.stats_href(match_node)
                     match_stats_url = ATP_URL_PREFIX + stats_href[0].strip() if stats_href else ""
 
                 # Match order (unavailable here)
                 match_order = ""
 
                 # Duration (mm:ss → minutes)
-                dur_text = (match_node.xpath("./div[@class='match-header']/span[2]/text()") or [""])[0].strip()
+                dur_text = (sel.duration(match_node) or [""])[0].strip()
                 match_duration: Optional[int]
                 if dur_text:
                     try:
@@ -389,6 +439,8 @@ class MatchesATPExtractor(MatchesBaseExtractor):
                     + score_array
                     + [match_duration]
                 )
+            return True
 
         except Exception as e:
             self.logger.error(f"url={url}; parse tournament error: {e}")
+            return False
@@ -1,12 +1,13 @@
-from typing import Dict, Optional, List, Tuple
+from typing import Any, Dict, Optional, List, Sequence, Tuple
 from base_extractor import BaseExtractor  
+import score_parser
 
 class MatchesBaseExtractor(BaseExtractor):
     """
     Base utilities for match-related extraction and score parsing.
 
     This class extends `baseExtractor` with:
-      - On-demand loading of score adjustments from DB (set scores, stats URL, skip flags).
+      - Score adjustments (set scores, stats URL, skip flags) from the shared reference-data cache.
       - Helpers to normalize/interpret match scores and match retirement codes.
       - A robust parser for per-set score strings that aggregates match-level stats.
     """
@@ -24,21 +25,18 @@ class MatchesBaseExtractor(BaseExtractor):
 
     def _fetch_adjustments(self, column: str, target: Dict[str, str]) -> None:
         """
-        Generic helper to populate a dictionary from `match_scores_adjustments`.
+        Generic helper to populate a dictionary from `match_scores_adjustments`,
+        served by the process-wide reference-data cache (one query per process).
+        Recorded to / replayed from the page archive when one is active.
 
         Args:
             column: Column name to fetch (e.g., 'set_score', 'stats_url', 'to_skip').
             target: Dict to fill with key=match_id, value=column.
         """
-        cur = None
-        try:
-            cur = self.con.cursor()
-            sql = f"SELECT match_id, {column} FROM match_scores_adjustments WHERE {column} IS NOT NULL"
-            for match_id, value in cur.execute(sql).fetchall():
-                target[str(match_id)] = str(value)
-        finally:
-            if cur:
-                cur.close()
+        def query() -> Dict[str, str]:
+            return dict(self._reference_data().adjustment_map(column))
+
+        target.update(self._worklist(f"adjustments_{column}", query))
 
     def _fill_dic_match_scores_adj(self) -> None:
         """Load manual set-score adjustments into `_dic_match_scores_adj`."""
@@ -61,7 +59,25 @@ class MatchesBaseExtractor(BaseExtractor):
         tournament_code: str
     ) -> List[Optional[int]]:
         """
-        Parse a raw match score string into aggregate stats.
+        Parse a raw match score string into aggregate stats (see `parse_score_uncached`).
+
+        Served by the process-wide score cache (score_parser.py): a score seen
+        before for the same kind of tournament (NextGen, Grand Slam, Olympics,
+        Laver Cup, other) is not parsed again. Runs of whitespace in the score
+        are collapsed. Anomalies (non-whitelisted sets, margins, tie sets, ...)
+        go to `self.anomalies`, summarized once per run instead of one log line each.
+        """
+        return score_parser.parse_score(match_score, match_id, tournament_code, self.anomalies)
+
+    def parse_score_uncached(
+        self,
+        match_score: str,
+        match_id: str,
+        tournament_code: str
+    ) -> List[Optional[int]]:
+        """
+        Parse a raw match score string into aggregate stats, without the score
+        cache (reference implementation, see sandbox/bench_parse_score.py).
 
         Supports:
           - Regular sets (e.g., '64', '76(5)' as '765'/'76[5]' variants).
@@ -249,6 +265,21 @@ class MatchesBaseExtractor(BaseExtractor):
             self.logger.error(f"match_id={match_id}; parse_score error: {e}")
             return [None, None, None, None, None, None, None]
 
+    def parse_scores(
+        self,
+        match_scores: Sequence[str],
+        match_ids: Sequence[str],
+        tournament_codes: Sequence[str]
+    ) -> Dict[str, List[Optional[Any]]]:
+        """
+        Batch version of `parse_score` over parallel sequences (see score_parser.py).
+
+        Returns:
+            Columns keyed by `score_parser.SCORE_COLUMNS` (match_ret, sets, games,
+            tiebreaks), with the values and anomalies `parse_score` gives per row.
+        """
+        return score_parser.parse_scores_batch(match_scores, match_ids, tournament_codes, self.anomalies)
+
     def adjust_score(self, match_id: str, score: str) -> str:
         """
         Apply manual override for a given match score if present in adjustments.
@@ -274,20 +305,7 @@ class MatchesBaseExtractor(BaseExtractor):
         Returns:
             '(W/O)', '(RET)', '(WEA)' or None if the score looks like a played match.
         """
-        s = (match_score or "").strip()
-        if not s:
-            return None
-
-        up = s.upper()
-        if "W/O" in up or "INV" in up or "WALKOVER" in up:
-            return "(W/O)"
-        if "WEA" in up:
-            return "(WEA)"
-        if "RE" in up or "RET" in up or "DEF" in up or "UNP" in up:
-            return "(RET)"
-        if "PLAYED AND UNFINISHED" in up or "PLAYED AND ABANDONED" in up or "UNFINISHED" in up:
-            return "(RET)"
-        return None
+        return score_parser.get_match_ret(match_score)
 
     def normalize_tie_set_score(self, tie_set_score: str) -> str:
         """
@@ -297,7 +315,6 @@ class MatchesBaseExtractor(BaseExtractor):
             Input:  '[11-9]'  →  '10[11-9]' (after minimal normalization)
             NOTE: Keep consistent with your upstream/downstream score conventions.
         """
-        self.logger.info(f"normalize_tie_set_score IN: {tie_set_score}")
         if not tie_set_score:
             return tie_set_score
 
@@ -307,7 +324,10 @@ class MatchesBaseExtractor(BaseExtractor):
             tmp = tie_set_score.replace('-', '').replace('[', '').replace(']', '')
             # Keep only the last two digits if needed, or adapt to your pipeline
             tail = tmp[2:] if len(tmp) > 2 else tmp
-            tie_set_score = f"10[{tail}]"
+            normalized = f"10[{tail}]"
+            self.anomalies.record(
+                "tie_set_normalized", "info", tie_set_score, "normalize_tie_set_score: ", f" -> {normalized}"
+            )
+            tie_set_score = normalized
 
-        self.logger.info(f"normalize_tie_set_score OUT: {tie_set_score}")
         return tie_set_score
@@ -1,9 +1,10 @@
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 import os
-import re
 from lxml import html
 
 from base_extractor import BaseExtractor  
+from delta_hash import atp_players_delta_hash, parse_date, ora_hash_compatible
+from page_selectors import get_selectors
 
 
 class PlayersATPExtractor(BaseExtractor):
@@ -50,48 +51,75 @@ class PlayersATPExtractor(BaseExtractor):
             ) VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9, :10, :11, :12, :13, :14)
         """
 
+        # All values are scraped as text (numeric columns are converted by Oracle)
+        self.INSERT_TYPES = [10, 40, 40, 40, 200, 10, 60, 60, 32, 8, 8, 8, 15, 20]
+
         self.PROCESS_PROC_NAMES = ["sp_process_atp_players"]
+        self.DELTA_TABLE = "stg_players"
+        self.DELTA_CORE_TABLE = "atp_players"
         super()._init()
 
+    def _delta_key_hash(self, row: list) -> Tuple[str, int]:
+        """Player code and the same `sf_atp_players_delta_hash` sp_process_atp_players computes."""
+        return row[0], atp_players_delta_hash(
+            code=row[0], url=row[4], first_name=row[2], last_name=row[3], slug=row[1],
+            birth_date=parse_date(row[8], "%Y.%m.%d"), birthplace=row[7], turned_pro=row[9],
+            weight=row[10], height=row[11], residence=row[6], handedness=row[12],
+            backhand=row[13], citizenship=row[5],
+        )
+
+    def _seed_delta_index(self) -> None:
+        """
+        Seed an empty index from `atp_players.delta_hash` (reference-data cache):
+        the MERGE skips rows whose hash is unchanged, so those rows need not be
+        staged at all.
+        """
+        if len(self._delta_index) or not ora_hash_compatible(self.con):
+            return
+        rows = list(self._reference_data().player_hashes())
+        self._delta_index.commit(rows, self._delta_target_stamp())
+        self.logger.info(f"Delta index seeded with {len(rows)} player hash(es).")
+
     # --------------------------------------------------------------------- #
     # Discovery                                                             #
     # --------------------------------------------------------------------- #
 
     def _build_players_url_list(self) -> None:
         """
-        Populate `self._players_url_list` from DB.
+        Set `self._players_url_list` to an iterable of (url,) tuples from the DB.
 
         If `self.year` is None:
             - Load only players with missing first/last name.
         Else:
             - Load distinct player URLs that appear as winner/loser in matches for that year.
+        URLs are streamed in keyset pages (see `_iter_keyset`); the list is
+        recorded to / replayed from the page archive when one is active.
         """
-        cur = None
-        try:
-            cur = self.con.cursor()
-            if self.year is None:
-                sql = "SELECT url FROM atp_players WHERE first_name IS NULL"
-                self._players_url_list = cur.execute(sql).fetchall()
-                self.logger.info("Loading players with empty names only")
-            else:
-                sql = """
-                    SELECT DISTINCT w.url
-                    FROM atp_players w
-                    JOIN atp_matches m ON m.winner_code = w.code
-                    JOIN atp_tournaments t ON m.tournament_id = t.id
-                    WHERE t.year = :year
-                    UNION
-                    SELECT DISTINCT l.url
-                    FROM atp_players l
-                    JOIN atp_matches m ON m.loser_code = l.code
-                    JOIN atp_tournaments t ON m.tournament_id = t.id
-                    WHERE t.year = :year
-                """
-                self._players_url_list = cur.execute(sql, {"year": self.year}).fetchall()
-                self.logger.info(f"Loading players for year {self.year}")
-        finally:
-            if cur:
-                cur.close()
+        self._players_url_list = self._worklist("players_url_list", self._fetch_players_url_list)
+        if self.year is None:
+            self.logger.info("Loading players with empty names only")
+        else:
+            self.logger.info(f"Loading players for year {self.year}")
+
+    def _fetch_players_url_list(self) -> Iterator[Tuple[str]]:
+        """Stream player profile URLs for the configured scope."""
+        if self.year is None:
+            sql = "SELECT url, url AS page_key FROM atp_players WHERE first_name IS NULL"
+            return self._iter_keyset(sql, {})
+        sql = """
+            SELECT p.url, p.url AS page_key
+            FROM atp_players p
+            WHERE p.code IN (SELECT m.winner_code
+                             FROM atp_matches m
+                             JOIN atp_tournaments t ON m.tournament_id = t.id
+                             WHERE t.year = :year
+                             UNION
+                             SELECT m.loser_code
+                             FROM atp_matches m
+                             JOIN atp_tournaments t ON m.tournament_id = t.id
+                             WHERE t.year = :year)
+        """
+        return self._iter_keyset(sql, {"year": self.year})
 
     # --------------------------------------------------------------------- #
     # Parse orchestration                                                   #
@@ -105,22 +133,20 @@ class PlayersATPExtractor(BaseExtractor):
           - Append rows to `self.data`.
         """
         self._build_players_url_list()
-        total = len(self._players_url_list)
-        if total == 0:
-            self.logger.warning("No player URLs to process.")
-            return
-
+        idx = 0
         for idx, (player_url,) in enumerate(self._players_url_list, start=1):
-            self.logger.info(f"Processing {player_url} ({idx}/{total})")
-            self._parse_player(player_url)
+            self.logger.info(f"Processing {player_url} (#{idx})")
+            self._journaled(player_url, lambda: self._parse_player(player_url))
+        if idx == 0:
+            self.logger.warning("No player URLs to process.")
 
     # --------------------------------------------------------------------- #
     # Single player parsing                                                 #
     # --------------------------------------------------------------------- #
 
-    def _parse_player(self, url: str) -> None:
+    def _parse_player(self, url: str) -> bool:
         """
-        Fetch and parse a single player profile page.
+        Fetch and parse a single player profile page; returns True if a row was added.
 
         Extracted fields (in order):
           player_code, player_slug, first_name, last_name, player_url,
@@ -129,12 +155,13 @@ class PlayersATPExtractor(BaseExtractor):
         """
         try:
             self.url = url
-            html_content = self._request_url_by_chrome(self.url)
+            html_content = self._request_url(self.url, expect="personal_details")
             if not html_content:
                 self.logger.warning(f"Empty HTML for: {url}")
-                return
+                return False
 
             tree = html.fromstring(html_content)
+            sel = get_selectors("player", tree)
 
             # --- Derive code/slug from URL path ---
             # Expected: /en/players/<slug>/<code>/overview
@@ -144,7 +171,7 @@ class PlayersATPExtractor(BaseExtractor):
 
             # --- Name parsing (robust to minor DOM changes) ---
             # Primary:
-            name_nodes = tree.xpath("//div[@class='info']/div[@class='name']/span/text()")
+            name_nodes = sel.name(tree)
             # Fallbacks could be added if needed
             if name_nodes:
                 full_name = name_nodes[0].strip()
@@ -167,17 +194,12 @@ class PlayersATPExtractor(BaseExtractor):
             residence = ""  # not available on current pages, keep for schema
 
             # --- Personal details (left/right panes) ---
-            left_items = tree.xpath("//div[@class='personal_details']//ul[contains(@class,'pd_left')]/li")
-            right_items = tree.xpath("//div[@class='personal_details']//ul[contains(@class,'pd_right')]/li")
-
-            # Precompiled regexes
-            re_birth = re.compile(r"\((\d{4}/\d{2}/\d{2})\)")
-            re_wkg = re.compile(r"\((\d+)\s*kg\)", re.I)
-            re_hcm = re.compile(r"\((\d+)\s*cm\)", re.I)
+            left_items = sel.details_left(tree)
+            right_items = sel.details_right(tree)
 
             for li in left_items + right_items:
-                label = li.xpath(".//span[1]/text()")
-                value = li.xpath(".//span[2]//text()")
+                label = sel.detail_label(li)
+                value = sel.detail_value(li)
                 if not label or not value:
                     continue
 
@@ -186,13 +208,13 @@ class PlayersATPExtractor(BaseExtractor):
 
                 if label_text == "Age":
                     # Example: "19 (2005/11/03)"
-                    m = re_birth.search(value_text)
+                    m = sel.birth.search(value_text)
                     birthdate = m.group(1) if m else ""
                 elif label_text == "Weight":
-                    m = re_wkg.search(value_text)
+                    m = sel.weight_kg.search(value_text)
                     weight_kg = m.group(1) if m else ""
                 elif label_text == "Height":
-                    m = re_hcm.search(value_text)
+                    m = sel.height_cm.search(value_text)
                     height_cm = m.group(1) if m else ""
                 elif label_text == "Turned pro":
                     turned_pro = value_text
@@ -205,7 +227,7 @@ class PlayersATPExtractor(BaseExtractor):
                     birthplace = value_text
                 elif label_text == "Country":
                     # Extract from flag use href (e.g., '#flag-ESP')
-                    href = li.xpath(".//svg[contains(@class,'atp-flag')]/use/@href")
+                    href = sel.flag_href(li)
                     if href:
                         raw = href[0]
                         # take last token after '-' to get code
@@ -230,6 +252,8 @@ class PlayersATPExtractor(BaseExtractor):
                 backhand,
             ]
             self.data.append(row)
+            return True
 
         except Exception as e:
             self.logger.error(f"parse_player error for URL {url}: {e}")
+            return False
@@ -1,10 +1,13 @@
-from typing import List, Tuple, Optional
+from itertools import islice
+from typing import Iterator, List, Tuple, Optional
 import os
-import re
+import time
+import cx_Oracle
 from lxml import html
 
 from base_extractor import BaseExtractor  
-from constants import DURATION_IN_DAYS
+from page_selectors import get_selectors
+from constants import DURATION_IN_DAYS, STATS_FETCH_WORKERS, STATS_ROW_LIMIT, STATS_BACKFILL_CHUNK
 
 
 class StatsATPExtractor(BaseExtractor):
@@ -14,18 +17,24 @@ class StatsATPExtractor(BaseExtractor):
 
     Workflow:
       1) Build the list of stat pages to visit (rolling window or by year).
-      2) For each URL, detect winner/loser side and parse all stat blocks.
+      2) For each URL (fetched and parsed by `workers` concurrent workers),
+         detect winner/loser side and parse all stat blocks.
       3) Normalize values into the INSERT column order and append to `self.data`.
       4) Use baseExtractor.extract() to load into DB and run post-processing procs.
 
     Notes:
       - Pages may vary slightly in structure; XPaths are kept tolerant.
       - Only matches with missing stats are selected to avoid reprocessing.
+      - Year mode visits at most STATS_ROW_LIMIT pages per run. Backfill mode
+        (`backfill=True`) takes the full worklist and loads/processes it in
+        chunks of STATS_BACKFILL_CHUNK rows as parsing progresses.
     """
 
-    def __init__(self, year: Optional[int]):
+    def __init__(self, year: Optional[int], workers: int = STATS_FETCH_WORKERS, backfill: bool = False):
         super().__init__()
         self.year: Optional[int] = year
+        self.workers: int = workers
+        self.backfill: bool = backfill
         self.url: str = ""
         self._stats_tpl_list: List[Tuple[str, str, str, str]] = []  # (winner_code, loser_code, stats_url, original_stats_url)
 
@@ -41,7 +50,7 @@ class StatsATPExtractor(BaseExtractor):
         self.TABLE_NAME = "stg_matches"
         self.MODULE_NAME = "extract atp stats"
 
-        # Order of placeholders MUST match the row we build in _parse_stats()
+        # Order of placeholders MUST match the row we build in _fetch_and_parse_stats()
         self.INSERT_STR = (
             "INSERT INTO stg_matches("
             "stats_url, "
@@ -75,7 +84,18 @@ class StatsATPExtractor(BaseExtractor):
             ")"
         )
 
+        # stats_url, then 48 numeric stat columns
+        self.INSERT_TYPES = [256] + [cx_Oracle.DB_TYPE_NUMBER] * 48
+
         self.PROCESS_PROC_NAMES = ["sp_process_atp_stats"]
+        # sp_process_atp_stats matches staging rows on either stats URL form
+        self.ENRICH_PROC_NAME = "sp_enrich_atp_matches"
+        self.CHANGED_IDS_SQL = (
+            "SELECT m.id FROM atp_matches m "
+            "WHERE m.batch_id > :mark AND EXISTS ("
+            "SELECT 1 FROM stg_matches s "
+            "WHERE s.stats_url IN (m.stats_url, replace(m.stats_url, 'stats-centre', 'match-stats')))"
+        )
         super()._init()
 
     # --------------------------------------------------------------------- #
@@ -84,101 +104,148 @@ class StatsATPExtractor(BaseExtractor):
 
     def _build_stats_tpl_list(self) -> None:
         """
-        Populate `self._stats_tpl_list` with tuples containing:
+        Set `self._stats_tpl_list` to an iterable of tuples containing:
         (winner_code, loser_code, normalized_stats_url, original_stats_url)
+        Rows are streamed in keyset pages (see `_iter_keyset`); the list is
+        recorded to / replayed from the page archive when one is active.
         """
-        cur = None
-        try:
-            cur = self.con.cursor()
-            if self.year is None:
-                # Rolling window for recent events
-                sql = """
-                    SELECT winner_code,
-                           loser_code,
-                           REPLACE(stats_url, 'stats-centre', 'match-stats') AS stats_url,
-                           stats_url AS original_stats_url
-                    FROM vw_atp_matches
-                    WHERE stats_url IS NOT NULL
-                      AND series_id != 'dc'
-                      AND (win_aces IS NULL OR los_aces IS NULL)
-                      AND tournament_start_dtm > SYSDATE - :duration
-                    ORDER BY tournament_start_dtm DESC
-                """
-                self._stats_tpl_list = cur.execute(sql, {"duration": DURATION_IN_DAYS}).fetchall()
-                self.logger.info(f"Parse stats for last {DURATION_IN_DAYS} days...")
-            else:
-                # Historical year scope (limited rows per run)
-                sql = """
-                    SELECT winner_code,
-                           loser_code,
-                           REPLACE(stats_url, 'stats-centre', 'match-stats') AS stats_url,
-                           stats_url AS original_stats_url
-                    FROM vw_matches
-                    WHERE stats_url IS NOT NULL
-                      AND series_id != 'dc'
-                      AND (win_aces IS NULL OR los_aces IS NULL)
-                      AND ROWNUM < :row_limit + 1
-                      AND tournament_year = :year
-                """
-                self._stats_tpl_list = cur.execute(sql, {"year": self.year, "row_limit": 50}).fetchall()
-                self.logger.info(f"Parse stats for year {self.year} ...")
-        finally:
-            if cur:
-                cur.close()
-
-        self.logger.info(f"Loading {len(self._stats_tpl_list)} row(s).")
+        name = "stats_tpl_list_backfill" if self.backfill else "stats_tpl_list"
+        self._stats_tpl_list = self._worklist(name, self._fetch_stats_tpl_list)
+        if self.year is None:
+            self.logger.info(f"Parse stats for last {DURATION_IN_DAYS} days...")
+        else:
+            self.logger.info(f"Parse stats for year {self.year} ...")
+
+    def _fetch_stats_tpl_list(self) -> Iterator[Tuple[str, str, str, str]]:
+        """Stream stats pages still missing for the configured scope (in match id order)."""
+        if self.year is None:
+            # Rolling window for recent events
+            sql = """
+                SELECT winner_code,
+                       loser_code,
+                       REPLACE(stats_url, 'stats-centre', 'match-stats') AS stats_url,
+                       stats_url AS original_stats_url,
+                       id AS page_key
+                FROM vw_atp_matches
+                WHERE stats_url IS NOT NULL
+                  AND series_id != 'dc'
+                  AND (win_aces IS NULL OR los_aces IS NULL)
+                  AND tournament_start_dtm > SYSDATE - :duration
+            """
+            return self._iter_keyset(sql, {"duration": DURATION_IN_DAYS})
+
+        # Historical year scope (limited rows per run unless backfilling)
+        sql = """
+            SELECT winner_code,
+                   loser_code,
+                   REPLACE(stats_url, 'stats-centre', 'match-stats') AS stats_url,
+                   stats_url AS original_stats_url,
+                   id AS page_key
+            FROM vw_matches
+            WHERE stats_url IS NOT NULL
+              AND series_id != 'dc'
+              AND (win_aces IS NULL OR los_aces IS NULL)
+              AND tournament_year = :year
+        """
+        if self.backfill:
+            return self._iter_keyset(sql, {"year": self.year})
+        return islice(self._iter_keyset(sql, {"year": self.year}, page_size=STATS_ROW_LIMIT), STATS_ROW_LIMIT)
 
     # --------------------------------------------------------------------- #
     # Parse orchestration                                                   #
     # --------------------------------------------------------------------- #
 
     def _parse(self) -> None:
-        """Main parse loop over collected stat URLs."""
+        """
+        Main parse loop over collected stat URLs.
+
+        Pages are fetched and parsed by `self.workers` concurrent workers (lxml
+        releases the GIL while parsing); rows are appended in worklist order.
+        In backfill mode every STATS_BACKFILL_CHUNK rows are loaded and processed
+        right away; the last partial chunk is left to `extract()`.
+        """
         self._build_stats_tpl_list()
-        for stats_tpl in self._stats_tpl_list:
-            self._parse_stats(stats_tpl)
-            # Optional throttle if needed:
-            # time.sleep(0.5)
+        started = time.time()
+        done = 0
+        self._staged_since_process = 0
+
+        def work(url_tpl):
+            if self._unit_done(url_tpl[2]):
+                return None  # restored from the checkpoint journal below
+            return self._fetch_and_parse_stats(url_tpl)
+
+        def add(rows) -> bool:
+            # A page that gave no row (fetch or parse failed) is not journaled
+            self.data.extend(rows)
+            return bool(rows)
+
+        for url_tpl, row in self._iter_mapped(self._stats_tpl_list, work, self.workers):
+            done += 1
+            rows = [row] if row is not None else []
+            self._journaled(url_tpl[2], lambda: add(rows))
+
+            self._staged_since_process += len(rows)
+            if self.backfill and self._db_enabled and self._staged_since_process >= STATS_BACKFILL_CHUNK:
+                self._flush_chunk()
+                self._staged_since_process = 0
+            if done % 100 == 0:
+                elapsed = max(time.time() - started, 1e-6)
+                self.logger.info(f"Stats progress {done} ({60 * done / elapsed:.1f} matches/min)")
+        self.logger.info(f"Stats done: {done} page(s) in {time.time() - started:.0f}s")
+
+    def _flush_chunk(self) -> None:
+        """Backfill mode: load → process the rows staged so far, then start a fresh staging batch."""
+        if self._streaming:
+            self._flush_rows(force=True)
+        else:
+            self._truncate_table()
+            self._load_to_stg()
+            self.data = []
+        self._process_data()
+        self._truncate_table()
 
     # --------------------------------------------------------------------- #
     # Single stats page parsing                                             #
     # --------------------------------------------------------------------- #
 
-    def _parse_stats(self, url_tpl: Tuple[str, str, str, str]) -> None:
+    def _fetch_and_parse_stats(self, url_tpl: Tuple[str, str, str, str]) -> Optional[List[Optional[int]]]:
         """
-        Parse a single match-stats page and append the row to `self.data`.
+        Fetch and parse a single match-stats page (thread-safe: no shared state).
 
         Args:
             url_tpl: (winner_code, loser_code, normalized_stats_url, original_stats_url)
+
+        Returns:
+            The INSERT row, or None if the page could not be used.
         """
         try:
             url = url_tpl[2]                 # normalized 'match-stats' URL
             original_stats_url = url_tpl[3]  # original reference URL (stored in DB)
 
-            self.url = url
-            html_str = self._request_url_by_chrome(self.url)
+            html_str = self._request_url(url, expect="stats-item")
             if not html_str:
                 self.logger.warning(f"Empty HTML for stats page: {url}")
-                return
+                return None
 
             tree = html.fromstring(html_str)
+            sel = get_selectors("match_stats", tree)
 
             # --- Detect left/right player blocks and the winner side ---
-            left_is_winner = bool(tree.xpath("//div[@class='stats-item'][1]//div[contains(@class,'winner')]"))
-            right_is_winner = bool(tree.xpath("//div[@class='stats-item'][2]//div[contains(@class,'winner')]"))
+            left_is_winner = bool(sel.left_winner(tree))
+            right_is_winner = bool(sel.right_winner(tree))
 
             if left_is_winner == right_is_winner:
                 self.logger.warning("Cannot determine winner side unambiguously; skipping page.")
-                return
+                return None
 
             winner_is_left = left_is_winner
 
             # --- Collect value nodes (player/opponent views) ---
-            player_stats_nodes = tree.xpath("//div[@class='player-stats-item']/div[@class='value']")
-            opponent_stats_nodes = tree.xpath("//div[@class='opponent-stats-item']/div[@class='value']")
+            player_stats_nodes = sel.player_values(tree)
+            opponent_stats_nodes = sel.opponent_values(tree)
             if not player_stats_nodes or not opponent_stats_nodes:
                 self.logger.warning("No stats value nodes found; skipping.")
-                return
+                return None
 
             # Parsers ----------------------------------------------------------------
 
@@ -190,7 +257,7 @@ class StatsATPExtractor(BaseExtractor):
                 We remove '%' and keep only integers; returns (x, y).
                 """
                 s = (raw_text or "").strip().replace("%", "")
-                m = re.search(r"\((\d+)\s*/\s*(\d+)\)", s)
+                m = sel.ratio.search(s)
                 if m:
                     return int(m.group(1)), int(m.group(2))
                 try:
@@ -254,48 +321,8 @@ class StatsATPExtractor(BaseExtractor):
                 *get_pair(loser_stats, 14),             # los_total_points_won, los_total_points_total
             ]
 
-            self.data.append(row)
+            return row
 
         except Exception as e:
-            self.logger.error(f"_parse_stats error for {url_tpl[2]}: {e}")
-
-    # --------------------------------------------------------------------- #
-    # DB load override (validation included)                                #
-    # --------------------------------------------------------------------- #
-
-    def _load_to_stg(self) -> None:
-        """
-        Override to validate row length vs. number of INSERT placeholders and
-        log problematic rows instead of failing the whole batch.
-        """
-        cur = None
-        try:
-            self._connect_to_db()
-            cur = self.con.cursor()
-
-            if not (self.INSERT_STR and self.INSERT_STR.strip()):
-                self.logger.warning("INSERT_STR is empty; skipping DB load.")
-                return
-
-            # Count placeholders robustly (':1', ':2', ...) rather than any colon
-            expected_params = len(re.findall(r":\d+", self.INSERT_STR))
-            valid_rows: List[List[Optional[int]]] = []
-
-            for idx, row in enumerate(self.data):
-                if len(row) != expected_params:
-                    self.logger.error(
-                        f"[Row {idx}] Wrong length: got {len(row)}, expected {expected_params} placeholders."
-                    )
-                    self.logger.info(f"Problematic row: {row}")
-                    continue
-                valid_rows.append(row)
-
-            if valid_rows:
-                cur.executemany(self.INSERT_STR, valid_rows)
-                self.con.commit()
-                self.logger.info(f"{len(valid_rows)} row(s) inserted.")
-            else:
-                self.logger.warning("No valid rows to insert.")
-        finally:
-            if cur:
-                cur.close()
+            self.logger.error(f"_fetch_and_parse_stats error for {url_tpl[2]}: {e}")
+            return None
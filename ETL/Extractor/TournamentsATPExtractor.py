@@ -4,6 +4,8 @@ from lxml import html
 import os
 
 from base_extractor import BaseExtractor  
+from delta_hash import atp_tournaments_delta_hash, parse_date
+from page_selectors import get_selectors
 from constants import ATP_URL_PREFIX, ATP_TOURNAMENT_SERIES
 
 
@@ -44,50 +46,79 @@ class TournamentsATPExtractor(BaseExtractor):
             ") VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9, :10, "
             ":11, :12, :13, :14, :15, :16, :17, :18, :19)"
         )
+        # year may arrive as int or str depending on the caller → let cx_Oracle infer it
+        self.INSERT_TYPES = [
+            64, 128, None, 48, 256, 128, 128, 256, 256, 8,
+            8, 8, 10, 10, 8, 8, 16, 16, 256,
+        ]
         self.PROCESS_PROC_NAMES = [
             "sp_process_atp_tournaments",
             "sp_apply_points_rules",
             "sp_populate_atp_draws",
         ]
+        self.DELTA_TABLE = "stg_tournaments"
+        self.DELTA_CORE_TABLE = "atp_tournaments"
         super()._init()
 
+    def _delta_key_hash(self, row: list) -> Tuple[str, int]:
+        """
+        Tournament id and `sf_atp_tournaments_delta_hash` of the scraped columns.
+
+        Series and country are hashed as scraped (the core values are resolved
+        against `series` / `countries` in SQL), so this fingerprints the staging
+        row rather than reproducing the core `delta_hash`.
+        """
+        return row[0], atp_tournaments_delta_hash(
+            id=row[0], name=row[1], year=row[2], code=row[3], url=row[4], slug=row[5],
+            location=row[6], sgl_draw_url=row[7], sgl_pdf_url=row[8],
+            indoor_outdoor=row[9], surface=row[10], series_category_id=row[11],
+            start_dtm=parse_date(row[12], "%d.%m.%Y"), finish_dtm=parse_date(row[13], "%d.%m.%Y"),
+            sgl_draw_qty=row[14], dbl_draw_qty=row[15], prize_money=row[16],
+            prize_currency=row[17], country_code=row[18],
+        )
+
     # ------------------------------- Parsing ---------------------------------
 
     def _parse(self) -> None:
         """Parse all configured series for the given year and populate `self.data`."""
         self.data = []
         for series in ATP_TOURNAMENT_SERIES:
-            self._parse_series(series)
+            self._journaled(f"series:{series}", lambda: self._parse_series(series))
 
-    def _parse_series(self, tournament_series: str) -> None:
+    def _parse_series(self, tournament_series: str) -> bool:
         """
         Parse one tournament series (e.g., 'atp', 'ch', 'gs' depending on your constants).
 
         Args:
             tournament_series: Series key used by the ATP archive querystring.
+
+        Returns:
+            True if the archive page and every overview page were fetched and parsed.
         """
         archive_url = (
             f"{ATP_URL_PREFIX}/en/scores/results-archive"
             f"?year={self.year}&tournamentType={tournament_series}"
         )
-        archive_html = self._request_url_by_chrome(archive_url)
+        archive_html = self._request_url(archive_url, expect="tournament__profile")
         if not archive_html:
             self.logger.warning(f"Empty archive page for {archive_url}")
-            return
+            return False
 
         tree = html.fromstring(archive_html)
+        sel = get_selectors("tournament_archive", tree)
 
         # Lists extracted from archive page
-        tournament_titles: List[str] = tree.xpath("//div[@class='top']/span[@class='name']/text()")
-        overview_urls: List[str] = tree.xpath("//a[contains(@class,'tournament__profile')]/@href")
-        date_labels: List[str] = tree.xpath("//div[@class='bottom']//span[contains(@class,'Date')]/text()")
-        banners: List[str] = tree.xpath("//div[contains(@class,'event-badge_container')]//img[contains(@class,'events_banner')]/@src")
+        tournament_titles: List[str] = sel.titles(tree)
+        overview_urls: List[str] = sel.overview_hrefs(tree)
+        date_labels: List[str] = sel.dates(tree)
+        banners: List[str] = sel.banners(tree)
 
         n_items = min(len(overview_urls), len(tournament_titles), len(date_labels))
         if n_items == 0:
             self.logger.warning(f"No tournaments found in archive: {archive_url}")
-            return
+            return False
 
+        complete = True
         for i in range(n_items):
             try:
                 tournament_name = (tournament_titles[i] or "").strip()
@@ -122,29 +153,31 @@ class TournamentsATPExtractor(BaseExtractor):
                 tournament_id = f"{self.year}-{code}"
 
                 # Fetch overview page to get left/right columns info
-                overview_html = self._request_url_by_chrome(overview_url)
+                overview_html = self._request_url(overview_url, expect="td_content")
                 if not overview_html:
                     self.logger.warning(f"Empty overview page for {overview_url}")
+                    complete = False
                     continue
 
                 o = html.fromstring(overview_html)
+                osel = get_selectors("tournament_overview", o)
 
                 # Draw sizes (e.g., "32/16")
-                draw_texts: List[str] = o.xpath("//div[@class='td_content']/ul[@class='td_left']/li[2]/span[2]/text()")
+                draw_texts: List[str] = osel.draw(o)
                 draw_str = (draw_texts[0] or "").strip() if draw_texts else ""
                 sgl_draw_qty, dbl_draw_qty = self._split_draw(draw_str)
 
                 # Surface
-                surface_texts: List[str] = o.xpath("//div[@class='td_content']/ul[@class='td_left']/li[3]/span[2]/text()")
+                surface_texts: List[str] = osel.surface(o)
                 surface = (surface_texts[0] or "").strip() if surface_texts else ""
                 surface = self.remap_surface_name(surface) or surface  # normalize if mapping exists
 
                 # Prize money / currency
-                prize_texts: List[str] = o.xpath("//div[@class='td_content']/ul[@class='td_left']/li[4]/span[2]/text()")
+                prize_texts: List[str] = osel.prize(o)
                 prize_money, prize_currency = self._parse_prize(prize_texts[0] if prize_texts else "")
 
                 # Location (e.g., "Doha, Qatar")
-                loc_texts: List[str] = o.xpath("//div[@class='td_content']/ul[@class='td_right']/li[1]/span[2]/text()")
+                loc_texts: List[str] = osel.location(o)
                 location = (loc_texts[0] or "").strip() if loc_texts else ""
                 city, country_name = self._split_location(location)
                 country_name = self.remap_country_name(country_name)
@@ -167,6 +200,7 @@ class TournamentsATPExtractor(BaseExtractor):
                     ])
 
             except Exception as e:
+                complete = False
                 self.logger.warning(f"Row parse error: {e}")
                 # Useful breadcrumbs for debugging
                 try:
@@ -182,6 +216,7 @@ class TournamentsATPExtractor(BaseExtractor):
                 except Exception:
                     pass
                 continue
+        return complete
 
     # ------------------------------- Helpers ---------------------------------
 
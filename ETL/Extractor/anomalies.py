@@ -0,0 +1,80 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from constants import ANOMALY_SAMPLES, ANOMALY_TABLE
+
+_INSERT = (
+    "INSERT INTO {table} (batch_dtm, module, kind, severity, qty, samples) "
+    "VALUES (:1, :2, :3, :4, :5, :6)"
+)
+_SAMPLES_MAX_LEN = 4000  # samples column width
+
+
+class AnomalySink:
+    """
+    Structured collector for data anomalies found in hot loops (score parsing).
+
+    `record` bumps a counter per anomaly kind and keeps the first ANOMALY_SAMPLES
+    examples; an example's text is only built when it is kept, so an anomaly
+    that is not sampled costs a dict update. `flush` logs one summary line per
+    kind (at the kind's level) once per run and, if ANOMALY_TABLE is set, writes
+    the counts and samples there through the storage backend.
+    """
+
+    def __init__(self, module: str, samples: Optional[int] = ANOMALY_SAMPLES):
+        self.module = module
+        self.samples = samples  # Examples kept per kind (None = all of them)
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.levels: Dict[str, str] = {}
+        self.examples: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return sum(self.counts.values())
+
+    def record(self, kind: str, level: str, subject: Any, before: str = "", after: str = "") -> None:
+        """
+        Count one `kind` anomaly ('info', 'warning' or 'error' `level`); if it is
+        sampled its example text is `before + str(subject) + after`.
+        """
+        with self._lock:
+            n = self.counts.get(kind, 0) + 1
+            self.counts[kind] = n
+            if self.samples is None or n <= self.samples:
+                if n == 1:
+                    self.levels[kind] = level
+                    self.examples[kind] = []
+                self.examples[kind].append(f"{before}{subject}{after}")
+
+    def flush(self, logger, storage=None, con=None) -> Optional[str]:
+        """
+        Log the collected anomalies, write them to ANOMALY_TABLE (when set and a
+        session is given) and reset; returns a one-line summary (None if empty).
+        """
+        with self._lock:
+            counts, levels, examples = self.counts, self.levels, self.examples
+            self.counts, self.levels, self.examples = {}, {}, {}
+        if not counts:
+            return None
+
+        kinds = sorted(counts, key=lambda k: (-counts[k], k))
+        for kind in kinds:
+            sampled = examples[kind]
+            more = f" (+{counts[kind] - len(sampled)} more)" if counts[kind] > len(sampled) else ""
+            getattr(logger, levels[kind])(
+                f"Anomalies {kind}: {counts[kind]}; e.g. " + " | ".join(sampled) + more
+            )
+
+        if ANOMALY_TABLE and storage is not None and con is not None:
+            now = datetime.now().replace(microsecond=0)
+            rows = [
+                [now, self.module, kind, levels[kind], counts[kind],
+                 " | ".join(examples[kind])[:_SAMPLES_MAX_LEN]]
+                for kind in kinds
+            ]
+            _, errors = storage.load(con, _INSERT.format(table=ANOMALY_TABLE), rows, None)
+            for offset, message in errors:
+                logger.error(f"Anomaly row {rows[offset][2]} not written to {ANOMALY_TABLE}: {message}")
+
+        return ", ".join(f"{kind}={counts[kind]}" for kind in kinds)
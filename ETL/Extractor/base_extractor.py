@@ -1,19 +1,29 @@
 import os
-import gc
+import re
 import csv
-import time
-import psutil
-import requests
-import cx_Oracle
+import glob
+from datetime import date
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
-import undetected_chromedriver as uc
 
 from constants import (
-    CONNECTION_STRING, INDOOR_OUTDOOR_MAP, SURFACE_MAP, COUNTRY_NAME_MAP,
+    CHECKPOINT_DIR, CHUNK_SIZE, ENRICH_CHUNK_SIZE, WORKLIST_PAGE_SIZE, INDOOR_OUTDOOR_MAP, SURFACE_MAP, COUNTRY_NAME_MAP,
     COUNTRY_CODE_MAP, STADIE_CODES_MAP, PLAYERS_ATP_URL_MAP, CITY_COUNTRY_MAP,
     WEBDRIVER_PHANTOMJS_EXECUTABLE_PATH
 )
+from checkpoint import RunJournal
+from delta_hash import get_delta_index, drop_unchanged
+from driver_pool import get_driver_pool
+from fetcher import get_fetcher, is_challenge_page
+from page_cache import get_page_cache
+from page_archive import get_archive
+from rate_limiter import get_rate_limiter, OUTCOME_OK, OUTCOME_BLOCKED, OUTCOME_TIMEOUT, OUTCOME_ERROR
+from reference_data import get_reference_data, expire_reference_data
+from anomalies import AnomalySink
+from storage import get_storage
 from logger.logger import Logger
 
 
@@ -23,7 +33,7 @@ class BaseExtractor:
     Handles:
       - Web scraping (Selenium/PhantomJS/requests)
       - Data preprocessing and mapping utilities
-      - Database connection, truncation, insertion, and stored procedure execution
+      - Database session (one per run, from the storage backend), truncation, insertion, and stored procedure execution
       - Logging and error handling
     """
 
@@ -34,23 +44,134 @@ class BaseExtractor:
         self.response_str = ""
         self.TABLE_NAME = ""
         self.INSERT_STR = ""
+        # Bind type per INSERT_STR placeholder: int → VARCHAR2 max size,
+        # cx_Oracle.DB_TYPE_NUMBER for numbers, None → let cx_Oracle infer
+        self.INSERT_TYPES = []
+        self._compiled_insert = None
         self.PROCESS_PROC_NAMES = []
+        # Targeted enrichment: after PROCESS_PROC_NAMES, ENRICH_PROC_NAME is called with
+        # the ids CHANGED_IDS_SQL returns (rows the process steps wrote, batch_id > :mark)
+        self.ENRICH_PROC_NAME = ""
+        self.CHANGED_IDS_SQL = ""
+        self.changed_ids = 0
         self.LOGFILE_NAME = ""
         self.CSVFILE_NAME = ""
         self.MODULE_NAME = ""
 
-        # WebDriver state
-        self._driver = None
-        self._driver_use_count = 0
-        self._max_driver_uses = 50  # Restart driver every N uses
+        # Streaming sink: rows are loaded to staging every LOAD_CHUNK_SIZE rows
+        # while parsing (0 = load everything after _parse, as before)
+        self.LOAD_CHUNK_SIZE = CHUNK_SIZE
+        self.loaded_rows = 0
+        self._csv_started = False
+
+        # Storage backend (Oracle pool or embedded local database)
+        self._storage = get_storage()
+
+        # Fetch state: record/replay archive, on-disk cache, then plain HTTP,
+        # then drivers leased from a process-wide pool
+        self.con = None
+        self._archive = get_archive()
+        self._page_cache = get_page_cache()
+        self._fetcher = get_fetcher()
+        self._driver_pool = get_driver_pool()
+        self._rate_limiter = get_rate_limiter()
+
+        # Checkpoint journal of finished work units (opened by extract())
+        self._journal = None
+
+        # Client-side delta hashing: subclasses that implement `_delta_key_hash`
+        # set DELTA_TABLE (and DELTA_CORE_TABLE, the table its MERGE writes);
+        # unchanged rows are dropped before `_load_to_stg`
+        self.DELTA_TABLE = ""
+        self.DELTA_CORE_TABLE = ""
+        self._delta_index = None
+        self._delta_pending = []
+        self.unchanged_rows = 0
 
         # Init logger and DB
         self._init()
 
     def _init(self):
-        """Initialize logger and database connection."""
+        """
+        Initialize logger and database connection (no DB when replaying an
+        archive, unless the storage backend is embedded).
+        """
         self.logger = Logger(self.LOGFILE_NAME, self.MODULE_NAME)
+        # Data anomalies found while parsing, summarized once per run (see anomalies.py)
+        self.anomalies = AnomalySink(self.MODULE_NAME or type(self).__name__)
+        self._compile_insert()  # fail fast on an INSERT_STR / INSERT_TYPES mismatch
+        if not self._db_enabled:
+            self.logger.info(f"Replaying pages from archive {self._archive.path}; DB disabled.")
+            return
         self._connect_to_db()
+        if self.DELTA_TABLE:
+            self._delta_index = get_delta_index(
+                f"{self._storage.name}_{self.DELTA_TABLE}", self._storage.identity(self.con)
+            )
+            if self._delta_index is not None:
+                self._check_delta_index()
+                self._seed_delta_index()
+
+    @property
+    def _replaying(self) -> bool:
+        """True when pages and worklists are served from a recorded archive."""
+        return self._archive is not None and self._archive.replaying
+
+    @property
+    def _db_enabled(self) -> bool:
+        """False only when replaying against a server database (parse-only runs)."""
+        return not self._replaying or self._storage.embedded
+
+    def _worklist(self, name: str, build):
+        """
+        Run a discovery step (`build()` usually queries the DB) so that its result
+        is recorded to / replayed from the page archive when one is active.
+
+        `build()` may return a generator (see `_iter_keyset`); it is consumed
+        lazily unless the archive has to record it. The archive entry is named
+        after the run scope (year or rolling window), so one archive can hold
+        several seasons and a replay never serves another scope's list.
+        """
+        if self._archive is None:
+            return build()
+        scope = getattr(self, "year", None) or "window"
+        return self._archive.worklist(f"{name}_{scope}", lambda: list(build()))
+
+    def _reference_data(self):
+        """Process-wide reference-data cache (see reference_data.py); None without a DB session."""
+        if self.con is None:
+            return None
+        return get_reference_data(self.con)
+
+    def _iter_keyset(self, sql: str, params: dict, page_size: int = WORKLIST_PAGE_SIZE):
+        """
+        Yield the rows of a discovery query page by page (keyset pagination).
+
+        `sql` must select a unique pagination key as its last column, named
+        `page_key`; it is used to resume after each page and is not yielded.
+        Every page is a short query of its own, so no cursor stays open while
+        the caller fetches pages or loads/processes staging on `self.con`.
+        """
+        first = f"SELECT * FROM ({sql}) q ORDER BY q.page_key {self._storage.first_rows}"
+        after = f"SELECT * FROM ({sql}) q WHERE q.page_key > :last_key ORDER BY q.page_key {self._storage.first_rows}"
+        last_key = None
+        while True:
+            cur = self.con.cursor()
+            try:
+                cur.arraysize = page_size
+                if hasattr(cur, "prefetchrows"):
+                    cur.prefetchrows = page_size + 1
+                if last_key is None:
+                    rows = cur.execute(first, {**params, "page_size": page_size}).fetchall()
+                else:
+                    rows = cur.execute(after, {**params, "page_size": page_size, "last_key": last_key}).fetchall()
+            finally:
+                cur.close()
+            for row in rows:
+                yield tuple(row[:-1])
+            if len(rows) < page_size:
+                return
+            last_key = rows[-1][-1]
 
     # -------------------------------------------------------------------------
     # -------------------------- STATIC HELPERS -------------------------------
@@ -155,55 +276,99 @@ class BaseExtractor:
     # --------------------------- WEBDRIVER -----------------------------------
     # -------------------------------------------------------------------------
 
-    def _init_driver(self):
-        """Initialize a fresh undetected Chrome driver with optimized settings."""
-        # Kill stale Chrome processes
-        chrome_killed = 0
-        for proc in psutil.process_iter(["name"]):
-            try:
-                if proc.info["name"] and "chrome" in proc.info["name"].lower():
-                    proc.kill()
-                    chrome_killed += 1
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+    def _request_url(self, url: str, expect: str = None) -> str:
+        """
+        Request a URL through the on-disk page cache and, on a miss, the tiered
+        fetcher: pooled plain HTTP first, Chrome only for URL patterns that need
+        JS or hit a Cloudflare challenge. Successful fetches are cached.
 
-        self.logger.info(f"🧹 Killed {chrome_killed} Chrome processes before driver restart.")
-
-        options = uc.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--mute-audio")
-        options.add_argument("--window-size=800,600")
-        options.add_argument("--incognito")
-        options.page_load_strategy = "eager"
-        options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-        )
+        Args:
+            url: Page URL (falls back to `self.url` if empty).
+            expect: Optional substring a usable page must contain (e.g. a container class).
+        """
+        if not url:
+            url = self.url
 
-        # Disable unnecessary resources
-        prefs = {
-            "profile.managed_default_content_settings.images": 2,
-            "profile.managed_default_content_settings.stylesheets": 2,
-            "profile.managed_default_content_settings.cookies": 2,
-            "profile.managed_default_content_settings.plugins": 2,
-            "profile.managed_default_content_settings.popups": 2,
-            "profile.managed_default_content_settings.geolocation": 2,
-            "profile.managed_default_content_settings.media_stream": 2,
-        }
-        options.add_experimental_option("prefs", prefs)
+        if self._replaying:
+            content = self._archive.get(url)
+            if content is None:
+                self.logger.warning(f"URL not in archive: {url}")
+            return content
+
+        content = None
+        if self._page_cache is not None:
+            cached = self._page_cache.get(url)
+            if cached is not None and (not expect or expect in cached):
+                content = cached
+
+        if content is None:
+            content = self._fetcher.fetch(url, self._request_url_by_chrome, expect=expect)
+            if content and self._page_cache is not None and not is_challenge_page(content):
+                self._page_cache.put(url, content)
+
+        if content and self._archive is not None and self._archive.recording:
+            self._archive.record(url, content)
+        return content
+
+    def _iter_mapped(self, items, fn, workers: int = 1):
+        """
+        Yield `(item, fn(item))` pairs in input order while running up to `workers`
+        calls concurrently (bounded prefetch window of 2 x workers).
 
-        self._driver = uc.Chrome(options=options)
-        self._driver.set_page_load_timeout(15)
-        self._driver_use_count = 0
-        self.logger.info("✅ New Chrome driver initialized.")
+        Results are handed back in exactly the same order as a serial loop.
+        A call that raises is logged and yields `None`.
+
+        Args:
+            items: Work items (e.g. tournament tuples).
+            fn: Per-item work (fetch, or fetch + parse).
+            workers: Concurrent calls; 1 keeps the plain serial path.
+        """
+        if workers <= 1:
+            for item in items:
+                yield item, fn(item)
+            return
+
+        def result(item, future):
+            try:
+                return item, future.result()
+            except Exception as e:
+                self.logger.error(f"❌ Worker failed for {item}: {e}")
+                return item, None
+
+        window = 2 * workers
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+            for item in items:
+                pending.append((item, pool.submit(fn, item)))
+                if len(pending) >= window:
+                    yield result(*pending.popleft())
+            while pending:
+                yield result(*pending.popleft())
+
+    def _iter_fetched(self, items, url_of, expect: str = None, workers: int = 1):
+        """
+        Yield `(item, html)` pairs in input order while fetching up to `workers`
+        pages concurrently; parsing stays in the caller's thread. A failed fetch
+        yields `html=None`.
+
+        Args:
+            items: Work items (e.g. tournament tuples).
+            url_of: Callable mapping an item to its page URL.
+            expect: Marker passed to `_request_url`.
+            workers: Concurrent fetches; 1 keeps the plain serial path.
+        """
+        def fetch(item):
+            url = url_of(item)
+            if self._unit_done(url):
+                return None  # already parsed by an earlier (interrupted) run
+            return self._request_url(url, expect=expect)
+
+        return self._iter_mapped(items, fetch, workers)
 
     def _request_url_by_chrome(self, url: str, timeout: int = 5, max_retries: int = 3) -> str:
         """
-        Request a URL using Chrome driver, with retry logic and Cloudflare detection.
+        Request a URL using a Chrome driver leased from the shared pool, with retry
+        logic and Cloudflare detection.
         Returns HTML content or None if blocked/fails.
         """
         if not url:
@@ -213,94 +378,293 @@ class BaseExtractor:
         attempt = 0
         while attempt < max_retries:
             try:
-                # Restart driver if needed
-                if (
-                    not hasattr(self, "_driver")
-                    or self._driver is None
-                    or self._driver_use_count >= self._max_driver_uses
-                ):
-                    if getattr(self, "_driver", None):
-                        try:
-                            self._driver.quit()
-                        except Exception:
-                            pass
-                        self._driver = None
-                        gc.collect()
-                        time.sleep(0.5)
-                    self._init_driver()
-
-                self.logger.info(f"🌐 [Attempt {attempt + 1}] Accessing: {url}")
-                self._driver.get(url)
-
-                WebDriverWait(self._driver, 1.5, poll_frequency=0.05).until(
-                    lambda d: d.execute_script("return document.readyState") == "complete"
-                )
+                self._rate_limiter.acquire(url)
+                with self._driver_pool.lease() as pooled:
+                    driver = pooled.driver
+                    self.logger.info(f"🌐 [Attempt {attempt + 1}] Accessing: {url} (driver #{pooled.driver_id})")
+                    driver.get(url)
 
-                content = self._driver.page_source
-                self._driver_use_count += 1
+                    WebDriverWait(driver, 1.5, poll_frequency=0.05).until(
+                        lambda d: d.execute_script("return document.readyState") == "complete"
+                    )
 
-                if "cf-chl" in content or "Verifique que usted es un ser humano" in content:
+                    content = driver.page_source
+
+                if is_challenge_page(content):
+                    self._rate_limiter.report(url, OUTCOME_BLOCKED)
                     self.logger.warning(f"⚠ Cloudflare blocked access to {url}.")
                     return None
 
+                self._rate_limiter.report(url, OUTCOME_OK)
                 return content
 
             except Exception as e:
+                # Only page-load timeouts back off the host; a local lease timeout
+                # (no free driver) or a driver/JS error says nothing about the site
+                outcome = OUTCOME_TIMEOUT if isinstance(e, TimeoutException) else OUTCOME_ERROR
+                self._rate_limiter.report(url, outcome)
                 self.logger.error(f"❌ Error in attempt {attempt + 1} accessing {url}: {str(e)}")
                 attempt += 1
-                time.sleep(1.2)
 
         self.logger.error(f"❌ Failed after {max_retries} attempts for {url}")
         return None
 
+    # -------------------------------------------------------------------------
+    # --------------------------- CHECKPOINTS ---------------------------------
+    # -------------------------------------------------------------------------
+
+    def _journal_path(self) -> str:
+        """
+        Journal file for this extractor and scope: the year, or the rolling window
+        of the run date (its pages change from one day to the next).
+        """
+        scope = getattr(self, "year", None) or f"window_{date.today():%Y%m%d}"
+        return os.path.join(CHECKPOINT_DIR, f"{self.__class__.__name__}_{scope}.jsonl")
+
+    def _expire_window_journals(self, path: str) -> None:
+        """Delete journals left by crashed rolling-window runs of earlier days."""
+        for stale in glob.glob(os.path.join(CHECKPOINT_DIR, f"{self.__class__.__name__}_window*.jsonl")):
+            if os.path.abspath(stale) != os.path.abspath(path):
+                self.logger.info(f"Discarding stale checkpoint {stale}.")
+                os.remove(stale)
+
+    def _open_journal(self) -> None:
+        """Open (or resume) the run journal; disabled when replaying or CHECKPOINT_DIR is empty."""
+        if not CHECKPOINT_DIR or self._replaying:
+            return
+        path = self._journal_path()
+        if not getattr(self, "year", None):
+            self._expire_window_journals(path)
+        self._journal = RunJournal(path)
+        if len(self._journal):
+            self.logger.info(f"Resuming from checkpoint {self._journal.path}: {len(self._journal)} unit(s) done.")
+
+    def _unit_done(self, unit: str) -> bool:
+        """True if `unit` was already parsed by an earlier run of the same scope."""
+        return self._journal is not None and self._journal.done(unit)
+
+    def _journaled(self, unit: str, parse) -> None:
+        """
+        Run `parse()` (which appends to `self.data`) for one work unit, or restore
+        its rows from the journal if the unit was already completed.
+
+        `parse()` returns True only when the unit's pages were fetched and parsed
+        without error; other units are not journaled, so a resumed run (or a DAG
+        retry) fetches them again.
+        """
+        if self._journal is None:
+            parse()
+        elif self._journal.done(unit):
+            self.data.extend(self._journal.rows(unit))
+        else:
+            start = len(self.data)
+            if parse():
+                self._journal.append(unit, self.data[start:])
+        # Units are the flush boundary of the streaming sink
+        self._flush_rows()
+
     # -------------------------------------------------------------------------
     # --------------------------- DATABASE ------------------------------------
     # -------------------------------------------------------------------------
 
     def _connect_to_db(self):
-        """Establish a new Oracle DB connection."""
-        self.con = cx_Oracle.connect(CONNECTION_STRING, encoding="UTF-8")
-        self.logger.info("(Re)connected to DB.")
+        """Check out a session from the storage backend (reused for the whole run)."""
+        if self.con is not None:
+            return
+        self.con = self._storage.acquire()
+        self.logger.info(f"Connected to DB ({self._storage.name} session).")
+
+    def _release_db(self):
+        """Return this extractor's session to the storage backend."""
+        if self.con is not None:
+            self._storage.release(self.con)
+            self.con = None
 
     def _truncate_table(self):
         """Truncate target table before loading new data."""
-        try:
+        if self.TABLE_NAME:
             self._connect_to_db()
-            cur = self.con.cursor()
-            if self.TABLE_NAME:
-                cur.execute(f"TRUNCATE TABLE {self.TABLE_NAME}")
-        finally:
-            cur.close()
+            self._storage.truncate(self.con, self.TABLE_NAME)
 
     def _store_in_csv(self):
-        """Store extracted data in a CSV file."""
+        """Store extracted data in a CSV file (appends after the first chunk of a run)."""
         if self.CSVFILE_NAME:
-            with open(self.CSVFILE_NAME, "w", encoding="utf-8", newline="") as csv_file:
+            mode = "a" if self._csv_started else "w"
+            with open(self.CSVFILE_NAME, mode, encoding="utf-8", newline="") as csv_file:
                 writer = csv.writer(csv_file)
                 writer.writerows(self.data)
+            self._csv_started = True
+
+    @property
+    def _streaming(self) -> bool:
+        """True when rows are flushed to staging in chunks during parsing."""
+        return self.LOAD_CHUNK_SIZE > 0 and self._db_enabled
+
+    def _flush_rows(self, force: bool = False) -> None:
+        """
+        Streaming sink: once `LOAD_CHUNK_SIZE` rows are buffered (or when `force`),
+        write them to CSV and staging and release them from memory.
+
+        The staging table is truncated at the start of a streaming run, so it holds
+        exactly this run's rows when the process procedures are called.
+        """
+        if not self._streaming or not self.data:
+            return
+        if not force and len(self.data) < self.LOAD_CHUNK_SIZE:
+            return
+        self._store_in_csv()
+        self._load_to_stg()
+        self.loaded_rows += len(self.data)
+        self.data = []
 
     def _process_data(self):
-        """Call stored procedures defined in PROCESS_PROC_NAMES list."""
+        """Call stored procedures defined in PROCESS_PROC_NAMES list, then enrich what they changed."""
+        self._connect_to_db()
+        mark = self._storage.batch_mark(self.con) if self.ENRICH_PROC_NAME else None
+        for proc in self.PROCESS_PROC_NAMES:
+            self.logger.info(f"Calling procedure {proc}")
+            self._storage.call(self.con, proc)
+        if self.PROCESS_PROC_NAMES:
+            expire_reference_data()
+        if mark is not None:
+            self._enrich_changed(mark)
+
+    def _enrich_changed(self, mark: int) -> None:
+        """
+        Call ENRICH_PROC_NAME for the rows the process steps inserted or changed,
+        ENRICH_CHUNK_SIZE ids per call. The MERGEs only stamp a new batch_id on
+        rows whose delta hash differs, so unchanged rows are never re-enriched.
+        """
+        if not self._storage.supports(self.ENRICH_PROC_NAME):
+            self.logger.info(f"{self.ENRICH_PROC_NAME} not available on the {self._storage.name} backend; skipped.")
+            return
+        cur = self.con.cursor()
         try:
-            self._connect_to_db()
-            cur = self.con.cursor()
-            for proc in self.PROCESS_PROC_NAMES:
-                self.logger.info(f"Calling procedure {proc}")
-                cur.callproc(proc)
+            ids = [row[0] for row in cur.execute(self.CHANGED_IDS_SQL, {"mark": mark})]
         finally:
             cur.close()
+        self.changed_ids += len(ids)
+        if not ids:
+            self.logger.info("No changed rows to enrich.")
+            return
+        for i in range(0, len(ids), ENRICH_CHUNK_SIZE):
+            self._storage.call(self.con, self.ENRICH_PROC_NAME, ids[i:i + ENRICH_CHUNK_SIZE])
+        self.logger.info(
+            f"{self.ENRICH_PROC_NAME}: {len(ids)} changed row(s) in {-(-len(ids) // ENRICH_CHUNK_SIZE)} call(s)"
+        )
 
-    def _load_to_stg(self):
-        """Insert data into staging table using INSERT_STR template."""
+    # ------------------------- Client-side delta ---------------------------
+
+    def _delta_key_hash(self, row):
+        """
+        Return (key, delta hash) of a staging row, computed with the Python twin
+        of the table's `sf_*_delta_hash` (see delta_hash.py). Subclasses that set
+        DELTA_TABLE implement it.
+        """
+        raise NotImplementedError
+
+    def _delta_target_stamp(self):
+        """(row count, max batch_id) of DELTA_CORE_TABLE, the state the index mirrors."""
+        cur = self.con.cursor()
         try:
-            self._connect_to_db()
-            cur = self.con.cursor()
-            if self.INSERT_STR:
-                cur.executemany(self.INSERT_STR, self.data)
-                self.con.commit()
-                self.logger.info(f"{len(self.data)} row(s) inserted.")
+            qty, max_batch_id = cur.execute(
+                f"SELECT COUNT(*), COALESCE(MAX(batch_id), 0) FROM {self.DELTA_CORE_TABLE}"
+            ).fetchone()
         finally:
             cur.close()
+        return int(qty), int(max_batch_id)
+
+    def _check_delta_index(self) -> None:
+        """Empty the hash index if the core table went backwards since its last commit."""
+        reason = self._delta_index.check_target(self._delta_target_stamp())
+        if reason:
+            self.logger.warning(f"Delta index for {self.DELTA_TABLE} reset ({reason}); all rows are staged.")
+
+    def _seed_delta_index(self) -> None:
+        """Optionally fill an empty hash index from the core table (subclass hook)."""
+        pass
+
+    def _drop_unchanged_rows(self, rows):
+        """Drop rows whose delta hash equals the indexed one; remember the rest."""
+        if self._delta_index is None:
+            return rows
+        keyed = []
+        for row in rows:
+            key, h = self._delta_key_hash(row)
+            keyed.append((key, h, row))
+        changed, pending = drop_unchanged(self._delta_index, keyed)
+        self._delta_pending.extend(pending)
+        skipped = len(rows) - len(changed)
+        if skipped:
+            self.unchanged_rows += skipped
+            self.logger.info(f"{skipped} unchanged row(s) dropped by delta hash.")
+        return changed
+
+    def _commit_delta_index(self) -> None:
+        """Record hashes of the rows loaded this run (after processing succeeded)."""
+        if self._delta_index is not None:
+            self._delta_index.commit(self._delta_pending, self._delta_target_stamp())
+            self._delta_pending = []
+
+    def _compile_insert(self):
+        """
+        Compile INSERT_STR once: count its distinct placeholders (':1', ':2', ...)
+        and check INSERT_TYPES against them.
+
+        Returns:
+            (expected_params, input_sizes) where input_sizes is None when no types are declared.
+        Raises:
+            ValueError: if INSERT_TYPES does not match the number of placeholders.
+        """
+        if self._compiled_insert is not None and self._compiled_insert[0] == self.INSERT_STR:
+            return self._compiled_insert[1:]
+
+        expected_params = len(set(re.findall(r":(\d+)", self.INSERT_STR)))
+        if self.INSERT_TYPES and len(self.INSERT_TYPES) != expected_params:
+            raise ValueError(
+                f"INSERT_TYPES has {len(self.INSERT_TYPES)} entries for {expected_params} placeholders"
+            )
+        input_sizes = list(self.INSERT_TYPES) if self.INSERT_TYPES else None
+        self._compiled_insert = (self.INSERT_STR, expected_params, input_sizes)
+        return expected_params, input_sizes
+
+    def _load_to_stg(self):
+        """
+        Array-bind the buffered rows into staging using INSERT_STR in one round trip.
+
+        - Bind types come from INSERT_TYPES (`setinputsizes` on Oracle), so a None
+          in the first row does not force cx_Oracle to re-infer and rebind.
+        - Rows of the wrong length are logged and skipped; rows whose delta hash
+          is unchanged since the last processed run are dropped.
+        - A bad row does not fail the whole chunk (Oracle batch errors); each
+          failing row is logged with its database error.
+        """
+        if not (self.INSERT_STR and self.INSERT_STR.strip()):
+            self.logger.warning("INSERT_STR is empty; skipping DB load.")
+            return
+
+        expected_params, input_sizes = self._compile_insert()
+        valid_rows = []
+        for idx, row in enumerate(self.data):
+            if len(row) != expected_params:
+                self.logger.error(
+                    f"[Row {idx}] Wrong length: got {len(row)}, expected {expected_params} placeholders."
+                )
+                self.logger.info(f"Problematic row: {row}")
+                continue
+            valid_rows.append(row)
+
+        valid_rows = self._drop_unchanged_rows(valid_rows)
+        if not valid_rows:
+            self.logger.warning("No valid (changed) rows to insert.")
+            return
+
+        self._connect_to_db()
+        inserted, errors = self._storage.load(self.con, self.INSERT_STR, valid_rows, input_sizes)
+        for offset, message in errors:
+            self.logger.error(f"[Row {offset}] {message}")
+            self.logger.info(f"Problematic row: {valid_rows[offset]}")
+        self.logger.info(f"{inserted} row(s) inserted; {len(errors)} row error(s).")
 
     # -------------------------------------------------------------------------
     # ------------------------- ABSTRACT METHODS ------------------------------
@@ -322,29 +686,97 @@ class BaseExtractor:
     # ----------------------------- MAIN FLOW ---------------------------------
     # -------------------------------------------------------------------------
 
-    def extract(self):
+    def extract(self, pipeline=None):
         """
         Main ETL process:
-          1. Request URL
-          2. Parse response
-          3. Truncate target table
-          4. Store data to CSV
-          5. Load data to staging
-          6. Pre-process, call procs, post-process
-          7. Handle logs and errors
+          1. Truncate target table (streaming mode; otherwise after parsing)
+          2. Parse (subclasses request their own pages via `_request_url`);
+             finished work units are journaled so a crashed run resumes;
+             data anomalies seen while parsing are summarized once
+          3. Store data to CSV and load to staging, in LOAD_CHUNK_SIZE chunks
+             while parsing (streaming) or all at once
+          4. Pre-process, call procs, post-process
+          5. Handle logs and errors
+
+        Returns True on success and False on failure (errors are logged, not raised).
+        If `pipeline` (an executor, see runner.py `all --pipeline`) is given, steps
+        4-5 are submitted to it once staging is loaded and the Future is returned:
+        they run on this extractor's own session while the caller moves on.
         """
+        deferred = False
         try:
-            self._request_url_by_chrome(self.url)
+            self._open_journal()
+            if self._streaming:
+                # Run-scoped staging: empty it before chunks start arriving
+                self._truncate_table()
             self._parse()
-            self._truncate_table()
-            self._store_in_csv()
-            self._load_to_stg()
-            self._pre_process_data()
-            self._process_data()
-            self._post_process_data()
-            self.logger.finish_batch_successfully()
+            self._flush_anomalies()
+            if not self._db_enabled:
+                # Offline replay: parse only, nothing is written to the DB
+                self._store_in_csv()
+                self.logger.info(f"Replay parsed {len(self.data)} row(s); archive {self._archive.stats}")
+                self.logger.finish_batch_successfully()
+                return True
+            if self._page_cache is not None:
+                self.logger.info(f"Page cache: {self._page_cache.summary()}")
+            self.logger.info(f"Rate limiter: {self._rate_limiter.summary()}")
+            if self._streaming:
+                self._flush_rows(force=True)
+                self.logger.info(f"{self.loaded_rows} row(s) staged in chunks of {self.LOAD_CHUNK_SIZE}.")
+            else:
+                self._truncate_table()
+                self._store_in_csv()
+                self._load_to_stg()
+            if self._delta_index is not None:
+                self.logger.info(f"Delta hash: {self.unchanged_rows} unchanged row(s) not sent.")
+            if pipeline is not None:
+                deferred = True
+                return pipeline.submit(self._process_deferred)
+            self._process_phase()
+            return True
         except Exception as e:
             self.logger.error(f"Error: {str(e)}")
+            self._flush_anomalies()
             self.logger.finish_batch_with_errors()
+            return False
         finally:
-            self.con.close()
+            if not deferred:
+                self._close_run()
+
+    def _process_phase(self):
+        """Steps 4-5 of `extract`: process the staged rows and close the batch."""
+        self._pre_process_data()
+        self._process_data()
+        self._commit_delta_index()
+        self._post_process_data()
+        if self._journal is not None:
+            self._journal.complete()
+        self.logger.finish_batch_successfully()
+
+    def _process_deferred(self) -> bool:
+        """`_process_phase` as submitted to a pipeline executor; returns False on failure."""
+        try:
+            self._process_phase()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error: {str(e)}")
+            self.logger.finish_batch_with_errors()
+            return False
+        finally:
+            self._close_run()
+
+    def _close_run(self):
+        """Close the checkpoint journal and return the session."""
+        if self._journal is not None:
+            self._journal.close()
+        self._release_db()
+
+    def _flush_anomalies(self) -> None:
+        """Log (and store, see ANOMALY_TABLE) the anomalies collected while parsing."""
+        try:
+            con = self.con if self._db_enabled else None
+            summary = self.anomalies.flush(self.logger, self._storage, con)
+            if summary:
+                self.logger.info(f"Anomalies: {summary}")
+        except Exception as e:
+            self.logger.error(f"Anomaly summary not written: {e}")
@@ -0,0 +1,71 @@
+import os
+import json
+import threading
+from typing import Any, Dict, List
+
+
+class RunJournal:
+    """
+    Append-only write-ahead journal of finished work units for one extraction run.
+
+    Each line is a JSON object `{"unit": <key>, "rows": [...]}` written (and
+    flushed to disk) as soon as a unit (tournament page, player profile, stats
+    page, ...) has been parsed. A restarted run with the same journal path
+    replays those rows and skips the units; a torn last line from a crash is
+    ignored. The journal is removed once the run has been loaded and processed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._units: Dict[str, List[Any]] = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            self._load()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Partially written line from an interrupted run
+                    continue
+                self._units[entry["unit"]] = entry["rows"]
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def done(self, unit: str) -> bool:
+        """True if `unit` was completed by this or a previous (crashed) run."""
+        with self._lock:
+            return unit in self._units
+
+    def rows(self, unit: str) -> List[Any]:
+        """Rows recorded for a completed unit."""
+        with self._lock:
+            return self._units.get(unit, [])
+
+    def append(self, unit: str, rows: List[Any]) -> None:
+        """Durably record a completed unit and its parsed rows."""
+        line = json.dumps({"unit": unit, "rows": rows}, default=str)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._units[unit] = rows
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.close()
+
+    def complete(self) -> None:
+        """Close and delete the journal after a successful run."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -8,7 +8,7 @@ Notes
   outside of VCS; consider reading them from environment variables.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 # ===========================
 # Database / ETL settings
@@ -18,7 +18,26 @@ DB_USER = ""            # Oracle user (keep outside VCS; prefer env vars)
 DB_PASSWORD = ""        # Oracle password (keep outside VCS; prefer env vars)
 CONNECTION_STRING = ""  # e.g., "HOST:PORT/SERVICE" or an Oracle DSN string
 
+# Shared cx_Oracle session pool (see db_pool.py)
+DB_POOL_MIN = 1                  # Sessions opened up front
+DB_POOL_MAX = 4                  # Hard cap so parallel extractors do not overload Oracle XE
+DB_POOL_INCREMENT = 1            # Sessions opened per pool growth step
+DB_POOL_WAIT_TIMEOUT_MS = 60000  # Max wait for a free session before failing
+DB_POOL_PING_INTERVAL = 60       # Seconds idle before a session is pinged on checkout
+DB_STMT_CACHE_SIZE = 50          # Cached statements per session
+
+# Storage backend (see storage.py): 'oracle' or 'local' (embedded SQLite, see local_storage.py)
+STORAGE_BACKEND = 'oracle'
+LOCAL_DB_PATH = './local/atp.sqlite'  # Database file of the 'local' backend
+
 CHUNK_SIZE = 100        # Batch size for bulk inserts/processing
+ENRICH_CHUNK_SIZE = 500 # Match ids per sp_enrich_atp_matches call (changed matches only)
+WORKLIST_PAGE_SIZE = 1000  # Rows per keyset page of the discovery queries (also arraysize/prefetchrows)
+REFDATA_CHECK_INTERVAL = 30  # Seconds between version-stamp checks of the reference-data cache (see reference_data.py)
+SCORE_CACHE_SIZE = 50000     # Distinct (score, tournament code class) entries kept by the score cache (see score_parser.py)
+ANOMALY_SAMPLES = 5          # Examples kept per anomaly kind and run (see anomalies.py)
+ANOMALY_TABLE = ''           # Table the per-run anomaly summary is written to, e.g. 'etl_anomalies' (empty = log only)
+CHECKPOINT_DIR = './checkpoints'  # Run journals for resumable extraction (empty = disabled)
 BORDER_QTY = 5          # Minimum matches per player-year to trigger player reload
 
 # ===========================
@@ -36,6 +55,16 @@ DC_TOURNAMENT_SERIES: List[str] = ['dc',]                       # Davis Cup
 
 DURATION_IN_DAYS = 22      # Typical scraping window or TTL (tune per pipeline logic)
 
+MATCHES_FETCH_WORKERS = 4  # Concurrent results-page fetches in MatchesATPExtractor (1 = serial)
+STATS_FETCH_WORKERS = 6    # Concurrent fetch+parse workers in StatsATPExtractor (1 = serial)
+STATS_ROW_LIMIT = 50       # Stats pages per run in year mode (ignored in backfill mode)
+STATS_BACKFILL_CHUNK = 500 # Rows loaded + processed per chunk in stats backfill mode
+
+# DAG scheduler of `runner.py all --jobs/--years`
+RUNNER_JOBS = 2            # Extractors running at once (each holds one DB session; keep < DB_POOL_MAX)
+RUNNER_RETRIES = 1         # Extra attempts of a failed extractor (resumes from its checkpoint journal)
+RUNNER_RETRY_BACKOFF = 30  # Seconds before a retry, times the attempt number
+
 # ===========================
 # Local paths (optional)
 # ===========================
@@ -44,7 +73,16 @@ ATP_CSV_PATH = ''          # Output/landing path for ATP CSV exports (if used)
 DC_CSV_PATH = ''           # Output/landing path for Davis Cup CSV exports (if used)
 ATP_PDF_PATH = ''          # Base path to store downloaded PDFs (e.g., draws)
 
-SLEEP_DURATION = 10        # Default sleep between requests (anti-ban / rate-limit)
+SLEEP_DURATION = 10        # Max backoff (seconds) after a block/timeout (anti-ban / rate-limit)
+
+# Per-host token buckets (see rate_limiter.py): host → (initial, min, max) requests/second
+RATE_LIMITS: Dict[str, Tuple[float, float, float]] = {
+    'atptour.com': (1.0, 0.2, 4.0),
+    'protennislive.com': (1.0, 0.2, 2.0),
+}
+RATE_LIMIT_DEFAULT = (0.5, 0.1, 2.0)  # Any other host
+RATE_LIMIT_INCREASE = 0.05             # req/s added after each clean response
+RATE_LIMIT_BACKOFF_BASE = 1.0          # First backoff (seconds); doubles per consecutive failure
 
 # ===========================
 # WebDriver binaries
@@ -53,6 +91,63 @@ SLEEP_DURATION = 10        # Default sleep between requests (anti-ban / rate-lim
 WEBDRIVER_PHANTOMJS_EXECUTABLE_PATH = ''  # Legacy PhantomJS path (deprecated upstream; keep for legacy flows)
 WEBDRIVER_CHROME_EXECUTABLE_PATH = ''     # Optional Chrome binary path (leave empty to auto-discover)
 
+# Shared Chrome driver pool (see driver_pool.py)
+DRIVER_POOL_SIZE = 2           # Warm headless drivers per process
+DRIVER_MAX_USES = 200          # Recycle a driver after N page loads
+DRIVER_MAX_ERRORS = 3          # Recycle a driver after N failed requests
+DRIVER_MAX_RSS_MB = 1500       # Recycle a driver when its process tree exceeds this RSS
+DRIVER_LEASE_TIMEOUT = 120     # Seconds to wait for a free driver
+DRIVER_PAGE_LOAD_TIMEOUT = 15  # Selenium page load timeout (seconds)
+
+# Plain HTTP tier tried before the browser (see fetcher.py)
+HTTP_POOL_SIZE = 8             # Keep-alive connections per host
+HTTP_TIMEOUT = 10              # Seconds per plain HTTP request
+HTTP_MIN_BODY_BYTES = 2048     # Smaller bodies are treated as JS shells / errors
+HTTP_REPROBE_EVERY = 50        # Re-try plain HTTP on browser-pinned URL patterns every N requests
+HTTP_PIN_AFTER = 3             # Pin a URL pattern to the browser after N consecutive HTTP rejections
+HTTP_HEADERS: Dict[str, str] = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# ===========================
+# Page cache (see page_cache.py)
+# ===========================
+
+PAGE_CACHE_DIR = './cache/pages'            # Leave empty to disable the on-disk HTML cache
+PAGE_CACHE_MAX_BYTES = 2 * 1024 ** 3        # Compressed size budget before LRU eviction
+
+# TTL in seconds per page type (None = never expires)
+PAGE_CACHE_TTLS: Dict[str, Optional[int]] = {
+    'results_final': None,          # Past-season results / stats: immutable
+    'results_live': 10 * 60,        # Current-season results: may still change
+    'match_stats': 60 * 60,         # Current-season stats pages
+    'player': 30 * 24 * 3600,       # Player profiles age slowly
+    'tournament': 7 * 24 * 3600,    # Tournament overview pages
+    'archive': 24 * 3600,           # Yearly results-archive listings
+    'default': 3600,
+}
+
+# ===========================
+# Client-side delta hashing (see delta_hash.py)
+# ===========================
+
+DELTA_INDEX_DIR = './cache/delta'           # Per-table hash index of staged rows (empty = disabled)
+
+# ===========================
+# Parquet export (see ETL/Load/export_parquet.py)
+# ===========================
+
+EXPORT_DIR = './export'        # Root of the year-partitioned Parquet dataset
+EXPORT_ARRAYSIZE = 5000        # Rows per fetchmany round trip (and per Parquet row group)
+EXPORT_WORKERS = 4             # Partitions exported in parallel (capped at DB_POOL_MAX)
+EXPORT_YEAR_FROM = 1999        # First tournament year exported
+EXPORT_YEAR_TO = None          # Last tournament year exported (None = current year)
+
 # ===========================
 # Domain constants
 # ===========================
@@ -0,0 +1,135 @@
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import cx_Oracle
+
+from constants import (
+    DB_USER, DB_PASSWORD, CONNECTION_STRING,
+    DB_POOL_MIN, DB_POOL_MAX, DB_POOL_INCREMENT, DB_POOL_WAIT_TIMEOUT_MS,
+    DB_POOL_PING_INTERVAL, DB_STMT_CACHE_SIZE
+)
+
+
+def _credentials() -> Tuple[str, str, str]:
+    """
+    Resolve (user, password, dsn).
+
+    Uses DB_USER / DB_PASSWORD with CONNECTION_STRING as DSN when the user is set;
+    otherwise CONNECTION_STRING is parsed as 'user/password@dsn'.
+    """
+    if DB_USER:
+        return DB_USER, DB_PASSWORD, CONNECTION_STRING
+    creds, _, dsn = CONNECTION_STRING.partition("@")
+    user, _, password = creds.partition("/")
+    return user, password, dsn
+
+
+class OraclePool:
+    """
+    Process-wide cx_Oracle session pool shared by every extractor and the runner.
+
+    - min/max sizing with timed waits, so several extractors running at once
+      queue for a session instead of opening new ones on the XE container;
+    - statement cache per session (`stmtcachesize`);
+    - health checks: cx_Oracle pings idle sessions (`ping_interval`) and a
+      session that fails an explicit ping on checkout is dropped and replaced;
+    - checkout wait-time metrics.
+    """
+
+    def __init__(
+        self,
+        min_size: int = DB_POOL_MIN,
+        max_size: int = DB_POOL_MAX,
+        increment: int = DB_POOL_INCREMENT,
+    ):
+        user, password, dsn = _credentials()
+        self.logger = logging.getLogger(__name__)
+        self.pool = cx_Oracle.SessionPool(
+            user=user,
+            password=password,
+            dsn=dsn,
+            min=min_size,
+            max=max_size,
+            increment=increment,
+            threaded=True,
+            getmode=cx_Oracle.SPOOL_ATTRVAL_TIMEDWAIT,
+            wait_timeout=DB_POOL_WAIT_TIMEOUT_MS,
+            ping_interval=DB_POOL_PING_INTERVAL,
+            encoding="UTF-8",
+        )
+        self.pool.stmtcachesize = DB_STMT_CACHE_SIZE
+
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            "checkouts": 0, "wait_total_s": 0.0, "wait_max_s": 0.0, "dropped": 0
+        }
+
+    def acquire(self) -> "cx_Oracle.Connection":
+        """Check out a healthy session, recording the wait time."""
+        start = time.perf_counter()
+        con = self.pool.acquire()
+        try:
+            con.ping()
+        except cx_Oracle.Error:
+            self.logger.warning("Dropping dead pooled Oracle session.")
+            self.pool.drop(con)
+            with self._lock:
+                self.stats["dropped"] += 1
+            con = self.pool.acquire()
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["wait_total_s"] += waited
+            self.stats["wait_max_s"] = max(self.stats["wait_max_s"], waited)
+        if waited > 1.0:
+            self.logger.warning(f"Waited {waited:.2f}s for an Oracle session (busy={self.pool.busy}/{self.pool.max}).")
+        return con
+
+    def release(self, con: Optional["cx_Oracle.Connection"]) -> None:
+        """Return a session to the pool (uncommitted work is rolled back)."""
+        if con is None:
+            return
+        try:
+            self.pool.release(con)
+        except cx_Oracle.Error as e:
+            self.logger.warning(f"Could not release Oracle session: {e}")
+
+    def summary(self) -> str:
+        with self._lock:
+            n = self.stats["checkouts"]
+            avg = self.stats["wait_total_s"] / n if n else 0.0
+            return (
+                f"checkouts={n} avg_wait={1000 * avg:.1f}ms max_wait={1000 * self.stats['wait_max_s']:.1f}ms "
+                f"dropped={self.stats['dropped']} open={self.pool.opened} busy={self.pool.busy}"
+            )
+
+    def close(self) -> None:
+        self.pool.close(force=True)
+
+
+_POOL: Optional[OraclePool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_db_pool() -> OraclePool:
+    """Return the process-wide Oracle session pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = OraclePool()
+        return _POOL
+
+
+def close_db_pool() -> Optional[str]:
+    """Close the process-wide pool; returns its final metrics summary (if any)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            return None
+        summary = _POOL.summary()
+        _POOL.close()
+        _POOL = None
+        return summary
@@ -0,0 +1,323 @@
+import os
+import re
+import hashlib
+import sqlite3
+import logging
+import threading
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from constants import DELTA_INDEX_DIR
+
+_MASK = 0xFFFFFFFF
+
+# Hash inputs of the SQL delta-hash functions, in concatenation order:
+# (column, kind) with kind 'v' = VARCHAR2, 'n' = NUMBER, 'd' = DATE (yyyymmdd)
+_STAT_COLUMNS = (
+    "aces", "double_faults", "first_serves_in", "first_serves_total",
+    "first_serve_points_won", "first_serve_points_total", "second_serve_points_won",
+    "second_serve_points_total", "break_points_saved", "break_points_serve_total",
+    "service_points_won", "service_points_total", "first_serve_return_won",
+    "first_serve_return_total", "second_serve_return_won", "second_serve_return_total",
+    "break_points_converted", "break_points_return_total", "service_games_played",
+    "return_games_played", "return_points_won", "return_points_total",
+    "total_points_won", "total_points_total", "winners", "forced_errors",
+    "unforced_errors", "net_points_won", "net_points_total", "fastest_first_serves_kmh",
+    "average_first_serves_kmh", "fastest_second_serve_kmh", "average_second_serve_kmh",
+)
+
+MATCHES_HASH_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("id", "v"), ("tournament_id", "v"), ("stadie_id", "v"), ("match_order", "n"),
+    ("match_ret", "v"), ("winner_code", "v"), ("loser_code", "v"), ("winner_seed", "v"),
+    ("loser_seed", "v"), ("score", "v"), ("winner_sets_won", "n"), ("loser_sets_won", "n"),
+    ("winner_games_won", "n"), ("loser_games_won", "n"), ("winner_tiebreaks_won", "n"),
+    ("loser_tiebreaks_won", "n"), ("stats_url", "v"), ("match_duration", "n"),
+) + tuple((f"win_{c}", "n") for c in _STAT_COLUMNS) + tuple((f"los_{c}", "n") for c in _STAT_COLUMNS)
+
+PLAYERS_HASH_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("code", "v"), ("url", "v"), ("first_name", "v"), ("last_name", "v"), ("slug", "v"),
+    ("birth_date", "d"), ("birthplace", "v"), ("turned_pro", "n"), ("weight", "n"),
+    ("height", "n"), ("residence", "v"), ("handedness", "v"), ("backhand", "v"),
+    ("citizenship", "v"),
+)
+
+TOURNAMENTS_HASH_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("id", "v"), ("name", "v"), ("year", "n"), ("code", "v"), ("url", "v"), ("slug", "v"),
+    ("location", "v"), ("sgl_draw_url", "v"), ("sgl_pdf_url", "v"), ("indoor_outdoor", "v"),
+    ("surface", "v"), ("series_category_id", "v"), ("start_dtm", "d"), ("finish_dtm", "d"),
+    ("sgl_draw_qty", "n"), ("dbl_draw_qty", "n"), ("prize_money", "n"),
+    ("prize_currency", "v"), ("country_code", "v"), ("points_rule_id", "n"),
+    ("draw_template_id", "v"),
+)
+
+# Strings checked against the database's ORA_HASH before trusting core delta_hash values
+_PROBES = ("|", "a0e2|https://www.atptour.com/en/players/x/a0e2/overview", "2024-580-ms001|7-6(5) 6-4|12||.5")
+
+
+# --------------------------------- ORA_HASH ---------------------------------
+
+def _mix(a: int, b: int, c: int) -> Tuple[int, int, int]:
+    """lookup2 `mix()` on 32-bit unsigned words."""
+    for shift_a, shift_b, shift_c in ((13, 8, 13), (12, 16, 5), (3, 10, 15)):
+        a = ((a - b - c) & _MASK) ^ (c >> shift_a)
+        b = ((b - c - a) & _MASK) ^ ((a << shift_b) & _MASK)
+        c = ((c - a - b) & _MASK) ^ (b >> shift_c)
+    return a, b, c
+
+
+def ora_hash(data: bytes, seed: int = 0) -> int:
+    """
+    ORA_HASH(expr) with the default max bucket (2^32 - 1) and seed, for the
+    bytes of a VARCHAR2 in the database character set (AL32UTF8 → UTF-8).
+
+    ORA_HASH is Bob Jenkins' lookup2 hash over the value's bytes.
+    """
+    a = b = 0x9E3779B9
+    c = seed & _MASK
+    k = data
+    n = len(k)
+    i = 0
+    while n - i >= 12:
+        a = (a + int.from_bytes(k[i:i + 4], "little")) & _MASK
+        b = (b + int.from_bytes(k[i + 4:i + 8], "little")) & _MASK
+        c = (c + int.from_bytes(k[i + 8:i + 12], "little")) & _MASK
+        a, b, c = _mix(a, b, c)
+        i += 12
+
+    tail = k[i:]
+    c = (c + n) & _MASK
+    # The low byte of c is reserved for the length
+    a = (a + int.from_bytes(tail[0:4], "little")) & _MASK
+    b = (b + int.from_bytes(tail[4:8], "little")) & _MASK
+    c = (c + (int.from_bytes(tail[8:11], "little") << 8)) & _MASK
+    return _mix(a, b, c)[2]
+
+
+# -------------------------- Oracle implicit TO_CHAR -------------------------
+
+def _number_text(value: Any) -> str:
+    """TO_CHAR(number) as used by '||': no trailing zeros, no leading '0' before '.'."""
+    if value is None or value == "":
+        return ""
+    try:
+        d = Decimal(str(value).strip())
+    except InvalidOperation:
+        return str(value)
+    if d == 0:
+        return "0"
+    text = format(d.normalize(), "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text.startswith("0."):
+        text = text[1:]
+    elif text.startswith("-0."):
+        text = "-" + text[2:]
+    return text
+
+
+def _date_text(value: Any) -> str:
+    """TO_CHAR(date, 'yyyymmdd'); ISO 'yyyy-mm-dd' text (local backend DATEs) is accepted too."""
+    if value is None or value == "":
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y%m%d")
+    text = str(value)
+    if len(text) >= 10 and text[4] == "-" and text[7] == "-":
+        return text[:10].replace("-", "")
+    return text
+
+
+def parse_date(value: Optional[str], fmt: str) -> Optional[date]:
+    """
+    TO_DATE(value, fmt) for staging text dates; None when empty or invalid.
+    Like Oracle, any punctuation is accepted where `fmt` has a '.' separator.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(re.sub(r"[/\-]", ".", value.strip()), fmt).date()
+    except ValueError:
+        return None
+
+
+def canonical(fields: Sequence[Tuple[str, str]], values: Dict[str, Any]) -> str:
+    """The '|'-joined string the SQL function feeds to ORA_HASH (NULL → '')."""
+    parts = []
+    for name, kind in fields:
+        v = values.get(name)
+        if kind == "n":
+            parts.append(_number_text(v))
+        elif kind == "d":
+            parts.append(_date_text(v))
+        else:
+            parts.append("" if v is None else str(v))
+    return "|".join(parts)
+
+
+def _delta_hash(fields: Sequence[Tuple[str, str]], values: Dict[str, Any]) -> int:
+    return ora_hash(canonical(fields, values).encode("utf-8"))
+
+
+def atp_matches_delta_hash(**values: Any) -> int:
+    """Python twin of `sf_atp_matches_delta_hash` (keyword names are atp_matches columns)."""
+    return _delta_hash(MATCHES_HASH_FIELDS, values)
+
+
+def atp_players_delta_hash(**values: Any) -> int:
+    """Python twin of `sf_atp_players_delta_hash` (keyword names are atp_players columns)."""
+    return _delta_hash(PLAYERS_HASH_FIELDS, values)
+
+
+def atp_tournaments_delta_hash(**values: Any) -> int:
+    """Python twin of `sf_atp_tournaments_delta_hash` (keyword names are atp_tournaments columns)."""
+    return _delta_hash(TOURNAMENTS_HASH_FIELDS, values)
+
+
+_COMPATIBLE: Optional[bool] = None
+_COMPATIBLE_LOCK = threading.Lock()
+
+
+def ora_hash_compatible(con) -> bool:
+    """
+    Check (once per process) that `ora_hash` reproduces the database's ORA_HASH
+    for a few probe strings. Core `delta_hash` values are only trusted if so.
+    """
+    global _COMPATIBLE
+    with _COMPATIBLE_LOCK:
+        if _COMPATIBLE is None:
+            cur = con.cursor()
+            try:
+                _COMPATIBLE = all(
+                    cur.execute("SELECT ora_hash(:1) FROM dual", [p]).fetchone()[0]
+                    == ora_hash(p.encode("utf-8"))
+                    for p in _PROBES
+                )
+            finally:
+                cur.close()
+            if not _COMPATIBLE:
+                logging.getLogger(__name__).warning(
+                    "Client-side ORA_HASH differs from the database; core delta hashes will not be used."
+                )
+        return _COMPATIBLE
+
+
+# -------------------------------- Hash index --------------------------------
+
+class DeltaIndex:
+    """
+    Locally cached `key → delta hash` index for one staging target.
+
+    Extractors hash every row before loading it to staging and drop rows whose
+    hash equals the indexed one, so unchanged rows never cross the network nor
+    reach the MERGE. New hashes are only recorded (`commit`) after the process
+    procedures succeeded, so a failed run re-sends its rows next time.
+
+    The index mirrors one core table of one database: it is named after the
+    target's identity (see `get_delta_index`), and every commit records the
+    core table's stamp (row count, max batch_id). `check_target` empties the
+    index when the stamp went backwards (database restored, rows deleted or
+    reloaded), so rows the target lost are staged again.
+    """
+
+    def __init__(self, table: str, index_dir: str = DELTA_INDEX_DIR):
+        self.table = table
+        os.makedirs(index_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(os.path.join(index_dir, f"{table}.sqlite"), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("CREATE TABLE IF NOT EXISTS hashes (key TEXT PRIMARY KEY, hash INTEGER NOT NULL)")
+        self._con.execute("CREATE TABLE IF NOT EXISTS target (id INTEGER PRIMARY KEY, qty INTEGER, max_batch_id INTEGER)")
+        self._con.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._con.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def lookup(self, keys: Iterable[str]) -> Dict[str, int]:
+        """Indexed hashes for `keys` (missing keys are absent from the result)."""
+        keys = list(keys)
+        found: Dict[str, int] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(self._con.execute(
+                    f"SELECT key, hash FROM hashes WHERE key IN ({marks})", chunk
+                ).fetchall())
+        return found
+
+    def commit(self, pairs: Iterable[Tuple[str, int]], stamp: Optional[Tuple[int, int]] = None) -> None:
+        """Record the hashes of rows that were loaded and processed (and the target's stamp after it)."""
+        with self._lock:
+            self._con.executemany("INSERT OR REPLACE INTO hashes(key, hash) VALUES (?, ?)", list(pairs))
+            if stamp is not None:
+                self._con.execute("INSERT OR REPLACE INTO target(id, qty, max_batch_id) VALUES (1, ?, ?)", stamp)
+            self._con.commit()
+
+    def check_target(self, stamp: Tuple[int, int]) -> Optional[str]:
+        """
+        Compare the core table's current (row count, max batch_id) with the one
+        recorded by the last commit; empty the index (and return why) if the
+        target went backwards or its state was never recorded.
+        """
+        with self._lock:
+            size = self._con.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+            recorded = self._con.execute("SELECT qty, max_batch_id FROM target WHERE id = 1").fetchone()
+            if not size:
+                reason = None
+            elif recorded is None:
+                reason = "no recorded target state"
+            elif stamp[0] < recorded[0]:
+                reason = f"target rows {recorded[0]} → {stamp[0]}"
+            elif stamp[1] < recorded[1]:
+                reason = f"target max batch_id {recorded[1]} → {stamp[1]}"
+            else:
+                reason = None
+            if reason:
+                self._con.execute("DELETE FROM hashes")
+                self._con.execute("DELETE FROM target")
+                self._con.commit()
+            return reason
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
+
+
+_INDEXES: Dict[str, DeltaIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_delta_index(table: str, target: str = "") -> Optional[DeltaIndex]:
+    """
+    Return the process-wide hash index for `table` in the database identified
+    by `target` (see StorageBackend.identity), or None if disabled.
+    """
+    if not DELTA_INDEX_DIR:
+        return None
+    if target:
+        table = f"{table}_{hashlib.sha1(target.encode('utf-8')).hexdigest()[:12]}"
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(table)
+        if index is None:
+            index = _INDEXES[table] = DeltaIndex(table)
+        return index
+
+
+def drop_unchanged(
+    index: DeltaIndex, keyed: List[Tuple[str, int, Any]]
+) -> Tuple[List[Any], List[Tuple[str, int]]]:
+    """
+    Split `(key, hash, row)` triples into rows to load and their pending hashes.
+
+    A row is dropped when its hash equals the indexed one.
+    """
+    known = index.lookup(k for k, _, _ in keyed)
+    rows, pending = [], []
+    for key, h, row in keyed:
+        if known.get(key) == h:
+            continue
+        rows.append(row)
+        pending.append((key, h))
+    return rows, pending
@@ -0,0 +1,320 @@
+import gc
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import psutil
+import undetected_chromedriver as uc
+
+from constants import (
+    DRIVER_POOL_SIZE, DRIVER_MAX_USES, DRIVER_MAX_ERRORS, DRIVER_MAX_RSS_MB,
+    DRIVER_LEASE_TIMEOUT, DRIVER_PAGE_LOAD_TIMEOUT
+)
+
+
+class PooledDriver:
+    """
+    A single warm Chrome instance owned by `DriverPool`.
+
+    Tracks its own usage/error budget so it can be recycled independently of
+    the other drivers in the pool.
+    """
+
+    def __init__(self, driver_id: int, driver):
+        self.driver_id = driver_id
+        self.driver = driver
+        self.use_count = 0
+        self.error_count = 0
+        self.created_at = time.time()
+
+    @property
+    def pids(self) -> List[int]:
+        """PIDs of the chromedriver service and every browser process it spawned."""
+        pids: List[int] = []
+        # undetected_chromedriver starts the browser detached (`browser_pid`),
+        # so walk both the service process and the browser process trees.
+        roots = [
+            getattr(getattr(getattr(self.driver, "service", None), "process", None), "pid", None),
+            getattr(self.driver, "browser_pid", None),
+        ]
+        for root_pid in roots:
+            if not root_pid:
+                continue
+            try:
+                root = psutil.Process(root_pid)
+                pids.append(root.pid)
+                pids.extend(child.pid for child in root.children(recursive=True))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return list(dict.fromkeys(pids))
+
+    def rss_mb(self) -> float:
+        """Resident memory (MB) of this driver's own process tree."""
+        total = 0
+        for pid in self.pids:
+            try:
+                total += psutil.Process(pid).memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024 * 1024)
+
+    def is_healthy(self) -> bool:
+        """Cheap liveness probe: the browser must still answer a JS round trip."""
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def quit(self) -> None:
+        """Quit the driver and terminate only the processes it owns."""
+        pids = self.pids
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        for pid in pids:
+            try:
+                psutil.Process(pid).kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        self.driver = None
+
+
+class DriverPool:
+    """
+    Process-wide pool of warm headless Chrome drivers.
+
+    Drivers are leased per request via `lease()` and returned automatically.
+    On release, each driver is recycled on its own budget:
+      - `max_uses` page loads,
+      - `max_errors` failed requests,
+      - `max_rss_mb` resident memory of its process tree,
+      - a failed health check.
+    Recycling only ever kills the processes spawned by that driver, so several
+    extractors (or other Chrome users on the host) can run side by side.
+    """
+
+    def __init__(
+        self,
+        size: int = DRIVER_POOL_SIZE,
+        max_uses: int = DRIVER_MAX_USES,
+        max_errors: int = DRIVER_MAX_ERRORS,
+        max_rss_mb: float = DRIVER_MAX_RSS_MB,
+    ):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_errors = max_errors
+        self.max_rss_mb = max_rss_mb
+
+        self.logger = logging.getLogger(__name__)
+        self._cond = threading.Condition()
+        self._idle: List[PooledDriver] = []
+        self._leased: Dict[int, PooledDriver] = {}
+        self._pending = 0  # drivers currently starting up
+        self._next_id = 0
+        self._closed = False
+
+    # ------------------------------ Driver build -----------------------------
+
+    @staticmethod
+    def _build_options() -> "uc.ChromeOptions":
+        """Chrome options tuned for fast, resource-light headless page loads."""
+        options = uc.ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--mute-audio")
+        options.add_argument("--window-size=800,600")
+        options.add_argument("--incognito")
+        options.page_load_strategy = "eager"
+        options.add_argument(
+            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+        )
+
+        # Disable unnecessary resources
+        prefs = {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+            "profile.managed_default_content_settings.cookies": 2,
+            "profile.managed_default_content_settings.plugins": 2,
+            "profile.managed_default_content_settings.popups": 2,
+            "profile.managed_default_content_settings.geolocation": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        }
+        options.add_experimental_option("prefs", prefs)
+        return options
+
+    def _total(self) -> int:
+        """Drivers alive or starting (caller must hold the lock)."""
+        return len(self._idle) + len(self._leased) + self._pending
+
+    def _spawn(self) -> PooledDriver:
+        """Start a new Chrome driver (called without holding the pool lock)."""
+        driver = uc.Chrome(options=self._build_options())
+        driver.set_page_load_timeout(DRIVER_PAGE_LOAD_TIMEOUT)
+        with self._cond:
+            self._next_id += 1
+            pooled = PooledDriver(self._next_id, driver)
+        self.logger.info(f"✅ Chrome driver #{pooled.driver_id} started.")
+        return pooled
+
+    def warm_up(self, n: Optional[int] = None) -> None:
+        """Pre-start up to `n` (default: pool size) idle drivers."""
+        target = min(self.size, n or self.size)
+        while True:
+            with self._cond:
+                if self._closed or self._total() >= target:
+                    return
+                # Reserve a slot so concurrent warm-ups do not overshoot
+                self._pending += 1
+            try:
+                pooled = self._spawn()
+            except Exception:
+                with self._cond:
+                    self._pending -= 1
+                raise
+            with self._cond:
+                self._pending -= 1
+                closed = self._closed
+                if not closed:
+                    self._idle.append(pooled)
+                    self._cond.notify()
+            if closed:
+                pooled.quit()  # pool closed while this driver was starting
+                return
+
+    # --------------------------------- Leasing -------------------------------
+
+    def _acquire(self, timeout: float) -> PooledDriver:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("DriverPool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._leased[pooled.driver_id] = pooled
+                    return pooled
+                if self._total() < self.size:
+                    self._pending += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No Chrome driver available after {timeout:.1f}s")
+                self._cond.wait(remaining)
+
+        # Spawn outside the lock: cold starts take seconds
+        try:
+            pooled = self._spawn()
+        except Exception:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._pending -= 1
+            self._leased[pooled.driver_id] = pooled
+        return pooled
+
+    def _recycle_reason(self, pooled: PooledDriver) -> Optional[str]:
+        if pooled.use_count >= self.max_uses:
+            return f"uses={pooled.use_count}"
+        if pooled.error_count >= self.max_errors:
+            return f"errors={pooled.error_count}"
+        rss = pooled.rss_mb()
+        if rss >= self.max_rss_mb:
+            return f"rss={rss:.0f}MB"
+        if not pooled.is_healthy():
+            return "health check failed"
+        return None
+
+    def _release(self, pooled: PooledDriver) -> None:
+        reason = None if self._closed else self._recycle_reason(pooled)
+        if self._closed or reason:
+            if reason:
+                self.logger.info(f"♻ Recycling Chrome driver #{pooled.driver_id} ({reason}).")
+            pooled.quit()
+            gc.collect()
+            with self._cond:
+                self._leased.pop(pooled.driver_id, None)
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._leased.pop(pooled.driver_id, None)
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: float = DRIVER_LEASE_TIMEOUT):
+        """
+        Lease a driver for the duration of a `with` block.
+
+        Exceptions raised inside the block count against the driver's error budget
+        and are re-raised to the caller.
+        """
+        pooled = self._acquire(timeout)
+        try:
+            yield pooled
+            pooled.use_count += 1
+        except Exception:
+            pooled.error_count += 1
+            raise
+        finally:
+            self._release(pooled)
+
+    # -------------------------------- Shutdown -------------------------------
+
+    def close(self) -> None:
+        """Quit all idle drivers; leased drivers are quit when returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            pooled.quit()
+
+
+_POOL: Optional[DriverPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Return the process-wide driver pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None or _POOL._closed:
+            _POOL = DriverPool()
+        return _POOL
+
+
+def warm_driver_pool(n: Optional[int] = None) -> threading.Thread:
+    """
+    Start (in a background thread) up to `n` (default: pool size) drivers of the
+    process-wide pool, so the first browser fetches do not pay Chrome's cold start.
+    """
+    pool = get_driver_pool()
+
+    def _warm():
+        try:
+            pool.warm_up(n)
+        except Exception as e:
+            pool.logger.warning(f"Chrome driver warm-up failed: {e}")
+
+    thread = threading.Thread(target=_warm, name="driver-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def close_driver_pool() -> None:
+    """Shut down the process-wide driver pool (if any)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+            _POOL = None
@@ -0,0 +1,217 @@
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import (
+    get_rate_limiter, OUTCOME_OK, OUTCOME_BLOCKED, OUTCOME_TIMEOUT, OUTCOME_ERROR
+)
+from constants import (
+    HTTP_POOL_SIZE, HTTP_TIMEOUT, HTTP_MIN_BODY_BYTES, HTTP_REPROBE_EVERY, HTTP_PIN_AFTER, HTTP_HEADERS
+)
+
+# Markers of a Cloudflare challenge / anti-bot interstitial
+CHALLENGE_MARKERS = ("cf-chl", "Verifique que usted es un ser humano", "challenge-platform")
+
+# Markers of a client-side rendered shell that needs a real browser
+JS_REQUIRED_MARKERS = ("enable JavaScript", "You need to enable JavaScript")
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+# Route prefixes whose remaining path segments are all variable (slugs, codes, years, ids)
+URL_ROUTES = (
+    ("en", "scores", "archive"),
+    ("en", "scores", "match-stats", "archive"),
+    ("en", "scores", "stats-centre", "archive"),
+    ("en", "scores", "results-archive"),
+    ("en", "players"),
+    ("en", "tournaments"),
+    ("posting",),
+)
+
+
+def is_challenge_page(content: Optional[str]) -> bool:
+    """True if `content` looks like a Cloudflare (or similar) challenge page."""
+    return bool(content) and any(m in content for m in CHALLENGE_MARKERS)
+
+
+def url_pattern(url: str) -> str:
+    """
+    Reduce a URL to a coarse pattern used to remember which tier works.
+
+    The route prefix (longest match in URL_ROUTES, else the first two path
+    segments) is kept and every later segment becomes '*', except a last
+    segment without digits, which names the page kind. Examples:
+        /en/scores/archive/doha/451/2024/results     → /en/scores/archive/*/*/*/results
+        /en/players/carlos-alcaraz/a0e2/overview     → /en/players/*/*/overview
+        /en/scores/match-stats/archive/2024/451/ms001 → /en/scores/match-stats/archive/*/*/*
+    The query string only contributes its parameter names.
+    """
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    routes = [r for r in URL_ROUTES if tuple(segments[:len(r)]) == r]
+    keep = max(map(len, routes)) if routes else 2
+    out = segments[:keep]
+    for i in range(keep, len(segments)):
+        seg = segments[i]
+        last_kind = i == len(segments) - 1 and not any(c.isdigit() for c in seg)
+        out.append(seg if last_kind else "*")
+    query_keys = sorted(kv.split("=", 1)[0] for kv in parts.query.split("&") if kv)
+    pattern = f"{parts.netloc}/{'/'.join(out)}"
+    if query_keys:
+        pattern += "?" + "&".join(query_keys)
+    return pattern
+
+
+class TieredFetcher:
+    """
+    Fetch pages with a pooled keep-alive HTTP session first and fall back to a
+    headless browser only when needed.
+
+    For every URL pattern (see `url_pattern`) the fetcher remembers which tier
+    produced a usable page:
+      - 'http'    → plain `requests` GET (tens of milliseconds);
+      - 'browser' → caller-provided browser fetch (full render).
+    A plain HTTP response is rejected (and the pattern escalated) when it is not
+    a 200, is suspiciously small, is a Cloudflare challenge, asks for JavaScript,
+    or lacks the caller's `expect` marker; a pattern is pinned to the browser
+    after `pin_after` consecutive rejections (one transient failure only sends
+    that request to the browser). Browser-pinned patterns are re-probed with
+    HTTP every `reprobe_every` requests so they can recover.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = HTTP_POOL_SIZE,
+        timeout: float = HTTP_TIMEOUT,
+        reprobe_every: int = HTTP_REPROBE_EVERY,
+        pin_after: int = HTTP_PIN_AFTER,
+    ):
+        self.timeout = timeout
+        self.reprobe_every = reprobe_every
+        self.pin_after = max(1, pin_after)
+        self.logger = logging.getLogger(__name__)
+        self.limiter = get_rate_limiter()
+
+        self.session = requests.Session()
+        self.session.headers.update(HTTP_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._tiers: Dict[str, str] = {}
+        self._browser_hits: Dict[str, int] = {}
+        self._rejections: Dict[str, int] = {}  # consecutive HTTP rejections per pattern
+        self.stats: Dict[str, int] = {"http_ok": 0, "http_rejected": 0, "browser": 0}
+
+    # -------------------------------- Tiers ----------------------------------
+
+    def tier_for(self, url: str) -> str:
+        """Tier currently remembered for the URL's pattern (default: 'http')."""
+        with self._lock:
+            return self._tiers.get(url_pattern(url), TIER_HTTP)
+
+    def _should_try_http(self, pattern: str) -> bool:
+        with self._lock:
+            if self._tiers.get(pattern, TIER_HTTP) == TIER_HTTP:
+                return True
+            n = self._browser_hits.get(pattern, 0) + 1
+            self._browser_hits[pattern] = n
+            return self.reprobe_every > 0 and n % self.reprobe_every == 0
+
+    def _remember(self, pattern: str, tier: str) -> None:
+        with self._lock:
+            previous = self._tiers.get(pattern)
+            if tier == TIER_HTTP:
+                self._rejections.pop(pattern, None)
+                self._browser_hits.pop(pattern, None)
+            else:
+                n = self._rejections.get(pattern, 0) + 1
+                self._rejections[pattern] = n
+                if n < self.pin_after and previous != TIER_BROWSER:
+                    return  # not (yet) a pattern that needs the browser
+            self._tiers[pattern] = tier
+        if (previous or TIER_HTTP) != tier:
+            self.logger.info(f"Fetch tier for {pattern}: {previous or TIER_HTTP} → {tier}")
+
+    # -------------------------------- Fetch ----------------------------------
+
+    def _http_get(self, url: str, expect: Optional[str]) -> Optional[str]:
+        """Plain GET; returns the body only if it is usable without a browser."""
+        self.limiter.acquire(url)
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.Timeout as e:
+            self.limiter.report(url, OUTCOME_TIMEOUT)
+            self.logger.info(f"HTTP tier timed out for {url}: {e}")
+            return None
+        except requests.RequestException as e:
+            self.limiter.report(url, OUTCOME_ERROR)
+            self.logger.info(f"HTTP tier failed for {url}: {e}")
+            return None
+
+        body = response.text
+        if response.status_code in (403, 429, 503) or is_challenge_page(body):
+            self.limiter.report(url, OUTCOME_BLOCKED)
+            return None
+        self.limiter.report(url, OUTCOME_OK)
+
+        if response.status_code != 200 or len(body) < HTTP_MIN_BODY_BYTES:
+            return None
+        if any(m in body for m in JS_REQUIRED_MARKERS):
+            return None
+        if expect and expect not in body:
+            return None
+        return body
+
+    def fetch(
+        self,
+        url: str,
+        browser_fetch: Callable[[str], Optional[str]],
+        expect: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Return page HTML for `url`, using the cheapest tier that works.
+
+        Args:
+            url: Page URL.
+            browser_fetch: Fallback fetch (e.g. `BaseExtractor._request_url_by_chrome`).
+            expect: Optional substring a usable page must contain.
+        """
+        pattern = url_pattern(url)
+
+        if self._should_try_http(pattern):
+            t0 = time.perf_counter()
+            body = self._http_get(url, expect)
+            if body is not None:
+                self._remember(pattern, TIER_HTTP)
+                with self._lock:
+                    self.stats["http_ok"] += 1
+                self.logger.debug(f"HTTP tier {url} in {1000 * (time.perf_counter() - t0):.0f} ms")
+                return body
+            with self._lock:
+                self.stats["http_rejected"] += 1
+            self._remember(pattern, TIER_BROWSER)
+
+        with self._lock:
+            self.stats["browser"] += 1
+        return browser_fetch(url)
+
+
+_FETCHER: Optional[TieredFetcher] = None
+_FETCHER_LOCK = threading.Lock()
+
+
+def get_fetcher() -> TieredFetcher:
+    """Return the process-wide tiered fetcher, creating it on first use."""
+    global _FETCHER
+    with _FETCHER_LOCK:
+        if _FETCHER is None:
+            _FETCHER = TieredFetcher()
+        return _FETCHER
@@ -0,0 +1,387 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from constants import LOCAL_DB_PATH
+from delta_hash import (
+    MATCHES_HASH_FIELDS, PLAYERS_HASH_FIELDS, TOURNAMENTS_HASH_FIELDS,
+    canonical, ora_hash, parse_date
+)
+from storage import StorageBackend
+
+_SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SQL")
+
+# Schema sources, in creation order (content scripts only hold INSERTs)
+_SCHEMA_DIRS = ("Tables", os.path.join("Tables", "Staging"), "content")
+
+_ORACLE_DATE_TOKENS = (("yyyy", "%Y"), ("hh24", "%H"), ("mm", "%m"), ("dd", "%d"), ("mi", "%M"), ("ss", "%S"))
+
+_RE_PK_UNIQUE = re.compile(
+    r"^ALTER\s+TABLE\s+(\w+)\s+ADD\s+CONSTRAINT\s+([\w$#]+)\s+(?:PRIMARY\s+KEY|UNIQUE)\s*(\(.*\))$",
+    re.IGNORECASE | re.DOTALL,
+)
+_RE_CREATE_INDEX = re.compile(r"^CREATE\s+(UNIQUE\s+)?INDEX\s+([\w$#]+)\s+ON\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_RE_SQLPLUS = re.compile(r"^\s*(set|prompt|spool|whenever)\b", re.IGNORECASE)
+
+
+# ----------------------------- Oracle → SQLite -------------------------------
+
+def split_statements(text: str) -> List[str]:
+    """Split an Oracle SQL script into statements, dropping SQL*Plus commands and '/' lines."""
+    statements, buf = [], []
+    for line in text.splitlines():
+        if not buf and (_RE_SQLPLUS.match(line) or line.strip() == "/"):
+            continue
+        buf.append(line)
+        chunk = "\n".join(buf)
+        if sqlite3.complete_statement(chunk):
+            statements.append(chunk.strip().rstrip(";").strip())
+            buf = []
+    return [s for s in statements if re.sub(r"--[^\n]*", "", s).strip()]
+
+
+def translate_ddl(stmt: str) -> Optional[str]:
+    """
+    Translate one Oracle DDL/DML statement for SQLite; None if it has no local meaning.
+
+    Oracle types are kept as declared (VARCHAR2 gets TEXT affinity, NUMBER/DATE
+    NUMERIC). Primary keys and unique constraints become unique indexes (the
+    upserts below need them); foreign keys and comments are skipped.
+    """
+    body = re.sub(r"--[^\n]*", "", stmt).strip()
+    if not body:
+        return None
+    head = body.split(None, 3)
+    keyword = head[0].upper()
+
+    if keyword == "CREATE":
+        body = re.sub(r"GLOBAL\s+TEMPORARY\s+", "", body, flags=re.IGNORECASE)
+        body = re.sub(r"\s+ON\s+COMMIT\s+(DELETE|PRESERVE)\s+ROWS\s*$", "", body, flags=re.IGNORECASE)
+        m = _RE_CREATE_INDEX.match(body)
+        if m:
+            return f'CREATE {m.group(1) or ""}INDEX IF NOT EXISTS "{m.group(2)}" ON {m.group(3)}'
+        return re.sub(r"^CREATE\s+TABLE\s+", "CREATE TABLE IF NOT EXISTS ", body, flags=re.IGNORECASE)
+    if keyword == "ALTER":
+        m = _RE_PK_UNIQUE.match(body)
+        if m:
+            return f'CREATE UNIQUE INDEX IF NOT EXISTS "{m.group(2)}" ON {m.group(1)} {m.group(3)}'
+        return None
+    if keyword == "INSERT":
+        return re.sub(r"^INSERT\s+INTO\s+", "INSERT OR IGNORE INTO ", body, flags=re.IGNORECASE)
+    return None
+
+
+def _to_date(value: Optional[str], fmt: str) -> Optional[str]:
+    """TO_DATE(value, fmt) → ISO 'yyyy-mm-dd' text (how the local backend stores DATEs)."""
+    py_fmt = fmt.lower()
+    for token, directive in _ORACLE_DATE_TOKENS:
+        py_fmt = py_fmt.replace(token, directive)
+    d = parse_date(value, py_fmt)
+    return d.isoformat() if d else None
+
+
+def _hash_function(fields):
+    """SQLite function computing a `sf_*_delta_hash` from positional arguments."""
+    names = [name for name, _ in fields]
+
+    def fn(*args):
+        return ora_hash(canonical(fields, dict(zip(names, args))).encode("utf-8"))
+    return fn
+
+
+def _register_functions(con: sqlite3.Connection) -> None:
+    con.create_function("ora_hash", 1, lambda v: None if v is None else ora_hash(str(v).encode("utf-8")),
+                        deterministic=True)
+    con.create_function("to_date", 2, _to_date, deterministic=True)
+    con.create_function("nvl", 2, lambda a, b: b if a is None else a, deterministic=True)
+    con.create_function("sf_atp_matches_delta_hash", -1, _hash_function(MATCHES_HASH_FIELDS), deterministic=True)
+    con.create_function("sf_atp_players_delta_hash", -1, _hash_function(PLAYERS_HASH_FIELDS), deterministic=True)
+    con.create_function(
+        "sf_atp_tournaments_delta_hash", -1, _hash_function(TOURNAMENTS_HASH_FIELDS), deterministic=True
+    )
+
+
+# ------------------------- Set-based process steps ---------------------------
+
+_MATCH_COLUMNS = [name for name, _ in MATCHES_HASH_FIELDS[:18]]
+_STAT_COLUMNS = [name for name, _ in MATCHES_HASH_FIELDS[18:]]
+
+
+def _players_from_matches(role: str) -> str:
+    return f"""
+        INSERT OR IGNORE INTO atp_players (url, code, delta_hash, batch_id)
+        SELECT url, code, sf_atp_players_delta_hash(code, url), :batch_id
+        FROM (SELECT DISTINCT s.{role}_url AS url, s.{role}_code AS code
+              FROM stg_matches s
+              WHERE s.{role}_code NOT IN (SELECT p.code FROM atp_players p))
+    """
+
+
+_PROCESS_TOURNAMENTS = """
+    INSERT INTO atp_tournaments (id, delta_hash, batch_id, name, year, code, url, slug, location, sgl_draw_url,
+                                 sgl_pdf_url, indoor_outdoor, surface, series_category_id, start_dtm, finish_dtm,
+                                 sgl_draw_qty, dbl_draw_qty, prize_money, prize_currency, country_code,
+                                 draw_template_id)
+    SELECT i.id,
+           sf_atp_tournaments_delta_hash(i.id, i.name, i.year, i.code, i.url, i.slug, i.location, i.sgl_draw_url,
+                                         i.sgl_pdf_url, i.indoor_outdoor, i.surface, i.series_category_id,
+                                         i.start_dtm, i.finish_dtm, i.sgl_draw_qty, i.dbl_draw_qty, i.prize_money,
+                                         i.prize_currency, i.country_code, i.points_rule_id, i.draw_template_id),
+           :batch_id, i.name, i.year, i.code, i.url, i.slug, i.location, i.sgl_draw_url, i.sgl_pdf_url,
+           i.indoor_outdoor, i.surface, i.series_category_id, i.start_dtm, i.finish_dtm, i.sgl_draw_qty,
+           i.dbl_draw_qty, i.prize_money, i.prize_currency, i.country_code, i.draw_template_id
+    FROM (SELECT g.id, g.name, g.year, g.code, g.url, g.slug,
+                 nvl(g.location, t.location) AS location,
+                 g.sgl_draw_url, g.sgl_pdf_url, g.indoor_outdoor, g.surface,
+                 CASE
+                   WHEN t.series_category_id IN ('og', 'atpFinal', 'nextGen', 'laverCup', 'atpCup', 'teamCup',
+                                                 'chFinal', 'gsCup') THEN t.series_category_id
+                   ELSE nvl(g.series, t.series_category_id)
+                 END AS series_category_id,
+                 to_date(g.start_dtm, 'dd.mm.yyyy') AS start_dtm,
+                 to_date(g.finish_dtm, 'dd.mm.yyyy') AS finish_dtm,
+                 g.sgl_draw_qty, g.dbl_draw_qty, g.prize_money, g.prize_currency,
+                 nvl(c.code, t.country_code) AS country_code,
+                 t.points_rule_id,
+                 nvl(t.draw_template_id,
+                     CASE
+                       WHEN g.year < 2024 THEN NULL
+                       WHEN g.sgl_draw_qty IN (128, 96, 64, 56, 48, 28) THEN 'R' || g.sgl_draw_qty
+                       WHEN g.sgl_draw_qty = 32 AND nvl(g.series, t.series_category_id) IN ('atp250', 'atp500')
+                         THEN CASE WHEN g.code IN ('339', '425') THEN 'R32-Q12' ELSE 'R32-Q8' END
+                       WHEN g.sgl_draw_qty = 32 AND nvl(g.series, t.series_category_id) IN ('ch50', 'ch100')
+                         THEN CASE WHEN g.code IN ('2861', '2863', '3824', '7009') THEN 'R32-Q8' ELSE 'R32-Q12' END
+                       WHEN g.sgl_draw_qty = 18 THEN 'RR18'
+                       WHEN g.sgl_draw_qty = 12 THEN 'RR12'
+                       WHEN g.sgl_draw_qty = 8 AND nvl(g.series, t.series_category_id) = 'nextGen' THEN 'RR8-NG'
+                       WHEN g.sgl_draw_qty = 8 AND nvl(g.series, t.series_category_id) = 'atpFinal' THEN 'RR8-F'
+                     END) AS draw_template_id,
+                 row_number() OVER (PARTITION BY g.id ORDER BY se.id) AS rn
+          FROM stg_tournaments g
+          LEFT JOIN series se ON se.id = g.series
+          LEFT JOIN countries c ON c.name = g.country_name
+          LEFT JOIN atp_tournaments t ON t.id = g.id
+          WHERE g.code IS NOT NULL) i
+    WHERE i.rn = 1
+    ON CONFLICT (id) DO UPDATE SET
+      delta_hash = excluded.delta_hash, batch_id = excluded.batch_id, name = excluded.name,
+      year = excluded.year, code = excluded.code, url = excluded.url, slug = excluded.slug,
+      location = excluded.location, sgl_draw_url = excluded.sgl_draw_url, sgl_pdf_url = excluded.sgl_pdf_url,
+      indoor_outdoor = excluded.indoor_outdoor, surface = excluded.surface,
+      series_category_id = excluded.series_category_id, start_dtm = excluded.start_dtm,
+      finish_dtm = excluded.finish_dtm, sgl_draw_qty = excluded.sgl_draw_qty,
+      dbl_draw_qty = excluded.dbl_draw_qty, prize_money = excluded.prize_money,
+      prize_currency = excluded.prize_currency, country_code = excluded.country_code,
+      draw_template_id = excluded.draw_template_id
+    WHERE atp_tournaments.delta_hash != excluded.delta_hash
+"""
+
+_PROCESS_PLAYERS = """
+    INSERT INTO atp_players (code, delta_hash, batch_id, url, first_name, last_name, slug, birth_date, birthplace,
+                             turned_pro, weight, height, residence, handedness, backhand, citizenship)
+    SELECT player_code,
+           sf_atp_players_delta_hash(player_code, player_url, first_name, last_name, player_slug,
+                                     to_date(birthdate, 'yyyy.mm.dd'), birthplace, turned_pro, weight_kg,
+                                     height_cm, residence, handedness, backhand, flag_code),
+           :batch_id, player_url, first_name, last_name, player_slug, to_date(birthdate, 'yyyy.mm.dd'),
+           birthplace, turned_pro, weight_kg, height_cm, residence, handedness, backhand, flag_code
+    FROM stg_players
+    WHERE true
+    ON CONFLICT (code) DO UPDATE SET
+      delta_hash = excluded.delta_hash, batch_id = excluded.batch_id,
+      url = nvl(excluded.url, url), first_name = nvl(excluded.first_name, first_name),
+      last_name = nvl(excluded.last_name, last_name), slug = nvl(excluded.slug, slug),
+      birth_date = nvl(excluded.birth_date, birth_date), birthplace = nvl(excluded.birthplace, birthplace),
+      turned_pro = nvl(excluded.turned_pro, turned_pro), weight = nvl(excluded.weight, weight),
+      height = nvl(excluded.height, height), residence = nvl(excluded.residence, residence),
+      handedness = nvl(excluded.handedness, handedness), backhand = nvl(excluded.backhand, backhand),
+      citizenship = nvl(excluded.citizenship, citizenship)
+    WHERE atp_players.delta_hash != excluded.delta_hash
+"""
+
+_MERGE_MATCHES = f"""
+    INSERT INTO atp_matches (id, delta_hash, batch_id, {", ".join(_MATCH_COLUMNS[1:])})
+    SELECT s.id, sf_atp_matches_delta_hash({", ".join("s." + c for c in _MATCH_COLUMNS + _STAT_COLUMNS)}),
+           :batch_id, {", ".join("s." + c for c in _MATCH_COLUMNS[1:])}
+    FROM (SELECT i.id, i.tournament_id, i.stadie_id, i.match_order, i.match_ret, i.winner_code, i.loser_code,
+                 i.winner_seed, i.loser_seed,
+                 CASE
+                   WHEN nvl(length(i.score), 0) > nvl(length(m.score), 0) THEN i.score
+                   ELSE m.score
+                 END AS score,
+                 i.winner_sets_won, i.loser_sets_won, i.winner_games_won, i.loser_games_won,
+                 i.winner_tiebreaks_won, i.loser_tiebreaks_won,
+                 nvl(i.stats_url, m.stats_url) AS stats_url,
+                 nvl(i.match_duration, m.match_duration) AS match_duration,
+                 {", ".join("m." + c for c in _STAT_COLUMNS)}
+          FROM (SELECT sm.*,
+                       CASE WHEN sm.match_ret IS NULL THEN sm.stats_url END AS stats_url,
+                       row_number() OVER (PARTITION BY sm.id ORDER BY sm.match_order) AS rn
+                FROM stg_matches sm) i
+          LEFT JOIN atp_matches m ON m.id = i.id
+          WHERE i.rn = 1) s
+    WHERE true
+    ON CONFLICT (id) DO UPDATE SET
+      delta_hash = excluded.delta_hash, batch_id = excluded.batch_id,
+      {", ".join(f"{c} = excluded.{c}" for c in _MATCH_COLUMNS[1:] if c != "stats_url")},
+      stats_url = nvl(excluded.stats_url, atp_matches.stats_url)
+    WHERE atp_matches.delta_hash != excluded.delta_hash
+"""
+
+_PROCESS_STATS = f"""
+    UPDATE atp_matches AS d SET
+      delta_hash = s.delta_hash, batch_id = :batch_id,
+      {", ".join(f"{c} = s.{c}" for c in _STAT_COLUMNS)}
+    FROM (SELECT m.stats_url,
+                 {", ".join(f"nvl(s.{c}, m.{c}) AS {c}" for c in _STAT_COLUMNS)},
+                 sf_atp_matches_delta_hash({", ".join(
+                     [f"m.{c}" for c in _MATCH_COLUMNS] + [f"nvl(s.{c}, m.{c})" for c in _STAT_COLUMNS])}) AS delta_hash
+          FROM stg_matches s
+          JOIN atp_matches m
+            ON s.stats_url = m.stats_url OR s.stats_url = replace(m.stats_url, 'stats-centre', 'match-stats')
+          WHERE coalesce(s.match_duration, {", ".join("s." + c for c in _STAT_COLUMNS)}) IS NOT NULL) s
+    WHERE d.stats_url = s.stats_url
+      AND d.delta_hash != s.delta_hash
+"""
+
+# Local equivalents of the Oracle process procedures (statements run in one transaction)
+LOCAL_PROCEDURES: Dict[str, List[str]] = {
+    "sp_process_atp_tournaments": [_PROCESS_TOURNAMENTS],
+    "sp_process_atp_players": [_PROCESS_PLAYERS],
+    "sp_process_atp_matches": [_players_from_matches("winner"), _players_from_matches("loser"), _MERGE_MATCHES],
+    "sp_process_atp_stats": [_PROCESS_STATS],
+}
+
+
+class LocalStorage(StorageBackend):
+    """
+    Embedded SQLite database mirroring the Oracle staging and core schema.
+
+    On first use the tables, keys and reference content are created from
+    ETL/SQL (Tables, Tables/Staging, content). The four process procedures are
+    implemented as set-based upserts (`LOCAL_PROCEDURES`) using Python twins of
+    the delta-hash functions; procedures without a local equivalent (points,
+    draws, enrichment) are skipped with a warning. A `dual` view and `ora_hash`,
+    `to_date`, `nvl` functions keep simple Oracle queries working.
+    """
+
+    name = "local"
+    embedded = True
+    first_rows = "LIMIT :page_size"
+
+    def __init__(self, path: str = LOCAL_DB_PATH):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"loads": 0, "rows": 0, "calls": 0, "skipped_calls": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        _register_functions(con)
+        return con
+
+    def _create_schema(self) -> None:
+        start = time.perf_counter()
+        con = self._connect()
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE VIEW IF NOT EXISTS dual AS SELECT 'X' AS dummy")
+            created = 0
+            for sub in _SCHEMA_DIRS:
+                folder = os.path.join(_SQL_DIR, sub)
+                if not os.path.isdir(folder):
+                    continue
+                for file_name in sorted(f for f in os.listdir(folder) if f.endswith(".sql")):
+                    with open(os.path.join(folder, file_name), encoding="utf-8") as f:
+                        statements = split_statements(f.read())
+                    for stmt in statements:
+                        local = translate_ddl(stmt)
+                        if local is None:
+                            continue
+                        try:
+                            con.execute(local)
+                            created += 1
+                        except sqlite3.Error as e:
+                            self.logger.warning(f"{sub}/{file_name}: skipped statement ({e})")
+            con.commit()
+        finally:
+            con.close()
+        self.logger.info(f"Local schema ready at {self.path}: {created} statement(s) in "
+                         f"{1000 * (time.perf_counter() - start):.0f} ms")
+
+    # --------------------------------- API -----------------------------------
+
+    def acquire(self) -> sqlite3.Connection:
+        return self._connect()
+
+    def release(self, con: Optional[sqlite3.Connection]) -> None:
+        if con is not None:
+            con.close()
+
+    def truncate(self, con, table: str) -> None:
+        con.execute(f"DELETE FROM {table}")
+        con.commit()
+
+    def load(self, con, insert_str, rows, input_sizes):
+        sql = re.sub(r":(\d+)", r"?\1", insert_str)
+        try:
+            con.executemany(sql, rows)
+            con.commit()
+            errors = []
+            inserted = len(rows)
+        except sqlite3.Error:
+            # Same contract as Oracle batch errors: keep good rows, report bad ones
+            con.rollback()
+            errors, inserted = [], 0
+            for offset, row in enumerate(rows):
+                try:
+                    con.execute(sql, row)
+                    inserted += 1
+                except sqlite3.Error as e:
+                    errors.append((offset, str(e)))
+            con.commit()
+        with self._lock:
+            self.stats["loads"] += 1
+            self.stats["rows"] += inserted
+        return inserted, errors
+
+    def supports(self, proc: str) -> bool:
+        return proc.lower() in LOCAL_PROCEDURES
+
+    def batch_mark(self, con) -> int:
+        # Local batch ids are millisecond timestamps (see `call`)
+        return int(time.time() * 1000) % 10 ** 12 - 1
+
+    def identity(self, con) -> str:
+        return os.path.abspath(self.path)
+
+    def call(self, con, proc: str, ids=None) -> None:
+        statements = LOCAL_PROCEDURES.get(proc.lower())
+        if statements is None:
+            with self._lock:
+                self.stats["skipped_calls"] += 1
+            self.logger.warning(f"{proc} has no local equivalent; skipped.")
+            return
+        params = {"batch_id": int(time.time() * 1000) % 10 ** 12}
+        try:
+            processed = 0
+            for stmt in statements:
+                processed = con.execute(stmt, params if ":batch_id" in stmt else ()).rowcount
+            con.commit()
+        except sqlite3.Error:
+            con.rollback()
+            raise
+        with self._lock:
+            self.stats["calls"] += 1
+        self.logger.info(f"{proc}: {processed} row(s) processed locally")
+
+    def summary(self) -> Optional[str]:
+        with self._lock:
+            return (f"Local storage {self.path}: loads={self.stats['loads']} rows={self.stats['rows']} "
+                    f"procs={self.stats['calls']} skipped_procs={self.stats['skipped_calls']}")
@@ -0,0 +1,137 @@
+import json
+import hashlib
+import threading
+import zipfile
+from typing import Any, Callable, Optional
+
+from page_cache import normalize_url
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+
+class PageArchive:
+    """
+    Compact record/replay archive of fetched pages (a single deflated zip file).
+
+    Entries:
+      - pages/<sha1(normalized url)>.html : page body
+      - meta/<name>.json                  : discovery results (worklists, adjustments)
+      - urls.jsonl                        : fetch log (url per line, in fetch order)
+    Record mode appends to the archive; replay mode serves pages and worklists
+    from it so `_parse()` runs without network or database.
+    """
+
+    def __init__(self, path: str, mode: str):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(
+            path, "a" if mode == MODE_RECORD else "r",
+            compression=zipfile.ZIP_DEFLATED, compresslevel=6
+        )
+        self._names = set(self._zip.namelist())
+        self._url_log = []
+        self.stats = {"pages": 0, "missing": 0}
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    @staticmethod
+    def _page_name(url: str) -> str:
+        return "pages/" + hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest() + ".html"
+
+    # -------------------------------- Pages ----------------------------------
+
+    def record(self, url: str, body: str) -> None:
+        """Store a fetched page (first version wins if a URL is fetched twice)."""
+        if not body:
+            return
+        name = self._page_name(url)
+        with self._lock:
+            if name in self._names:
+                return
+            self._zip.writestr(name, body)
+            self._names.add(name)
+            self._url_log.append(url)
+            self.stats["pages"] += 1
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the recorded body for `url`, or None if it was never recorded."""
+        name = self._page_name(url)
+        with self._lock:
+            if name not in self._names:
+                self.stats["missing"] += 1
+                return None
+            self.stats["pages"] += 1
+            return self._zip.read(name).decode("utf-8")
+
+    # --------------------------- Discovery results ---------------------------
+
+    def worklist(self, name: str, build: Callable[[], Any]) -> Any:
+        """
+        Record or replay a discovery result.
+
+        In record mode `build()` runs (against the DB) and its JSON-serializable
+        result is stored; in replay mode the stored value is returned instead.
+        Lists of rows come back as lists of tuples, like cursor `fetchall()`.
+        """
+        entry = f"meta/{name}.json"
+        if self.replaying:
+            with self._lock:
+                if entry not in self._names:
+                    raise KeyError(f"Archive {self.path} has no recorded '{name}'")
+                value = json.loads(self._zip.read(entry).decode("utf-8"))
+            if isinstance(value, list):
+                return [tuple(v) if isinstance(v, list) else v for v in value]
+            return value
+
+        value = build()
+        with self._lock:
+            if entry not in self._names:
+                self._zip.writestr(entry, json.dumps(value, default=str))
+                self._names.add(entry)
+        return value
+
+    # -------------------------------- Close ----------------------------------
+
+    def close(self) -> None:
+        with self._lock:
+            if self.recording and self._url_log:
+                name = "urls.jsonl"
+                n = sum(1 for x in self._names if x.startswith("urls"))
+                if name in self._names:
+                    name = f"urls.{n}.jsonl"
+                self._zip.writestr(name, "".join(json.dumps(u) + "\n" for u in self._url_log))
+                self._url_log = []
+            self._zip.close()
+
+
+_ARCHIVE: Optional[PageArchive] = None
+
+
+def open_archive(path: str, mode: str) -> PageArchive:
+    """Open the process-wide archive used by every extractor created afterwards."""
+    global _ARCHIVE
+    close_archive()
+    _ARCHIVE = PageArchive(path, mode)
+    return _ARCHIVE
+
+
+def get_archive() -> Optional[PageArchive]:
+    """Return the process-wide archive, or None for normal live runs."""
+    return _ARCHIVE
+
+
+def close_archive() -> None:
+    global _ARCHIVE
+    if _ARCHIVE is not None:
+        _ARCHIVE.close()
+        _ARCHIVE = None
@@ -0,0 +1,237 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from constants import PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES, PAGE_CACHE_TTLS
+
+_RE_RESULTS_YEAR = re.compile(r"/scores/archive/[^/]+/[^/]+/(\d{4})/results")
+_RE_STATS_YEAR = re.compile(r"/match-stats/archive/(\d{4})/")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used as cache key: lowercase scheme/host, no fragment,
+    no trailing slash, query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def classify_page(url: str) -> str:
+    """
+    Map a URL to a page type whose TTL is configured in `PAGE_CACHE_TTLS`.
+
+    - results_final : results page of a past season (immutable)
+    - results_live  : results page of the current season (may still change)
+    - match_stats   : per-match stats page (immutable for past seasons)
+    - player        : player profile (ages slowly)
+    - tournament    : tournament overview page
+    - archive       : yearly results-archive listing
+    - default       : anything else
+    """
+    path = urlsplit(url).path.lower()
+    current_year = datetime.today().year
+
+    m = _RE_RESULTS_YEAR.search(path)
+    if m:
+        return "results_final" if int(m.group(1)) < current_year else "results_live"
+    if "match-stats" in path or "stats-centre" in path:
+        m = _RE_STATS_YEAR.search(path)
+        if m and int(m.group(1)) < current_year:
+            return "results_final"
+        return "match_stats"
+    if "/players/" in path:
+        return "player"
+    if "/tournaments/" in path:
+        return "tournament"
+    if "results-archive" in path:
+        return "archive"
+    return "default"
+
+
+class PageCache:
+    """
+    Persistent, content-addressed HTML cache.
+
+    Layout under `cache_dir`:
+      - index.sqlite : url_key → (digest, page_type, size, fetched_at, accessed_at)
+      - blobs/ab/<digest>.z : zlib-compressed body, named by SHA-256 of the body
+    Identical bodies are stored once. Entries expire per page type (see
+    `classify_page`) and the store is kept under `max_bytes` by evicting the
+    least recently accessed entries.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = PAGE_CACHE_DIR,
+        max_bytes: int = PAGE_CACHE_MAX_BYTES,
+        ttls: Optional[Dict[str, Optional[int]]] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = dict(PAGE_CACHE_TTLS if ttls is None else ttls)
+        self.logger = logging.getLogger(__name__)
+
+        os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url_key     TEXT PRIMARY KEY,
+                url         TEXT NOT NULL,
+                page_type   TEXT NOT NULL,
+                digest      TEXT NOT NULL,
+                size        INTEGER NOT NULL,
+                fetched_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._con.execute("CREATE INDEX IF NOT EXISTS ix_pages_accessed ON pages(accessed_at)")
+        self._con.execute("CREATE INDEX IF NOT EXISTS ix_pages_digest ON pages(digest)")
+        self._con.commit()
+
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+    # ------------------------------- Helpers ---------------------------------
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", digest[:2], f"{digest}.z")
+
+    def _is_fresh(self, page_type: str, fetched_at: float) -> bool:
+        ttl = self.ttls.get(page_type, self.ttls.get("default"))
+        return ttl is None or (time.time() - fetched_at) < ttl
+
+    def _drop_blob_if_orphan(self, digest: str) -> None:
+        (refs,) = self._con.execute("SELECT COUNT(*) FROM pages WHERE digest = ?", (digest,)).fetchone()
+        if refs == 0:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    # --------------------------------- API -----------------------------------
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the cached body for `url` if present and fresh; else None."""
+        key = self._url_key(url)
+        with self._lock:
+            row = self._con.execute(
+                "SELECT digest, page_type, fetched_at FROM pages WHERE url_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            digest, page_type, fetched_at = row
+            if not self._is_fresh(page_type, fetched_at):
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            try:
+                with open(self._blob_path(digest), "rb") as f:
+                    body = zlib.decompress(f.read()).decode("utf-8")
+            except (OSError, zlib.error):
+                self._con.execute("DELETE FROM pages WHERE url_key = ?", (key,))
+                self._con.commit()
+                self.stats["misses"] += 1
+                return None
+            self._con.execute("UPDATE pages SET accessed_at = ? WHERE url_key = ?", (time.time(), key))
+            self._con.commit()
+            self.stats["hits"] += 1
+            return body
+
+    def put(self, url: str, body: str) -> None:
+        """Store `body` for `url` and evict LRU entries if over budget."""
+        if not body:
+            return
+        raw = body.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._blob_path(digest)
+        now = time.time()
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(zlib.compress(raw, 6))
+                os.replace(tmp, path)
+            size = os.path.getsize(path)
+
+            key = self._url_key(url)
+            old = self._con.execute("SELECT digest FROM pages WHERE url_key = ?", (key,)).fetchone()
+            self._con.execute(
+                "INSERT OR REPLACE INTO pages(url_key, url, page_type, digest, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_url(url), classify_page(url), digest, size, now, now),
+            )
+            if old and old[0] != digest:
+                self._drop_blob_if_orphan(old[0])
+            self._con.commit()
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Evict least recently accessed entries down to 90% of `max_bytes` (lock held)."""
+        (total,) = self._con.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM pages)"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        rows = self._con.execute("SELECT url_key, digest FROM pages ORDER BY accessed_at").fetchall()
+        for url_key, digest in rows:
+            if total <= target:
+                break
+            self._con.execute("DELETE FROM pages WHERE url_key = ?", (url_key,))
+            (refs,) = self._con.execute("SELECT COUNT(*) FROM pages WHERE digest = ?", (digest,)).fetchone()
+            if refs == 0:
+                path = self._blob_path(digest)
+                try:
+                    total -= os.path.getsize(path)
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.stats["evictions"] += 1
+        self._con.commit()
+
+    def summary(self) -> str:
+        """One-line hit/miss summary for logs."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = 100.0 * self.stats["hits"] / lookups if lookups else 0.0
+        return (
+            f"hits={self.stats['hits']} misses={self.stats['misses']} ({rate:.1f}% hit) "
+            f"expired={self.stats['expired']} stores={self.stats['stores']} evictions={self.stats['evictions']}"
+        )
+
+
+_CACHE: Optional[PageCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the process-wide page cache, or None when disabled (empty PAGE_CACHE_DIR)."""
+    global _CACHE
+    if not PAGE_CACHE_DIR:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = PageCache()
+        return _CACHE
@@ -0,0 +1,157 @@
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from lxml import etree
+
+# Page layouts per page type, newest first. Each layout has a marker (boolean
+# XPath that recognizes it), its XPaths and its regexes (pattern, flags).
+# A site redesign is a new layout entry here; the extractors stay unchanged as
+# long as the selector names keep their meaning.
+_LAYOUTS: Dict[str, List[Tuple[str, str, Dict[str, str], Dict[str, Tuple[str, int]]]]] = {
+    # /en/scores/archive/<slug>/<code>/<year>/results (MatchesATPExtractor)
+    "results": [
+        (
+            "2023",
+            "boolean(//div[@class='match-header'])",
+            {
+                "match_nodes": "./div/div/div/div/div/div/div[@class='match']",
+                "match_nodes_any": "//div[contains(@class,'match') and contains(@class,'match')]",
+                "stadie": "./div[@class='match-header']/span/strong/text()",
+                "player_info": (
+                    "./div[@class='match-content']/div[@class='match-stats']"
+                    "/div[@class='stats-item']/div[@class='player-info']"
+                ),
+                "player_href": "./div[@class='name']/a/@href",
+                "player_name": "./div[@class='name']/a/text()",
+                "player_seed": "./div[@class='name']/span/text()",
+                "player_winner": "./div[@class='winner']",
+                "score_cols": (
+                    "./div[@class='match-content']/div[@class='match-stats']"
+                    "/div[@class='stats-item']/div[@class='scores']"
+                ),
+                "score_items": "./div[@class='score-item']",
+                "children": "./*",
+                "notes": "./div[@class='match-notes']/text()",
+                "stats_href": (
+                    "./div[@class='match-footer']/div[@class='match-cta']"
+                    "/a[text()='Match Stats' or text()='Stats']/@href"
+                ),
+                "duration": "./div[@class='match-header']/span[2]/text()",
+            },
+            {},
+        ),
+    ],
+    # /en/players/<slug>/<code>/overview (PlayersATPExtractor)
+    "player": [
+        (
+            "2023",
+            "boolean(//div[@class='personal_details'])",
+            {
+                "name": "//div[@class='info']/div[@class='name']/span/text()",
+                "details_left": "//div[@class='personal_details']//ul[contains(@class,'pd_left')]/li",
+                "details_right": "//div[@class='personal_details']//ul[contains(@class,'pd_right')]/li",
+                "detail_label": ".//span[1]/text()",
+                "detail_value": ".//span[2]//text()",
+                "flag_href": ".//svg[contains(@class,'atp-flag')]/use/@href",
+            },
+            {
+                "birth": (r"\((\d{4}/\d{2}/\d{2})\)", 0),
+                "weight_kg": (r"\((\d+)\s*kg\)", re.I),
+                "height_cm": (r"\((\d+)\s*cm\)", re.I),
+            },
+        ),
+    ],
+    # /en/scores/match-stats/archive/... (StatsATPExtractor)
+    "match_stats": [
+        (
+            "2023",
+            "boolean(//div[@class='stats-item'])",
+            {
+                "left_winner": "//div[@class='stats-item'][1]//div[contains(@class,'winner')]",
+                "right_winner": "//div[@class='stats-item'][2]//div[contains(@class,'winner')]",
+                "player_values": "//div[@class='player-stats-item']/div[@class='value']",
+                "opponent_values": "//div[@class='opponent-stats-item']/div[@class='value']",
+            },
+            {
+                "ratio": (r"\((\d+)\s*/\s*(\d+)\)", 0),
+            },
+        ),
+    ],
+    # /en/scores/results-archive?year=...&tournamentType=... (TournamentsATPExtractor)
+    "tournament_archive": [
+        (
+            "2023",
+            "boolean(//a[contains(@class,'tournament__profile')])",
+            {
+                "titles": "//div[@class='top']/span[@class='name']/text()",
+                "overview_hrefs": "//a[contains(@class,'tournament__profile')]/@href",
+                "dates": "//div[@class='bottom']//span[contains(@class,'Date')]/text()",
+                "banners": (
+                    "//div[contains(@class,'event-badge_container')]"
+                    "//img[contains(@class,'events_banner')]/@src"
+                ),
+            },
+            {},
+        ),
+    ],
+    # /en/tournaments/<slug>/<code>/overview (TournamentsATPExtractor)
+    "tournament_overview": [
+        (
+            "2023",
+            "boolean(//div[@class='td_content'])",
+            {
+                "draw": "//div[@class='td_content']/ul[@class='td_left']/li[2]/span[2]/text()",
+                "surface": "//div[@class='td_content']/ul[@class='td_left']/li[3]/span[2]/text()",
+                "prize": "//div[@class='td_content']/ul[@class='td_left']/li[4]/span[2]/text()",
+                "location": "//div[@class='td_content']/ul[@class='td_right']/li[1]/span[2]/text()",
+            },
+            {},
+        ),
+    ],
+}
+
+
+class SelectorSet:
+    """
+    Compiled selectors of one page type and layout: every XPath is an
+    `lxml.etree.XPath` attribute (call it with the context node) and every
+    regex a compiled pattern attribute.
+    """
+
+    def __init__(self, page_type: str, layout: str, marker: str,
+                 xpaths: Dict[str, str], regexes: Dict[str, Tuple[str, int]]):
+        self.page_type = page_type
+        self.layout = layout
+        self.matches = etree.XPath(marker)
+        for name, expr in xpaths.items():
+            setattr(self, name, etree.XPath(expr))
+        for name, (pattern, flags) in regexes.items():
+            setattr(self, name, re.compile(pattern, flags))
+
+    def __repr__(self) -> str:
+        return f"SelectorSet({self.page_type!r}, layout={self.layout!r})"
+
+
+# Compiled once per process, at import
+_REGISTRY: Dict[str, List[SelectorSet]] = {
+    page_type: [SelectorSet(page_type, *layout) for layout in layouts]
+    for page_type, layouts in _LAYOUTS.items()
+}
+
+_logger = logging.getLogger(__name__)
+
+
+def get_selectors(page_type: str, tree: Optional[etree._Element] = None) -> SelectorSet:
+    """
+    Compiled selectors for `page_type`. With a parsed page (`tree`), the first
+    layout whose marker matches it is returned; otherwise (or if none matches,
+    logged) the newest layout.
+    """
+    layouts = _REGISTRY[page_type]
+    if tree is not None:
+        for selectors in layouts:
+            if selectors.matches(tree):
+                return selectors
+        _logger.warning(f"No known {page_type} layout matches the page; using layout {layouts[0].layout}.")
+    return layouts[0]
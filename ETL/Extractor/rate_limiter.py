@@ -0,0 +1,165 @@
+import time
+import random
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from constants import (
+    RATE_LIMITS, RATE_LIMIT_DEFAULT, RATE_LIMIT_INCREASE, RATE_LIMIT_BACKOFF_BASE, SLEEP_DURATION
+)
+
+OUTCOME_OK = "ok"
+OUTCOME_BLOCKED = "blocked"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+
+
+def host_key(url: str) -> str:
+    """Rate-limit key for a URL: its host without a leading 'www.'."""
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class HostBucket:
+    """
+    Token bucket for one host with AIMD rate control.
+
+    - Clean responses raise the rate additively (up to `max_rate`).
+    - Blocks / timeouts halve the rate (down to `min_rate`) and pause the host
+      for an exponentially growing, jittered backoff capped at `SLEEP_DURATION`.
+    """
+
+    def __init__(self, host: str, initial_rate: float, min_rate: float, max_rate: float):
+        self.host = host
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.capacity = max(1.0, max_rate)
+        self.tokens = 1.0
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_failures = 0
+
+        self.waiting = 0
+        self.counts: Dict[str, int] = {OUTCOME_OK: 0, OUTCOME_BLOCKED: 0, OUTCOME_TIMEOUT: 0, OUTCOME_ERROR: 0}
+        self.total_wait_s = 0.0
+        self.cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds waited."""
+        start = time.monotonic()
+        with self.cond:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self.blocked_until:
+                        self.cond.wait(self.blocked_until - now)
+                        continue
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        break
+                    self.cond.wait((1.0 - self.tokens) / self.rate)
+                waited = time.monotonic() - start
+                self.total_wait_s += waited
+            finally:
+                self.waiting -= 1
+        return waited
+
+    def report(self, outcome: str) -> float:
+        """Adjust the rate for a request outcome; returns the backoff applied (s)."""
+        with self.cond:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+            if outcome == OUTCOME_OK:
+                self.consecutive_failures = 0
+                self.rate = min(self.max_rate, self.rate + RATE_LIMIT_INCREASE)
+                return 0.0
+            if outcome not in (OUTCOME_BLOCKED, OUTCOME_TIMEOUT):
+                return 0.0
+
+            self.consecutive_failures += 1
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            backoff = min(SLEEP_DURATION, RATE_LIMIT_BACKOFF_BASE * 2 ** (self.consecutive_failures - 1))
+            backoff *= random.uniform(0.5, 1.5)
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + backoff)
+            self.tokens = 0.0
+            self.updated_at = now
+            self.cond.notify_all()
+            return backoff
+
+    def metrics(self) -> Dict[str, float]:
+        with self.cond:
+            total = sum(self.counts.values())
+            failures = self.counts[OUTCOME_BLOCKED] + self.counts[OUTCOME_TIMEOUT]
+            return {
+                "rate": round(self.rate, 3),
+                "requests": total,
+                "block_rate": round(failures / total, 4) if total else 0.0,
+                "queue_depth": self.waiting,
+                "wait_s": round(self.total_wait_s, 2),
+            }
+
+
+class RateLimiter:
+    """Process-wide registry of per-host token buckets shared by all extractors."""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float, float]]] = None):
+        self.limits = dict(RATE_LIMITS if limits is None else limits)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, HostBucket] = {}
+
+    def bucket(self, url: str) -> HostBucket:
+        host = host_key(url)
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                initial, lo, hi = self.limits.get(host, RATE_LIMIT_DEFAULT)
+                b = self._buckets[host] = HostBucket(host, initial, lo, hi)
+            return b
+
+    def acquire(self, url: str) -> float:
+        """Wait for permission to request `url`; returns seconds waited."""
+        return self.bucket(url).acquire()
+
+    def report(self, url: str, outcome: str) -> None:
+        """Feed back the outcome of a request to `url`."""
+        b = self.bucket(url)
+        backoff = b.report(outcome)
+        if backoff:
+            self.logger.warning(
+                f"{b.host}: {outcome}; backing off {backoff:.1f}s, rate now {b.rate:.2f} req/s"
+            )
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-host current rate, block rate, queue depth and cumulative wait."""
+        with self._lock:
+            buckets = list(self._buckets.values())
+        return {b.host: b.metrics() for b in buckets}
+
+    def summary(self) -> str:
+        return "; ".join(
+            f"{host} rate={m['rate']}/s reqs={m['requests']} block_rate={m['block_rate']:.1%} "
+            f"queue={m['queue_depth']} wait={m['wait_s']}s"
+            for host, m in self.metrics().items()
+        ) or "no requests"
+
+
+_LIMITER: Optional[RateLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = RateLimiter()
+        return _LIMITER
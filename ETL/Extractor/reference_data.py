@@ -0,0 +1,190 @@
+import time
+import logging
+import threading
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from constants import REFDATA_CHECK_INTERVAL
+
+# One row: a "rows:stamp" version per section, cheap enough to run before every use
+_VERSION_SQL = """
+    SELECT (SELECT COUNT(*) || ':' || NVL(SUM(ora_hash(match_id || '|' || NVL(set_score, '') || '|'
+                   || NVL(stats_url, '') || '|' || NVL(to_skip, ''))), 0)
+            FROM match_scores_adjustments),
+           (SELECT COUNT(*) || ':' || NVL(MAX(batch_id), 0) FROM atp_players),
+           (SELECT COUNT(*) || ':' || NVL(MAX(batch_id), 0) FROM atp_tournaments)
+    FROM dual
+"""
+_SECTIONS = ("adjustments", "players", "tournaments")
+
+_NO_HASH = -1  # Player without a delta_hash in `_player_hashes`
+
+
+class ReferenceData:
+    """
+    Process-wide cache of the reference data every extractor reads.
+
+    - adjustments : match_scores_adjustments as three match_id → value dicts
+                    (set_score, stats_url, to_skip), loaded in one query;
+    - players     : code → row index, with parallel url list and delta_hash array;
+    - tournaments : id → (year, code, url, start_dtm).
+
+    Each section carries a version stamp (row count + max batch_id, or a hash sum
+    for the adjustments). `refresh` re-reads the stamps at most every
+    REFDATA_CHECK_INTERVAL seconds (or right after `expire`) and reloads only the
+    sections whose stamp changed, so `runner.py all` loads everything once and
+    picks up what an earlier extractor's process step wrote.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._versions: Dict[str, Optional[str]] = {s: None for s in _SECTIONS}
+        self._checked_at = 0.0
+        self.stats: Dict[str, int] = {"checks": 0, "loads": 0, "hits": 0}
+
+        self.adjustments: Dict[str, Dict[str, str]] = {"set_score": {}, "stats_url": {}, "to_skip": {}}
+        self._player_index: Dict[str, int] = {}
+        self._player_urls: List[str] = []
+        self._player_hashes = array("q")
+        self._tournaments: Dict[str, Tuple[int, str, str, Any]] = {}
+
+    # ------------------------------ Versioning ------------------------------
+
+    def refresh(self, con) -> "ReferenceData":
+        """Reload the sections whose version stamp changed since they were loaded."""
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at and now - self._checked_at < REFDATA_CHECK_INTERVAL:
+                self.stats["hits"] += 1
+                return self
+            cur = con.cursor()
+            try:
+                versions = dict(zip(_SECTIONS, (str(v) for v in cur.execute(_VERSION_SQL).fetchone())))
+            finally:
+                cur.close()
+            self.stats["checks"] += 1
+            for section in _SECTIONS:
+                if versions[section] != self._versions[section]:
+                    start = time.perf_counter()
+                    size = getattr(self, f"_load_{section}")(con)
+                    self._versions[section] = versions[section]
+                    self.stats["loads"] += 1
+                    self.logger.info(
+                        f"Reference data: {section} loaded ({size} rows, {time.perf_counter() - start:.2f}s)"
+                    )
+                else:
+                    self.stats["hits"] += 1
+            self._checked_at = time.monotonic()
+            return self
+
+    def expire(self) -> None:
+        """Force the next `refresh` to re-read the version stamps (e.g. after process steps)."""
+        with self._lock:
+            self._checked_at = 0.0
+
+    # ------------------------------- Loaders --------------------------------
+
+    @staticmethod
+    def _rows(con, sql: str) -> Iterator[Tuple]:
+        cur = con.cursor()
+        try:
+            cur.arraysize = 5000
+            yield from cur.execute(sql)
+        finally:
+            cur.close()
+
+    def _load_adjustments(self, con) -> int:
+        adjustments: Dict[str, Dict[str, str]] = {"set_score": {}, "stats_url": {}, "to_skip": {}}
+        n = 0
+        for match_id, set_score, stats_url, to_skip in self._rows(
+            con, "SELECT match_id, set_score, stats_url, to_skip FROM match_scores_adjustments"
+        ):
+            n += 1
+            for column, value in (("set_score", set_score), ("stats_url", stats_url), ("to_skip", to_skip)):
+                if value is not None:
+                    adjustments[column][str(match_id)] = str(value)
+        self.adjustments = adjustments
+        return n
+
+    def _load_players(self, con) -> int:
+        index: Dict[str, int] = {}
+        urls: List[str] = []
+        hashes = array("q")
+        for code, url, delta_hash in self._rows(con, "SELECT code, url, delta_hash FROM atp_players"):
+            index[code] = len(urls)
+            urls.append(url)
+            hashes.append(_NO_HASH if delta_hash is None else int(delta_hash))
+        self._player_index, self._player_urls, self._player_hashes = index, urls, hashes
+        return len(urls)
+
+    def _load_tournaments(self, con) -> int:
+        self._tournaments = {
+            tid: (int(year), code, url, start_dtm)
+            for tid, year, code, url, start_dtm in self._rows(
+                con, "SELECT id, year, code, url, start_dtm FROM atp_tournaments"
+            )
+        }
+        return len(self._tournaments)
+
+    # ------------------------------- Lookups --------------------------------
+
+    def adjustment_map(self, column: str) -> Dict[str, str]:
+        """match_id → `column` value of match_scores_adjustments (non-null only)."""
+        return self.adjustments[column]
+
+    def known_player(self, code: str) -> bool:
+        return code in self._player_index
+
+    def player_url(self, code: str) -> Optional[str]:
+        i = self._player_index.get(code)
+        return None if i is None else self._player_urls[i]
+
+    def player_hashes(self) -> Iterator[Tuple[str, int]]:
+        """(code, delta_hash) of every player that has one."""
+        hashes = self._player_hashes
+        return ((code, hashes[i]) for code, i in self._player_index.items() if hashes[i] != _NO_HASH)
+
+    def tournament(self, tournament_id: str) -> Optional[Tuple[int, str, str, Any]]:
+        """(year, code, url, start_dtm) of a known tournament."""
+        return self._tournaments.get(tournament_id)
+
+    def summary(self) -> str:
+        with self._lock:
+            return (
+                f"checks={self.stats['checks']} loads={self.stats['loads']} hits={self.stats['hits']} "
+                f"adjustments={sum(len(d) for d in self.adjustments.values())} "
+                f"players={len(self._player_urls)} tournaments={len(self._tournaments)}"
+            )
+
+
+_REFDATA: Optional[ReferenceData] = None
+_REFDATA_LOCK = threading.Lock()
+
+
+def get_reference_data(con) -> ReferenceData:
+    """Return the process-wide reference data, refreshed through `con` if its stamps are due."""
+    global _REFDATA
+    with _REFDATA_LOCK:
+        if _REFDATA is None:
+            _REFDATA = ReferenceData()
+        refdata = _REFDATA
+    return refdata.refresh(con)
+
+
+def expire_reference_data() -> None:
+    """Make the next `get_reference_data` re-check the version stamps."""
+    with _REFDATA_LOCK:
+        if _REFDATA is not None:
+            _REFDATA.expire()
+
+
+def close_reference_data() -> Optional[str]:
+    """Drop the process-wide cache; returns its final metrics summary (if any)."""
+    global _REFDATA
+    with _REFDATA_LOCK:
+        if _REFDATA is None:
+            return None
+        summary = _REFDATA.summary()
+        _REFDATA = None
+        return summary
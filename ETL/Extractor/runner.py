@@ -9,12 +9,29 @@ Examples:
   python etl_runner.py tournaments --year 2025
   python etl_runner.py players --year 2024
   python etl_runner.py all --year 2023
+  python etl_runner.py all --pipeline
+  python etl_runner.py all --years 2019-2024 --jobs 3
+  python etl_runner.py matches --year 2023 --record ./archives/matches_2023.zip
+  python etl_runner.py matches --year 2023 --replay ./archives/matches_2023.zip
+  python etl_runner.py matches --year 2023 --replay ./archives/matches_2023.zip --storage local
 
 Notes:
 - Tournaments default year: current year if not provided.
 - Players/Matches/Stats default year: None (extractor decides).
 - Tries to call .load() / .run() / .extract() in that order.
 - Adds common repo paths to sys.path to make imports robust.
+- --record writes every fetched page (and discovery worklist) to a zip archive;
+  --replay parses from that archive with no network and no DB (nothing is loaded).
+- --storage local stages and processes into an embedded SQLite database built
+  from ETL/SQL (no Oracle container); with --replay the rows are loaded locally.
+- all --pipeline overlaps each extractor's stored procedures (run in the background
+  on its own session, one at a time and in the usual order) with the next
+  extractor's fetch phase; MATCHES waits for TOURNAMENTS' procedures and STATS for
+  MATCHES' before discovering their work.
+- all --jobs/--years runs a DAG per year, TOURNAMENTS → MATCHES → {PLAYERS, STATS},
+  with up to --jobs extractors at once across all years. Extractors sharing a
+  staging table (MATCHES and STATS: stg_matches) never run at the same time.
+  A failed node is retried (RUNNER_RETRIES) and its dependents are skipped.
 """
 
 import argparse
@@ -22,8 +39,9 @@ import inspect
 import sys
 import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # ---- make imports robust whether you run from repo root or subfolder ----
 from pathlib import Path
@@ -64,21 +82,34 @@ StatsATPExtractor = (
     or import_or_none("StatsATPExtractor", "StatsATPExtractor")
 )
 
+warm_driver_pool = import_or_none("driver_pool", "warm_driver_pool")
+close_driver_pool = import_or_none("driver_pool", "close_driver_pool")
+open_storage = import_or_none("storage", "open_storage")
+close_storage = import_or_none("storage", "close_storage")
+open_archive = import_or_none("page_archive", "open_archive")
+close_archive = import_or_none("page_archive", "close_archive")
+close_reference_data = import_or_none("reference_data", "close_reference_data")
+close_score_cache = import_or_none("score_parser", "close_score_cache")
+
+from constants import DB_POOL_MAX, RUNNER_JOBS, RUNNER_RETRIES, RUNNER_RETRY_BACKOFF
+
 # ---- utils ----------------------------------------------------------------
 def log(msg: str) -> None:
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{ts}] {msg}", flush=True)
 
-def build_instance(cls: Any, year: Optional[str]):
+def build_instance(cls: Any, year: Optional[str], **options: Any):
     """Instantiate extractor.
     Passes `year` only if the constructor accepts it, otherwise instantiates with no args.
+    Extra keyword `options` (e.g. backfill=True) are passed only if the constructor accepts them.
     """
     if cls is None:
         return None
     try:
         sig = inspect.signature(cls)
         if "year" in sig.parameters:
-            return cls(year)
+            kwargs = {k: v for k, v in options.items() if k in sig.parameters}
+            return cls(year, **kwargs)
         # if it accepts *args/**kwargs, still pass year as positional
         params = sig.parameters.values()
         if any(p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD) for p in params):
@@ -91,8 +122,63 @@ def build_instance(cls: Any, year: Optional[str]):
         except Exception:
             raise
 
-def run_component(tag: str, cls: Any, year: Optional[str]) -> bool:
-    """Run a single extractor class with detailed prints and timing."""
+class DbPipeline:
+    """
+    Background DB post-processing for `all --pipeline`.
+
+    An extractor hands its process phase to `submit` once its rows are staged
+    (see BaseExtractor.extract); a single worker thread runs these phases one at
+    a time, in submission order, on each extractor's own session. `wait(tag)`
+    blocks until a component's procedures have finished, which is how a
+    component whose discovery reads their output is held back.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+        self._futures: Dict[str, Future] = {}
+        self.db_seconds = 0.0
+
+    def submit(self, fn) -> Future:
+        def timed():
+            start = time.time()
+            ok = fn()
+            return ok, time.time() - start
+        return self._executor.submit(timed)
+
+    def track(self, tag: str, future: Future) -> None:
+        self._futures[tag] = future
+
+    def wait(self, *tags: str) -> bool:
+        """Block until the process phases of `tags` are done; False if any failed."""
+        ok = True
+        for tag in tags:
+            future = self._futures.pop(tag, None)
+            if future is None:
+                continue
+            if not future.done():
+                log(f"{tag}: waiting for DB processing ...")
+            try:
+                done, seconds = future.result()
+            except Exception as e:
+                done, seconds = False, 0.0
+                log(f"[ERROR] {tag} DB processing raised: {e}")
+            self.db_seconds += seconds
+            log(f"=== {tag}: DB {'DONE' if done else 'FAILED'} in {seconds:.2f}s ===")
+            ok &= done
+        return ok
+
+    def close(self) -> bool:
+        ok = self.wait(*list(self._futures))
+        self._executor.shutdown()
+        return ok
+
+def run_component(tag: str, cls: Any, year: Optional[str], pipeline: Optional[DbPipeline] = None,
+                  **options: Any) -> bool:
+    """Run a single extractor class with detailed prints and timing.
+
+    With a `pipeline`, an extractor whose .extract() accepts one returns once its
+    rows are staged; its DB processing is tracked by the pipeline under `tag`.
+    """
     log(f"=== {tag}: START ===")
     if cls is None:
         log(f"[WARN] {tag}: extractor class not found. Verify file & class names.")
@@ -101,14 +187,19 @@ def run_component(tag: str, cls: Any, year: Optional[str]) -> bool:
     start = time.time()
     try:
         log(f"{tag}: resolving instance (year={year}) ...")
-        inst = build_instance(cls, year)
+        inst = build_instance(cls, year, **options)
         log(f"{tag}: instance -> {inst.__class__.__name__}")
 
         # try common method names in order
+        result = None
         for m in ("load", "run", "extract", "execute"):
             if hasattr(inst, m) and callable(getattr(inst, m)):
                 log(f"{tag}: calling .{m}() ...")
-                getattr(inst, m)()
+                method = getattr(inst, m)
+                if pipeline is not None and "pipeline" in inspect.signature(method).parameters:
+                    result = method(pipeline=pipeline)
+                else:
+                    result = method()
                 break
         else:
             raise AttributeError(
@@ -116,7 +207,14 @@ def run_component(tag: str, cls: Any, year: Optional[str]) -> bool:
             )
 
         elapsed = time.time() - start
-        log(f"=== {tag}: DONE in {elapsed:.2f}s ===")
+        if result is False:
+            log(f"[ERROR] {tag} failed after {elapsed:.2f}s (see its log file)")
+            return False
+        if isinstance(result, Future):
+            pipeline.track(tag, result)
+            log(f"=== {tag}: STAGED in {elapsed:.2f}s (DB processing in background) ===")
+        else:
+            log(f"=== {tag}: DONE in {elapsed:.2f}s ===")
         return True
 
     except Exception as e:
@@ -125,7 +223,130 @@ def run_component(tag: str, cls: Any, year: Optional[str]) -> bool:
         traceback.print_exc()
         return False
 
+# ---- DAG scheduler ----------------------------------------------------------
+class Node:
+    """One extractor run (component x year) of the `all` DAG."""
+
+    def __init__(self, key: str, cls: Any, year: Optional[str], deps: Tuple[str, ...], staging: str):
+        self.key = key            # e.g. 'MATCHES:2023' ('MATCHES' for the default scope)
+        self.cls = cls
+        self.year = year
+        self.deps = deps          # keys of nodes that must succeed first
+        self.staging = staging    # staging table; one node per table at a time
+        self.status = "pending"   # pending | running | done | failed | skipped
+        self.attempts = 0
+        self.seconds = 0.0
+
+# component → (class, staging table, components it depends on), in priority order
+DAG_COMPONENTS = (
+    ("TOURNAMENTS", TournamentsATPExtractor, "stg_tournaments", ()),
+    ("MATCHES",     MatchesATPExtractor,     "stg_matches",     ("TOURNAMENTS",)),
+    ("PLAYERS",     PlayersATPExtractor,     "stg_players",     ("MATCHES",)),
+    ("STATS",       StatsATPExtractor,       "stg_matches",     ("MATCHES",)),
+)
+
+def build_dag(years: List[Optional[str]]) -> List[Node]:
+    """
+    Nodes for every year in list order (the scheduler's priority order).
+    A None year is the default scope: tournaments of the current year, other
+    components decide their own window.
+    """
+    def key(tag: str, year: Optional[str]) -> str:
+        return f"{tag}:{year}" if year else tag
+
+    nodes = []
+    for year in years:
+        for tag, cls, staging, deps in DAG_COMPONENTS:
+            node_year = year or (str(datetime.today().year) if tag == "TOURNAMENTS" else None)
+            nodes.append(Node(key(tag, year), cls, node_year, tuple(key(d, year) for d in deps), staging))
+    return nodes
+
+def run_node(node: Node, retries: int) -> bool:
+    """Run a node with retries; each retry resumes from the extractor's checkpoint journal."""
+    start = time.time()
+    try:
+        while True:
+            node.attempts += 1
+            if run_component(node.key, node.cls, node.year):
+                return True
+            if node.attempts > retries:
+                return False
+            delay = RUNNER_RETRY_BACKOFF * node.attempts
+            log(f"{node.key}: retry {node.attempts}/{retries} in {delay}s ...")
+            time.sleep(delay)
+    finally:
+        node.seconds = time.time() - start
+
+def run_dag(nodes: List[Node], jobs: int, retries: int) -> bool:
+    """
+    Run `nodes` with at most `jobs` at once. A node starts when its dependencies
+    succeeded and no running node uses its staging table; ready nodes start in
+    list order. Dependents of a failed node are skipped.
+    """
+    by_key = {n.key: n for n in nodes}
+    running: Dict[Future, Node] = {}
+    busy_staging = set()
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="node") as pool:
+        while True:
+            for node in nodes:
+                if node.status != "pending":
+                    continue
+                dep_status = {by_key[d].status for d in node.deps if d in by_key}
+                if dep_status & {"failed", "skipped"}:
+                    node.status = "skipped"
+                    log(f"{node.key}: skipped (a dependency failed)")
+                    continue
+                if dep_status - {"done"} or node.staging in busy_staging or len(running) >= jobs:
+                    continue
+                node.status = "running"
+                busy_staging.add(node.staging)
+                running[pool.submit(run_node, node, retries)] = node
+
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                node = running.pop(future)
+                busy_staging.discard(node.staging)
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    log(f"[ERROR] {node.key}: {e}")
+                    ok = False
+                node.status = "done" if ok else "failed"
+
+    log(f"DAG finished in {time.time() - start:.2f}s with jobs={jobs}:")
+    for node in nodes:
+        log(f"  {node.key:<20} {node.status:<8} attempts={node.attempts} {node.seconds:8.2f}s")
+    return all(n.status == "done" for n in nodes)
+
+def parse_years(spec: str) -> List[str]:
+    """'2019-2024' or '2019,2021,2023' → list of years (as strings)."""
+    years: List[str] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = (int(x) for x in part.split("-", 1))
+            years.extend(str(y) for y in range(first, last + 1))
+        elif part:
+            years.append(str(int(part)))
+    return years
+
 # ---- CLI ------------------------------------------------------------------
+def add_archive_args(p: argparse.ArgumentParser) -> None:
+    """Add the mutually exclusive --record / --replay options to a sub-command."""
+    g = p.add_mutually_exclusive_group()
+    g.add_argument("--record", type=str, default=None, metavar="ARCHIVE",
+                   help="Record fetched pages and worklists into ARCHIVE (.zip)")
+    g.add_argument("--replay", type=str, default=None, metavar="ARCHIVE",
+                   help="Parse from ARCHIVE only: no network, no DB load")
+
+def add_storage_args(p: argparse.ArgumentParser) -> None:
+    """Add the --storage option (defaults to STORAGE_BACKEND in constants.py)."""
+    p.add_argument("--storage", choices=("oracle", "local"), default=None,
+                   help="Storage backend: Oracle XE or the embedded local database")
+
 def make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="etl_runner",
@@ -144,20 +365,55 @@ def make_parser() -> argparse.ArgumentParser:
 
     p4 = sub.add_parser("stats", help="Run StatsATPExtractor")
     p4.add_argument("--year", type=str, default=None, help="Year (optional)")
+    p4.add_argument("--backfill", action="store_true",
+                    help="Process every match missing stats for --year (no row cap), loading in chunks")
 
     p5 = sub.add_parser("all", help="Run all extractors in sequence")
     p5.add_argument("--year", type=str, default=None, help="Year for all (tournaments defaults to current year if omitted)")
+    mode = p5.add_mutually_exclusive_group()
+    mode.add_argument("--pipeline", action="store_true",
+                      help="Run each extractor's stored procedures in the background while the next one fetches")
+    mode.add_argument("--jobs", type=int, default=None,
+                      help=f"Run the DAG scheduler with up to JOBS extractors at once (default {RUNNER_JOBS})")
+    p5.add_argument("--years", type=str, default=None,
+                    help="Multi-year fan-out for the DAG scheduler, e.g. 2019-2024 or 2019,2021")
+
+    for p in (p1, p2, p3, p4, p5):
+        add_archive_args(p)
+        add_storage_args(p)
     return parser
 
 def main():
     parser = make_parser()
     args = parser.parse_args()
+    if getattr(args, "pipeline", False) and getattr(args, "years", None):
+        parser.error("--years runs the DAG scheduler and cannot be combined with --pipeline")
 
     log("Bootstrapping ETL runner ...")
     log(f"Command: {args.cmd} | Year: {getattr(args, 'year', None)}")
 
     ok_all = True
 
+    if args.replay or args.record:
+        if open_archive is None:
+            log("[ERROR] page_archive module not available; cannot record/replay.")
+            sys.exit(1)
+        mode, path = ("replay", args.replay) if args.replay else ("record", args.record)
+        open_archive(path, mode)
+        log(f"Archive mode: {mode} ({path})")
+
+    if args.storage:
+        if open_storage is None:
+            log("[ERROR] storage module not available; cannot select a backend.")
+            sys.exit(1)
+        open_storage(args.storage)
+        log(f"Storage backend: {args.storage}")
+
+    # Live runs fall back to Chrome for challenge/JS pages: start the drivers
+    # while the first pages go through plain HTTP (a replay never needs them)
+    if warm_driver_pool is not None and not args.replay:
+        warm_driver_pool()
+
     if args.cmd == "tournaments":
         year = args.year or str(datetime.today().year)
         ok_all &= run_component("TOURNAMENTS", TournamentsATPExtractor, year)
@@ -169,18 +425,57 @@ def main():
         ok_all &= run_component("MATCHES", MatchesATPExtractor, args.year)
 
     elif args.cmd == "stats":
-        ok_all &= run_component("STATS", StatsATPExtractor, args.year)
+        ok_all &= run_component("STATS", StatsATPExtractor, args.year, backfill=args.backfill)
 
     elif args.cmd == "all":
         # tournaments gets current year by default if not provided
         year_tour = args.year or str(datetime.today().year)
         year_other = args.year  # may be None → extractor decides
 
-        log("Running ALL components in order: TOURNAMENTS → PLAYERS → MATCHES → STATS")
-        ok_all &= run_component("TOURNAMENTS", TournamentsATPExtractor, year_tour)
-        ok_all &= run_component("PLAYERS",     PlayersATPExtractor,     year_other)
-        ok_all &= run_component("MATCHES",     MatchesATPExtractor,     year_other)
-        ok_all &= run_component("STATS",       StatsATPExtractor,       year_other)
+        if args.jobs is not None or args.years:
+            years = parse_years(args.years) if args.years else [args.year]
+            jobs = max(1, min(args.jobs or RUNNER_JOBS, DB_POOL_MAX))
+            log(f"Running ALL components as a DAG (TOURNAMENTS → MATCHES → {{PLAYERS, STATS}}) "
+                f"for {', '.join(y or 'default scope' for y in years)} with jobs={jobs}")
+            ok_all &= run_dag(build_dag(years), jobs, RUNNER_RETRIES)
+        elif args.pipeline:
+            log("Running ALL components pipelined: TOURNAMENTS → PLAYERS → MATCHES → STATS "
+                "(DB processing overlaps the next fetch phase)")
+            pipeline = DbPipeline()
+            start = time.time()
+            ok_all &= run_component("TOURNAMENTS", TournamentsATPExtractor, year_tour, pipeline)
+            ok_all &= run_component("PLAYERS",     PlayersATPExtractor,     year_other, pipeline)
+            # MATCHES discovers its pages from atp_tournaments
+            ok_all &= pipeline.wait("TOURNAMENTS")
+            ok_all &= run_component("MATCHES",     MatchesATPExtractor,     year_other, pipeline)
+            # STATS discovers its pages from atp_matches and reuses stg_matches
+            ok_all &= pipeline.wait("MATCHES")
+            ok_all &= run_component("STATS",       StatsATPExtractor,       year_other, pipeline)
+            ok_all &= pipeline.close()
+            log(f"Pipelined run: {time.time() - start:.2f}s wall clock, {pipeline.db_seconds:.2f}s of DB processing")
+        else:
+            log("Running ALL components in order: TOURNAMENTS → PLAYERS → MATCHES → STATS")
+            ok_all &= run_component("TOURNAMENTS", TournamentsATPExtractor, year_tour)
+            ok_all &= run_component("PLAYERS",     PlayersATPExtractor,     year_other)
+            ok_all &= run_component("MATCHES",     MatchesATPExtractor,     year_other)
+            ok_all &= run_component("STATS",       StatsATPExtractor,       year_other)
+
+    if close_driver_pool is not None:
+        close_driver_pool()
+    if close_reference_data is not None:
+        refdata_summary = close_reference_data()
+        if refdata_summary:
+            log(f"Reference data: {refdata_summary}")
+    if close_score_cache is not None:
+        score_cache_summary = close_score_cache()
+        if score_cache_summary:
+            log(f"Score cache: {score_cache_summary}")
+    if close_storage is not None:
+        db_summary = close_storage()
+        if db_summary:
+            log(db_summary)
+    if close_archive is not None:
+        close_archive()
 
     log("ETL runner finished.")
     if ok_all:
@@ -1,5 +1,8 @@
 # matches_atp_score_updater_extractor.py
-from matches_base_extractor import MatchesBaseExtractor
+from MatchesBaseExtractor import MatchesBaseExtractor
+from score_parser import SCORE_COLUMNS
+from typing import Any, List
+import cx_Oracle
 import os
 
 
@@ -8,11 +11,21 @@ class MatchesATPScoreUpdaterExtractor(MatchesBaseExtractor):
     Extractor that validates and (re)writes match scores into the staging table.
 
     Workflow:
-      1) Pull the list of matches (for a given year) from VW_MATCHES.
-      2) Normalize/validate the textual score into structured fields using _parse_score.
-      3) Upsert (MERGE) the result into STG_MATCHES:
+      1) Pull the list of matches (for a given year) from VW_MATCHES, with the
+         score fields persisted in ATP_MATCHES.
+      2) Normalize/validate the textual scores into structured fields in one batch (parse_scores).
+      3) Keep only the matches whose score text (after adjustments) or parsed
+         fields differ from the persisted ones.
+      4) Per chunk: array-load the results into the TMP_MATCH_SCORES global
+         temporary table and run one set-based MERGE into STG_MATCHES:
          - Update score-related fields if the row exists.
          - Insert a new row with score fields if it does not exist.
+
+    Changes are detected against ATP_MATCHES, not against STG_MATCHES (which
+    MatchesATPExtractor truncates), so a changed match is merged again on every
+    run until the matches process step has persisted it.
+    Oracle only: the chunk insert and the MERGE must share one transaction
+    (TMP_MATCH_SCORES rows vanish on commit), which StorageBackend.load does not offer.
     """
 
     def __init__(self, year: int):
@@ -29,26 +42,26 @@ class MatchesATPScoreUpdaterExtractor(MatchesBaseExtractor):
         """
         Configure logging, staging target, SQL and post-process hooks.
         """
+        if self._storage.name != 'oracle':
+            raise RuntimeError(f'{type(self).__name__} needs the oracle storage backend, not {self._storage.name!r}')
         os.makedirs("./logs", exist_ok=True)
         self.LOGFILE_NAME = f'./logs/{os.path.splitext(os.path.basename(__file__))[0]}.log'
         self.CSVFILE_NAME = ''  # No CSV dump for this updater
-        self.TABLE_NAME = 'stg_matches'
-        # Oracle MERGE to idempotently upsert only score-related columns.
+        # Chunks are array-loaded into a global temporary table (rows vanish on commit)
+        self.TABLE_NAME = 'tmp_match_scores'
         self.INSERT_STR = """
+            INSERT INTO tmp_match_scores (
+                id, score, match_ret,
+                winner_sets_won, winner_games_won, winner_tiebreaks_won,
+                loser_sets_won,  loser_games_won,  loser_tiebreaks_won
+            ) VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9)
+        """
+        num = cx_Oracle.DB_TYPE_NUMBER
+        self.INSERT_TYPES = [64, 32, 10, num, num, num, num, num, num]
+        # One set-based MERGE per chunk to idempotently upsert only score-related columns.
+        self.MERGE_STR = """
             MERGE INTO stg_matches tgt
-            USING (
-                SELECT
-                    :1 AS id,
-                    :2 AS score,
-                    :3 AS match_ret,
-                    :4 AS winner_sets_won,
-                    :5 AS winner_games_won,
-                    :6 AS winner_tiebreaks_won,
-                    :7 AS loser_sets_won,
-                    :8 AS loser_games_won,
-                    :9 AS loser_tiebreaks_won
-                FROM dual
-            ) src
+            USING tmp_match_scores src
             ON (tgt.id = src.id)
             WHEN MATCHED THEN UPDATE SET
                 tgt.score                 = src.score,
@@ -80,28 +93,67 @@ class MatchesATPScoreUpdaterExtractor(MatchesBaseExtractor):
         Main extraction step:
           - Load candidate matches list.
           - Preload score adjustments dictionaries.
-          - Validate/normalize each score and build the MERGE parameter rows.
+          - Validate/normalize the scores in one batch and build the MERGE
+            parameter rows of the changed matches, loading them chunk by chunk.
         """
         self._fill_matches_list()
         self._fill_dic_match_scores_adj()  # Optional manual fixes/overrides
 
-        for match_tpl in self._matches_list:
-            self._check_match_score(match_tpl)
+        rows = self._check_match_scores(self._matches_list)
+        self.logger.info(f'{len(rows)} changed score(s), {len(self._matches_list) - len(rows)} unchanged')
+        for row in rows:
+            self.data.append(row)
+            self._flush_rows()
+
+    def _load_to_stg(self) -> None:
+        """
+        Array-load the buffered rows into TMP_MATCH_SCORES and apply them to
+        STG_MATCHES with a single MERGE, in one transaction (on the Oracle
+        session directly: see the class docstring).
+        """
+        if not self.data:
+            return
+        _, input_sizes = self._compile_insert()
+        cur = None
+        try:
+            self._connect_to_db()
+            cur = self.con.cursor()
+            cur.setinputsizes(*input_sizes)
+            cur.executemany(self.INSERT_STR, self.data, batcherrors=True)
+            for err in cur.getbatcherrors():
+                self.logger.error(f"[Row {err.offset}] {err.message.strip()}")
+                self.logger.info(f"Problematic row: {self.data[err.offset]}")
+            cur.execute(self.MERGE_STR)
+            merged = cur.rowcount
+            self.con.commit()
+            self.logger.info(f'{merged} score(s) merged into stg_matches')
+        except Exception:
+            self.con.rollback()
+            raise
+        finally:
+            if cur:
+                cur.close()
 
     def _fill_matches_list(self) -> None:
         """
-        Fetches the list of matches to check/update for the configured season.
+        Fetches the list of matches to check/update for the configured season,
+        with the score fields persisted in ATP_MATCHES (in SCORE_COLUMNS order).
         Source: VW_MATCHES (excluding Davis Cup).
         """
         cur = None
         try:
             cur = self.con.cursor()
             sql = """
-                SELECT id, tournament_code, score
-                FROM vw_matches
-                WHERE tournament_year = :year
-                  AND series_id != 'dc'
-                ORDER BY tournament_start_dtm, tournament_code, stadie_ord
+                SELECT v.id, v.tournament_code, v.score,
+                       m.score, m.match_ret,
+                       m.winner_sets_won, m.loser_sets_won,
+                       m.winner_games_won, m.loser_games_won,
+                       m.winner_tiebreaks_won, m.loser_tiebreaks_won
+                FROM vw_matches v
+                LEFT JOIN atp_matches m ON m.id = v.id
+                WHERE v.tournament_year = :year
+                  AND v.series_id != 'dc'
+                ORDER BY v.tournament_start_dtm, v.tournament_code, v.stadie_ord
             """
             self._matches_list = cur.execute(sql, {'year': self.year}).fetchall()
             self.logger.info(f'Checking {len(self._matches_list)} matches for year {self.year}')
@@ -109,32 +161,44 @@ class MatchesATPScoreUpdaterExtractor(MatchesBaseExtractor):
             if cur:
                 cur.close()
 
-    def _check_match_score(self, tpl: tuple) -> None:
+    def _check_match_scores(self, matches: List[tuple]) -> List[list]:
         """
-        Normalize and validate a single textual score, producing the MERGE payload.
+        Normalize and validate the season's textual scores in one batch
+        (`parse_scores`), producing the MERGE payload rows of the matches whose
+        score text or parsed fields differ from the persisted ones.
 
-        :param tpl: (match_id, tournament_code, score_text)
+        :param matches: [(match_id, tournament_code, score_text, persisted score, *persisted SCORE_COLUMNS)]
         """
-        match_id, tournament_code, match_score = tpl
-
-        try:
+        match_ids, codes, scores = [], [], []
+        for match_id, tournament_code, match_score, *_ in matches:
             # Apply manual adjustments if present
             if match_id in self._dic_match_scores_adj:
                 match_score = self._dic_match_scores_adj[match_id]
                 self.logger.warning(f'Adjustment applied for match_id={match_id}: score="{match_score}"')
-
-            scores_arr = self._parse_score(match_score, match_id, tournament_code)
-            if not scores_arr:
-                self.logger.warning(
-                    f"⚠️ match_id={match_id}: could not parse score '{match_score}'"
-                )
-                return
-
-            # _parse_score returns:
-            # [match_ret, win_sets, los_sets, win_games, los_games, win_tb, los_tb]
-            # MERGE expects 9 binds in the exact order below.
-            row = [match_id, match_score] + scores_arr
-            self.data.append(row)
-
-        except Exception as exc:
-            self.logger.error(f"❌ match_id={match_id}: error parsing score '{match_score}': {exc}")
+            match_ids.append(match_id)
+            codes.append(tournament_code)
+            scores.append(match_score)
+
+        cols = self.parse_scores(scores, match_ids, codes)
+        computed = zip(scores, *(cols[c] for c in SCORE_COLUMNS))
+
+        # INSERT_STR expects 9 binds in the exact order below.
+        return [
+            [match_ids[i], scores[i], cols['match_ret'][i],
+             cols['winner_sets_won'][i], cols['winner_games_won'][i], cols['winner_tiebreaks_won'][i],
+             cols['loser_sets_won'][i], cols['loser_games_won'][i], cols['loser_tiebreaks_won'][i]]
+            for i, (tpl, new) in enumerate(zip(matches, computed))
+            if not all(map(self._same_value, tpl[3:], new))
+        ]
+
+    @staticmethod
+    def _same_value(persisted: Any, computed: Any) -> bool:
+        """Persisted vs recomputed score field (NULL and '' are equal, numbers compare by value)."""
+        if persisted in (None, '') or computed in (None, ''):
+            return persisted in (None, '') and computed in (None, '')
+        if isinstance(persisted, (int, float)) or isinstance(computed, (int, float)):
+            try:
+                return float(persisted) == float(computed)
+            except (TypeError, ValueError):
+                return False
+        return str(persisted) == str(computed)
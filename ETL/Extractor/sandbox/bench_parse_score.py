@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Equivalence check and benchmark of the score parsers:
+  - MatchesBaseExtractor.parse_score_uncached (the branch chain, one row at a time)
+  - MatchesBaseExtractor.parse_score (one row at a time, through the score cache)
+  - MatchesBaseExtractor.parse_scores (score_parser.parse_scores_batch, columnar)
+
+Corpus (score, match_id, tournament_code), one of:
+  --db          every score in atp_matches (joined to atp_tournaments for the code)
+  --csv PATH    a CSV with score, match_id, tournament_code columns
+  (default)     a synthetic corpus of --rows rows mixing regular, NextGen, Grand Slam,
+                Olympic, Laver Cup, retired and malformed scores
+
+Every row's values must be identical to the uncached parser's, and the anomalies
+the other parsers collect (every example kept) must be the uncached parser's log
+records (level + message); otherwise the first differences are printed and the
+exit code is 1. Cached parsers start every run with an empty cache.
+
+Examples:
+  python bench_parse_score.py
+  python bench_parse_score.py --db --repeat 5
+  python bench_parse_score.py --csv scores.csv
+"""
+
+import argparse
+import csv
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from MatchesBaseExtractor import MatchesBaseExtractor  # noqa: E402
+from anomalies import AnomalySink  # noqa: E402
+from score_parser import close_score_cache, get_score_cache, parse_scores_batch, score_rows  # noqa: E402
+
+Corpus = Tuple[List[str], List[str], List[str]]
+
+_DB_SQL = """
+    SELECT m.score, m.id, t.code
+    FROM atp_matches m
+    JOIN atp_tournaments t ON t.id = m.tournament_id
+    ORDER BY m.id
+"""
+
+_WON = ["64", "63", "62", "61", "60", "75", "76", "761", "7610", "86", "2220", "108", "119"]
+_LOST = ["46", "36", "26", "16", "06", "57", "67", "671210", "68", "1618", "810"]
+_CODES = ["339", "404", "580", "560", "540", "520", "96", "7696", "9210", "605"]
+_ODD = ["W/O", "RET", "64 31 RET", "DEF", "43 34 43", "10[8]", "[10-7]", "66", "6", "64 6x",
+        "1111", "12345", "", None]
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records: List[Tuple[str, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append((record.levelname, record.getMessage()))
+
+
+def _logger(name: str, capture: bool) -> Tuple[logging.Logger, _Capture]:
+    logger = logging.getLogger(f"bench_parse_score.{name}")
+    logger.handlers.clear()
+    logger.propagate = False
+    handler = _Capture()
+    if capture:
+        logger.addHandler(handler)
+    else:
+        logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.DEBUG)
+    return logger, handler
+
+
+def synthetic_corpus(rows: int, seed: int = 7) -> Corpus:
+    rnd = random.Random(seed)
+    scores, ids, codes = [], [], []
+    for i in range(rows):
+        if rnd.random() < 0.05:
+            score = rnd.choice(_ODD)
+        else:
+            # Winner's sets plus fewer lost ones, mostly regular sets, in random order
+            to_win = rnd.choice((2, 2, 3))
+            sets = [rnd.choice(_WON[:7] if rnd.random() < 0.9 else _WON) for _ in range(to_win)]
+            sets += [rnd.choice(_LOST[:7] if rnd.random() < 0.9 else _LOST)
+                     for _ in range(rnd.randrange(to_win))]
+            rnd.shuffle(sets)
+            score = " ".join(sets)
+        scores.append(score)
+        ids.append(f"{2000 + i % 25}-{i}")
+        codes.append(rnd.choice(_CODES))
+    return scores, ids, codes
+
+
+def csv_corpus(path: str) -> Corpus:
+    scores, ids, codes = [], [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            scores.append(row["score"])
+            ids.append(row["match_id"])
+            codes.append(row["tournament_code"])
+    return scores, ids, codes
+
+
+def db_corpus() -> Corpus:
+    from storage import get_storage, close_storage
+    storage = get_storage()
+    con = storage.acquire()
+    scores, ids, codes = [], [], []
+    try:
+        cur = con.cursor()
+        cur.arraysize = 5000
+        for score, match_id, code in cur.execute(_DB_SQL):
+            scores.append(score)
+            ids.append(match_id)
+            codes.append(code)
+        cur.close()
+    finally:
+        storage.release(con)
+        close_storage()
+    return scores, ids, codes
+
+
+def scalar_parser(logger: logging.Logger, anomalies: AnomalySink) -> MatchesBaseExtractor:
+    """A MatchesBaseExtractor with just a logger and an anomaly sink: all parse_score needs."""
+    extractor = MatchesBaseExtractor.__new__(MatchesBaseExtractor)
+    extractor.logger = logger
+    extractor.anomalies = anomalies
+    return extractor
+
+
+def run_uncached(corpus: Corpus, logger: logging.Logger, anomalies: AnomalySink) -> Tuple[list, float]:
+    parser = scalar_parser(logger, anomalies)
+    start = time.perf_counter()
+    rows = [parser.parse_score_uncached(s, m, c) for s, m, c in zip(*corpus)]
+    return rows, time.perf_counter() - start
+
+
+def run_cached(corpus: Corpus, logger: logging.Logger, anomalies: AnomalySink) -> Tuple[list, float]:
+    parser = scalar_parser(logger, anomalies)
+    close_score_cache()
+    start = time.perf_counter()
+    rows = [parser.parse_score(s, m, c) for s, m, c in zip(*corpus)]
+    return rows, time.perf_counter() - start
+
+
+def run_batch(corpus: Corpus, logger: logging.Logger, anomalies: AnomalySink) -> Tuple[list, float]:
+    close_score_cache()
+    start = time.perf_counter()
+    cols = parse_scores_batch(*corpus, anomalies)
+    return score_rows(cols), time.perf_counter() - start
+
+
+PARSERS = (
+    ("parse_score_uncached", run_uncached),
+    ("parse_score", run_cached),
+    ("parse_scores", run_batch),
+)
+
+
+def _sink_records(anomalies: AnomalySink) -> List[Tuple[str, str]]:
+    return [
+        (anomalies.levels[kind].upper(), message)
+        for kind, messages in anomalies.examples.items()
+        for message in messages
+    ]
+
+
+def check(corpus: Corpus) -> bool:
+    """
+    Run every parser once and compare rows, and the uncached parser's log
+    records with the anomalies the others collect (every example kept).
+    """
+    ok = True
+    reference_log, reference_cap = _logger("reference", True)
+    expected, _ = run_uncached(corpus, reference_log, AnomalySink("bench"))
+    reference = sorted(reference_cap.records)
+    for name, fn in PARSERS[1:]:
+        logger, _ = _logger(name, True)
+        anomalies = AnomalySink("bench", samples=None)
+        actual, _ = fn(corpus, logger, anomalies)
+        bad_rows = [i for i, (a, b) in enumerate(zip(expected, actual)) if a != b]
+        for i in bad_rows[:10]:
+            print(f"{name} row {i}: score={corpus[0][i]!r} code={corpus[2][i]!r} "
+                  f"expected={expected[i]} got={actual[i]}")
+        records = sorted(_sink_records(anomalies))
+        same = reference == records
+        if not same:
+            for i, (a, b) in enumerate(zip(reference, records)):
+                if a != b:
+                    print(f"{name} anomaly {i}: expected={a} got={b}")
+                    break
+            print(f"{name} anomalies: expected={len(reference)} got={len(records)}")
+        print(f"{name:20s} rows: {len(actual)}  differing rows: {len(bad_rows)}  "
+              f"anomalies: {len(anomalies)} ({'same as logged' if same else 'DIFFERENT'})  "
+              f"cache: {get_score_cache().summary()}")
+        ok &= not bad_rows and len(expected) == len(actual) and same
+    return ok
+
+
+def bench(corpus: Corpus, repeat: int) -> None:
+    """
+    Best-of-`repeat` timings: the uncached parser logs every anomaly (records
+    built and discarded), the others collect them in a default AnomalySink.
+    """
+    n = len(corpus[0])
+    for name, fn in PARSERS:
+        logger, _ = _logger(name, False)
+        best = min(fn(corpus, logger, AnomalySink("bench"))[1] for _ in range(repeat))
+        print(f"{name:20s} {n / best:12,.0f} rows/s  ({best:.3f}s for {n} rows)")
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Check and benchmark the batch score parser against parse_score.")
+    src = p.add_mutually_exclusive_group()
+    src.add_argument("--db", action="store_true", help="Use every score in atp_matches")
+    src.add_argument("--csv", metavar="PATH", help="CSV with score, match_id, tournament_code columns")
+    p.add_argument("--rows", type=int, default=200_000, help="Synthetic corpus size (default: 200000)")
+    p.add_argument("--repeat", type=int, default=3, help="Timing runs per parser (best is reported)")
+    args = p.parse_args()
+
+    if args.db:
+        corpus = db_corpus()
+    elif args.csv:
+        corpus = csv_corpus(args.csv)
+    else:
+        corpus = synthetic_corpus(args.rows)
+
+    ok = check(corpus)
+    bench(corpus, args.repeat)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
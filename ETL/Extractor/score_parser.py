@@ -0,0 +1,535 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from anomalies import AnomalySink
+from constants import SCORE_CACHE_SIZE
+
+# Output columns of `parse_scores_batch`, in `MatchesBaseExtractor.parse_score` order
+SCORE_COLUMNS = (
+    "match_ret",
+    "winner_sets_won", "loser_sets_won",
+    "winner_games_won", "loser_games_won",
+    "winner_tiebreaks_won", "loser_tiebreaks_won",
+)
+
+# Tournament codes with their own score rules; every other code behaves the same
+NEXTGEN_CODE = "7696"
+GRAND_SLAM_CODES = ("580", "560", "540", "520")
+OLYMPICS_CODE = "96"
+LAVER_CUP_CODE = "9210"
+
+_CODE_CLASS = {NEXTGEN_CODE: "nextgen", OLYMPICS_CODE: "olympics", LAVER_CUP_CODE: "laver"}
+_CODE_CLASS.update((code, "gs") for code in GRAND_SLAM_CODES)
+
+_NEXTGEN_SMALL = ("40", "41", "42", "04", "14", "24")
+_BIG_SETS = ("86", "97", "68", "79")
+_WHITE_LIST = ("60", "61", "62", "63", "64", "75", "76", "06", "16", "26", "36", "46", "57", "67")
+_ALLOWED_SETS = {"30", "31", "32", "21", "20"}
+
+# (winner_sets, loser_sets, winner_games, loser_games, winner_tiebreaks, loser_tiebreaks)
+Deltas = Tuple[int, int, int, int, int, int]
+# (anomaly kind, level, text before match_id, text after match_id): see AnomalySink.record
+Diagnostic = Tuple[str, str, str, str]
+# Decoded set token: deltas, diagnostics in emission order (the ones ending in
+# '; all=' get the score's token list appended), parse error (or None)
+DecodedSet = Tuple[Deltas, Tuple[Diagnostic, ...], Optional[str]]
+# Decoded score: parse_score's seven values and the diagnostics it logs, in order
+ScoreEntry = Tuple[Tuple[Optional[Any], ...], Tuple[Diagnostic, ...]]
+
+_NO_VALUES = (None,) * 7
+
+
+def tournament_class(tournament_code: Any) -> str:
+    """'nextgen', 'gs', 'olympics', 'laver' or 'other': all `parse_score` distinguishes in a code."""
+    try:
+        return _CODE_CLASS.get(tournament_code, "other")
+    except TypeError:  # Unhashable code: matches none of the special ones
+        return "other"
+
+
+def get_match_ret(match_score: str) -> Optional[str]:
+    """
+    Detect retirement/walkover/weather flags from a raw score string.
+
+    Returns:
+        '(W/O)', '(RET)', '(WEA)' or None if the score looks like a played match.
+    """
+    s = (match_score or "").strip()
+    if not s:
+        return None
+
+    up = s.upper()
+    if "W/O" in up or "INV" in up or "WALKOVER" in up:
+        return "(W/O)"
+    if "WEA" in up:
+        return "(WEA)"
+    if "RE" in up or "RET" in up or "DEF" in up or "UNP" in up:
+        return "(RET)"
+    if "PLAYED AND UNFINISHED" in up or "PLAYED AND ABANDONED" in up or "UNFINISHED" in up:
+        return "(RET)"
+    return None
+
+
+def decode_set(set_score: str, code_class: str) -> DecodedSet:
+    """
+    Decode one set token the way `MatchesBaseExtractor.parse_score` does.
+
+    The result only depends on the token and the tournament code class.
+    Diagnostics are kept without the match id (and the score's token list), to
+    be completed per match when emitted; a parse error ends the match like the
+    scalar function's exception handler.
+    """
+    ws = ls = wg = lg = wt = lt = 0
+    diags: List[Diagnostic] = []
+    try:
+        if "[" in set_score:
+            ws, wg, wt = 1, 1, 1
+            if code_class == "laver":
+                diags.append(("tie_set_laver", "info", "(tie set) Laver Cup; match_id=", f"; set_score={set_score}; all="))
+            else:
+                diags.append(("tie_set", "warning", "(tie set) non-Laver; match_id=", f"; set_score={set_score}; all="))
+
+        elif len(set_score) == 2:
+            if code_class == "nextgen" and set_score in _NEXTGEN_SMALL:
+                diags.append(("nextgen_small_set", "info", "(small score) NextGen; match_id=", f"; set={set_score}; all="))
+            elif set_score in _BIG_SETS and code_class == "gs":
+                diags.append(("gs_big_set", "info", "(big score) Grand Slam; match_id=", f"; set={set_score}; all="))
+            elif set_score in _BIG_SETS and code_class == "olympics":
+                diags.append(("olympic_big_set", "warning", "(big score) Olympic; match_id=", f"; set={set_score}; all="))
+            elif set_score not in _WHITE_LIST:
+                diags.append(("not_whitelisted", "error", "score not in white list; match_id=", f"; set={set_score}"))
+
+            if set_score[0] > set_score[1]:
+                ws, wg, lg = 1, int(set_score[0]), int(set_score[1])
+                if set_score == "76" or (set_score == "43" and code_class == "nextgen"):
+                    wt = 1
+                elif wg - lg < 2:
+                    diags.append(("win_margin", "error", "(win) margin <2; match_id=", f"; set={set_score}"))
+            elif set_score[0] < set_score[1]:
+                ls, wg, lg = 1, int(set_score[0]), int(set_score[1])
+                if set_score == "67" or (set_score == "34" and code_class == "nextgen"):
+                    lt = 1
+                elif lg - wg < 2:
+                    diags.append(("loss_margin", "error", "(los) margin <2; match_id=", f"; set={set_score}"))
+            else:
+                diags.append(("equal_games", "error", "len==2 but equal digits; match_id=", f"; set={set_score}"))
+
+        elif len(set_score) == 3:
+            if set_score in ("810", "911"):
+                ls = 1
+                lg = int(set_score[0:2]) if set_score == "911" else 10
+                wg = int(set_score[-1])
+            elif set_score in ("108", "106", "107", "119"):
+                ws = 1
+                wg, lg = (11, 9) if set_score == "119" else (10, int(set_score[2]))
+            else:
+                diags.append(("len3_unrecognized", "error", "len==3 unrecognized; match_id=", f"; set={set_score}"))
+
+        elif len(set_score) == 4:
+            if code_class != "gs" or set_score > "2200":
+                diags.append(("huge_set", "warning", "(huge score) match_id=", f"; set={set_score}; all="))
+            left, right = set_score[:2], set_score[2:]
+            if left > right:
+                ws, wg, lg = 1, int(left), int(right)
+                if wg - lg < 2:
+                    diags.append(("win_margin", "error", "(win) margin <2; match_id=", f"; set={set_score}"))
+            elif right > left:
+                ls, wg, lg = 1, int(left), int(right)
+                if lg - wg < 2:
+                    diags.append(("loss_margin", "error", "(los) margin <2; match_id=", f"; set={set_score}"))
+            else:
+                diags.append((
+                    "len4_tie", "error", "len==4 but tie; match_id=", f"; left={left}; right={right}; set={set_score}"
+                ))
+
+        elif len(set_score) >= 7:
+            left, right = set_score[:2], set_score[2:4]
+            if left > right:
+                ws, wg, lg, wt = 1, int(left), int(right), 1
+            elif left < right:
+                ls, wg, lg, lt = 1, int(left), int(right), 1
+            else:
+                diags.append((
+                    "len7_tie", "error", "len>=7 but tie; match_id=", f"; LHS={left}; RHS={right}; set={set_score}"
+                ))
+
+        else:
+            diags.append(("unhandled_set", "error", "Unhandled set format; match_id=", f"; set={set_score}"))
+
+    except Exception as e:
+        return (0, 0, 0, 0, 0, 0), tuple(diags), str(e)
+    return (ws, ls, wg, lg, wt, lt), tuple(diags), None
+
+
+class _SetError(Exception):
+    """A set token failed to decode; ends the match like `parse_score`'s handler."""
+
+
+def decode_score(match_score: str, code_class: str, sets: Optional[Dict[str, DecodedSet]] = None) -> ScoreEntry:
+    """
+    Everything `MatchesBaseExtractor.parse_score` computes for one score and
+    tournament code class: its seven values and its anomalies (the messages
+    `parse_score_uncached` logs), in order.
+
+    :param sets: Optional memo of decoded set tokens for `code_class`.
+    """
+    diags: List[Diagnostic] = []
+    try:
+        match_ret = get_match_ret(match_score)
+        if match_ret is not None:
+            return (match_ret, None, None, None, None, None, None), ()
+
+        tokens = match_score.split()
+        all_text = str(tokens)
+        ws = ls = wg = lg = wt = lt = 0
+        for token in tokens:
+            entry = sets.get(token) if sets is not None else None
+            if entry is None:
+                entry = decode_set(token, code_class)
+                if sets is not None:
+                    sets[token] = entry
+            deltas, set_diags, error = entry
+            for kind, level, before, after in set_diags:
+                diags.append((kind, level, before, after + all_text if after.endswith("; all=") else after))
+            if error is not None:
+                raise _SetError(error)
+            ws += deltas[0]; ls += deltas[1]
+            wg += deltas[2]; lg += deltas[3]
+            wt += deltas[4]; lt += deltas[5]
+
+        if f"{ws}{ls}" not in _ALLOWED_SETS:
+            diags.append(("unexpected_set_count", "error", f"(unexpected match score) score={ws}{ls} match_id=", f"; sets={all_text}"))
+        return (None, ws, ls, wg, lg, wt, lt), tuple(diags)
+
+    except Exception as e:
+        diags.append(("parse_error", "error", "match_id=", f"; parse_score error: {e}"))
+        return _NO_VALUES, tuple(diags)
+
+
+def _normalize(match_score: Any) -> Any:
+    """Cache key form of a score: runs of whitespace collapsed (other values as-is)."""
+    return " ".join(match_score.split()) if isinstance(match_score, str) else match_score
+
+
+class ScoreCache:
+    """
+    Bounded LRU of decoded scores keyed by (normalized score, tournament code class).
+
+    Scores repeat heavily ('64 64', 'W/O', ...) and their result only depends on
+    the text and on whether the tournament is NextGen, Grand Slam, Olympics,
+    Laver Cup or other. An entry keeps parse_score's values and its anomalies;
+    `replay` records them again with the current match_id, so a hit gives the
+    same values and anomalies as parsing, for a dict lookup.
+    """
+
+    def __init__(self, maxsize: int = SCORE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Any, str], ScoreEntry]" = OrderedDict()
+        self._sets: Dict[str, Dict[str, DecodedSet]] = {}  # code class → set token → decoded set
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, match_score: str, code_class: str) -> ScoreEntry:
+        """The decoded entry for a score, from the cache or decoded (and cached) now."""
+        key = (_normalize(match_score), code_class)
+        with self._lock:
+            try:
+                entry = self._entries.get(key)
+            except TypeError:  # Unhashable score: decode without caching
+                self.stats["misses"] += 1
+                return decode_score(match_score, code_class)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+
+        with self._lock:
+            sets = self._sets.setdefault(code_class, {})
+            if len(sets) > self.maxsize:  # Only malformed input has this many distinct sets
+                sets.clear()
+            entry = decode_score(key[0], code_class, sets)
+            self.stats["misses"] += 1
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return entry
+
+    def count_hits(self, hits: int) -> None:
+        """Record hits served from a caller's own copy of looked-up entries."""
+        with self._lock:
+            self.stats["hits"] += hits
+
+    def summary(self) -> str:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+            return (
+                f"hits={self.stats['hits']} misses={self.stats['misses']} hit_rate={hit_rate:.1%} "
+                f"evictions={self.stats['evictions']} size={len(self._entries)}/{self.maxsize}"
+            )
+
+
+def replay(entry: ScoreEntry, match_id: Any, anomalies: AnomalySink) -> Tuple[Optional[Any], ...]:
+    """Record an entry's anomalies for `match_id` and return its values."""
+    values, diags = entry
+    for kind, level, before, after in diags:
+        anomalies.record(kind, level, match_id, before, after)
+    return values
+
+
+_SCORE_CACHE: Optional[ScoreCache] = None
+_SCORE_CACHE_LOCK = threading.Lock()
+
+
+def get_score_cache() -> ScoreCache:
+    """Return the process-wide score cache."""
+    global _SCORE_CACHE
+    with _SCORE_CACHE_LOCK:
+        if _SCORE_CACHE is None:
+            _SCORE_CACHE = ScoreCache()
+        return _SCORE_CACHE
+
+
+def close_score_cache() -> Optional[str]:
+    """Drop the process-wide score cache; returns its final metrics summary (if any)."""
+    global _SCORE_CACHE
+    with _SCORE_CACHE_LOCK:
+        if _SCORE_CACHE is None:
+            return None
+        summary = _SCORE_CACHE.summary()
+        _SCORE_CACHE = None
+        return summary
+
+
+def parse_score(match_score: str, match_id: Any, tournament_code: Any,
+                anomalies: AnomalySink) -> List[Optional[Any]]:
+    """`MatchesBaseExtractor.parse_score` served by the process-wide score cache."""
+    entry = get_score_cache().lookup(match_score, tournament_class(tournament_code))
+    return list(replay(entry, match_id, anomalies))
+
+
+def parse_scores_batch(
+    scores: Sequence[str],
+    match_ids: Sequence[str],
+    tournament_codes: Sequence[str],
+    anomalies: AnomalySink,
+) -> Dict[str, List[Optional[Any]]]:
+    """
+    Columnar `MatchesBaseExtractor.parse_score` over parallel score / match id /
+    tournament code sequences.
+
+    Each row is a score-cache lookup (a miss decodes the score from memoized set
+    tokens: integer deltas plus diagnostics, instead of the scalar branch chain
+    and its int() conversions) and a replay of its anomalies into `anomalies`.
+    Values and anomalies match what the scalar parser computes and logs.
+
+    Returns:
+        {column: list} for every name in SCORE_COLUMNS, one entry per input row.
+    """
+    if not len(scores) == len(match_ids) == len(tournament_codes):
+        raise ValueError("scores, match_ids and tournament_codes must have the same length")
+    cache = get_score_cache()
+    classes: Dict[Any, str] = {}
+    # Entries already looked up by this batch, by raw score (no normalization, no lock)
+    seen: Dict[Tuple[Any, str], ScoreEntry] = {}
+    repeats = 0
+
+    n = len(scores)
+    columns: List[List[Optional[Any]]] = [[None] * n for _ in SCORE_COLUMNS]
+    for i, (score, match_id, code) in enumerate(zip(scores, match_ids, tournament_codes)):
+        try:
+            code_class = classes[code]
+        except KeyError:
+            code_class = classes[code] = tournament_class(code)
+        except TypeError:
+            code_class = "other"
+        try:
+            entry = seen[(score, code_class)]
+            repeats += 1
+        except KeyError:
+            entry = seen[(score, code_class)] = cache.lookup(score, code_class)
+        except TypeError:
+            entry = cache.lookup(score, code_class)
+        values = replay(entry, match_id, anomalies)
+        if values is not _NO_VALUES:
+            for column, value in zip(columns, values):
+                column[i] = value
+    cache.count_hits(repeats)
+    return dict(zip(SCORE_COLUMNS, columns))
+
+
+def score_rows(columns: Dict[str, List[Optional[Any]]]) -> List[List[Optional[Any]]]:
+    """Turn `parse_scores_batch` columns back into `parse_score`-shaped rows."""
+    return [list(row) for row in zip(*(columns[c] for c in SCORE_COLUMNS))]
+
+
+# ------------------------------ Set-level model ------------------------------
+
+# Columns of `score_sets_batch`: one row per set, in score order
+SET_COLUMNS = (
+    "match_id", "set_no",
+    "winner_games", "loser_games",
+    "winner_tb_points", "loser_tb_points",
+    "super_tiebreak", "set_winner",
+)
+
+# (winner_games, loser_games, winner_tb_points, loser_tb_points, super_tiebreak, set_winner)
+# from the match winner's side; set_winner is 'W' (match winner), 'L' or None
+SetDetail = Tuple[Optional[int], Optional[int], Optional[int], Optional[int], bool, Optional[str]]
+
+# Long sets written as one 3-digit token: (winner, loser) games, as `decode_set` counts them
+_LONG_SETS = {
+    "108": (10, 8), "106": (10, 6), "107": (10, 7), "119": (11, 9),
+    "810": (8, 10), "911": (9, 11),
+}
+_TIEBREAK_SETS = ("76", "67", "43", "34")  # Games of a set decided by a tiebreak ('765' = 76(5))
+_UNPARSED: SetDetail = (None, None, None, None, False, None)
+
+
+def _set_winner(winner_side: int, loser_side: int) -> Optional[str]:
+    if winner_side > loser_side:
+        return "W"
+    if loser_side > winner_side:
+        return "L"
+    return None
+
+
+def _tiebreak_set(games: str, points: str) -> SetDetail:
+    """A set decided by a tiebreak; `points` are the tiebreak loser's (as in '76(5)')."""
+    wg, lg = int(games[0]), int(games[1])
+    lost = int(points)
+    won = max(7, lost + 2)
+    winner = _set_winner(wg, lg)
+    if winner == "W":
+        return wg, lg, won, lost, False, winner
+    if winner == "L":
+        return wg, lg, lost, won, False, winner
+    return wg, lg, None, None, False, None
+
+
+def _super_tiebreak(winner_points: int, loser_points: int) -> SetDetail:
+    """A match tiebreak played instead of a final set, counted as a 1-0 set."""
+    winner = _set_winner(winner_points, loser_points)
+    wg, lg = (1, 0) if winner == "W" else (0, 1) if winner == "L" else (None, None)
+    return wg, lg, winner_points, loser_points, True, winner
+
+
+def decode_set_detail(token: str) -> Optional[SetDetail]:
+    """
+    Structured form of one set token, or None if the token is not a set
+    (no digits: 'RET', 'W/O', ...). Sets that cannot be read come back as
+    `_UNPARSED` so the set numbering of a score stays intact.
+
+    Understood forms: '64', '108' / '810' / '1311' (long set), '76(5)' / '765' /
+    '7610' (tiebreak, loser's points), '10[8]' / '[10-8]' (match tiebreak).
+    Only the bracketed forms are match tiebreaks: a bare '108' is a 10-8 set,
+    as in the aggregate parser.
+    """
+    if not any(c.isdigit() for c in token):
+        return None
+    try:
+        if "[" in token:
+            head, _, rest = token.partition("[")
+            points = "".join(c if c.isdigit() else " " for c in rest).split()
+            if len(points) >= 2:
+                return _super_tiebreak(int(points[0]), int(points[1]))
+            if len(points) == 1 and head.isdigit():
+                return _super_tiebreak(int(head), int(points[0]))
+            return _UNPARSED
+
+        if "(" in token:
+            games, _, rest = token.partition("(")
+            points = rest.rstrip(")")
+            if len(games) == 2 and games.isdigit() and points.isdigit():
+                return _tiebreak_set(games, points)
+            return _UNPARSED
+
+        if not token.isdigit():
+            return _UNPARSED
+        if len(token) == 2:
+            wg, lg = int(token[0]), int(token[1])
+            return wg, lg, None, None, False, _set_winner(wg, lg)
+        if len(token) == 3 and token in _LONG_SETS:
+            wg, lg = _LONG_SETS[token]
+            return wg, lg, None, None, False, _set_winner(wg, lg)
+        if len(token) >= 3 and token[:2] in _TIEBREAK_SETS:
+            return _tiebreak_set(token[:2], token[2:])
+        if len(token) == 4:
+            wg, lg = int(token[:2]), int(token[2:])
+            return wg, lg, None, None, False, _set_winner(wg, lg)
+        return _UNPARSED
+    except ValueError:
+        return _UNPARSED
+
+
+def _score_sets(match_score: str) -> Tuple[SetDetail, ...]:
+    return tuple(d for d in map(decode_set_detail, match_score.split()) if d is not None)
+
+
+_score_sets_cached = lru_cache(maxsize=SCORE_CACHE_SIZE)(_score_sets)
+
+
+def score_sets(match_score: Optional[str]) -> Tuple[SetDetail, ...]:
+    """
+    Per-set structure of a score (see `decode_set_detail`), memoized like
+    `ScoreCache`. Sets played before a retirement ('64 31 RET') are kept, the
+    unfinished one included (its set_winner is the side leading in games);
+    walkovers and empty scores have no sets.
+    """
+    if not isinstance(match_score, str):
+        return ()
+    return _score_sets_cached(" ".join(match_score.split()))
+
+
+def set_games_mismatch(
+    match_score: Optional[str], winner_games: Optional[int], loser_games: Optional[int]
+) -> bool:
+    """
+    True if the games of `score_sets(match_score)` do not add up to the match's
+    aggregate winner/loser games (`parse_score`'s winner_games_won and
+    loser_games_won). Matches without aggregates (retired, walkovers, unparsed)
+    are not checked.
+    """
+    if winner_games is None or loser_games is None:
+        return False
+    w_total = l_total = 0
+    for w_games, l_games, *_ in score_sets(match_score):
+        w_total += w_games or 0
+        l_total += l_games or 0
+    return (w_total, l_total) != (int(winner_games), int(loser_games))
+
+
+def score_sets_batch(
+    scores: Sequence[Optional[str]],
+    match_ids: Sequence[Any],
+) -> Dict[str, List[Any]]:
+    """
+    Set-level table of parallel score / match id sequences: {column: list} for
+    every name in SET_COLUMNS, one entry per set (set_no starts at 1).
+    """
+    if len(scores) != len(match_ids):
+        raise ValueError("scores and match_ids must have the same length")
+    columns: List[List[Any]] = [[] for _ in SET_COLUMNS]
+    ids, set_nos, wg, lg, wtb, ltb, stb, winner = columns
+    for score, match_id in zip(scores, match_ids):
+        for set_no, (w_games, l_games, w_tb, l_tb, super_tb, set_winner) in enumerate(score_sets(score), 1):
+            ids.append(match_id)
+            set_nos.append(set_no)
+            wg.append(w_games)
+            lg.append(l_games)
+            wtb.append(w_tb)
+            ltb.append(l_tb)
+            stb.append(super_tb)
+            winner.append(set_winner)
+    return dict(zip(SET_COLUMNS, columns))
+
+
+def score_sets_summary() -> str:
+    info = _score_sets_cached.cache_info()
+    return f"hits={info.hits} misses={info.misses} size={info.currsize}/{info.maxsize}"
@@ -0,0 +1,179 @@
+import logging
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+
+from constants import STORAGE_BACKEND
+
+# (offset in the loaded rows, error message)
+RowError = Tuple[int, str]
+
+
+class StorageBackend:
+    """
+    Where extractors stage rows and run their process steps.
+
+    BaseExtractor only talks to the database through this interface:
+      - acquire / release : one session per extractor run;
+      - truncate          : empty a staging table;
+      - load              : array-insert rows with INSERT_STR, reporting per-row errors;
+      - call              : run a process step (stored procedure) by name, optionally
+                            with an id list (t_list_of_varchar) as its only argument;
+      - batch_mark        : a batch id below every batch_id written by later calls;
+      - identity          : which database (and schema) the session writes to.
+    Discovery queries in the extractors still use the session directly.
+    """
+
+    name = ""
+    embedded = False  # True if the backend needs no server (usable with --replay)
+    first_rows = ""   # Row-limiting clause binding :page_size (keyset pagination)
+
+    def acquire(self) -> Any:
+        raise NotImplementedError
+
+    def release(self, con: Any) -> None:
+        raise NotImplementedError
+
+    def truncate(self, con: Any, table: str) -> None:
+        raise NotImplementedError
+
+    def load(
+        self, con: Any, insert_str: str, rows: Sequence[Sequence[Any]], input_sizes: Optional[List[Any]]
+    ) -> Tuple[int, List[RowError]]:
+        """Insert `rows` and commit; returns (rows inserted, failed rows)."""
+        raise NotImplementedError
+
+    def call(self, con: Any, proc: str, ids: Optional[Sequence[str]] = None) -> None:
+        raise NotImplementedError
+
+    def supports(self, proc: str) -> bool:
+        """True if `call` can run `proc` on this backend."""
+        return True
+
+    def batch_mark(self, con: Any) -> int:
+        raise NotImplementedError
+
+    def identity(self, con: Any) -> str:
+        raise NotImplementedError
+
+    def summary(self) -> Optional[str]:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class OracleStorage(StorageBackend):
+    """Oracle XE through the process-wide cx_Oracle session pool (db_pool.py)."""
+
+    name = "oracle"
+    first_rows = "FETCH FIRST :page_size ROWS ONLY"
+
+    def __init__(self):
+        from db_pool import get_db_pool
+        self.pool = get_db_pool()
+
+    def acquire(self) -> Any:
+        return self.pool.acquire()
+
+    def release(self, con: Any) -> None:
+        self.pool.release(con)
+
+    def truncate(self, con: Any, table: str) -> None:
+        cur = con.cursor()
+        try:
+            cur.execute(f"TRUNCATE TABLE {table}")
+        finally:
+            cur.close()
+
+    def load(self, con, insert_str, rows, input_sizes):
+        cur = con.cursor()
+        try:
+            if input_sizes:
+                cur.setinputsizes(*input_sizes)
+            cur.executemany(insert_str, rows, batcherrors=True, arraydmlrowcounts=True)
+            errors = [(err.offset, err.message.strip()) for err in cur.getbatcherrors()]
+            inserted = sum(cur.getarraydmlrowcounts())
+            con.commit()
+            return inserted, errors
+        finally:
+            cur.close()
+
+    def call(self, con: Any, proc: str, ids: Optional[Sequence[str]] = None) -> None:
+        cur = con.cursor()
+        try:
+            if ids is None:
+                cur.callproc(proc)
+            else:
+                id_list = con.gettype("T_LIST_OF_VARCHAR").newobject(list(ids))
+                cur.callproc(proc, [id_list])
+        finally:
+            cur.close()
+
+    def batch_mark(self, con: Any) -> int:
+        # Process procedures stamp rows with the logger batch they open (pkg_log.sp_start_batch)
+        cur = con.cursor()
+        try:
+            return cur.execute("SELECT NVL(MAX(id), 0) FROM logger.batches").fetchone()[0]
+        finally:
+            cur.close()
+
+    def identity(self, con: Any) -> str:
+        cur = con.cursor()
+        try:
+            db_name, schema = cur.execute(
+                "SELECT sys_context('USERENV', 'DB_UNIQUE_NAME'), sys_context('USERENV', 'CURRENT_SCHEMA') FROM dual"
+            ).fetchone()
+        finally:
+            cur.close()
+        return f"{con.dsn}/{db_name}/{schema}"
+
+    def summary(self) -> Optional[str]:
+        return f"Oracle pool: {self.pool.summary()}"
+
+    def close(self) -> None:
+        from db_pool import close_db_pool
+        close_db_pool()
+
+
+def _create(name: str) -> StorageBackend:
+    if name == "oracle":
+        return OracleStorage()
+    if name == "local":
+        from local_storage import LocalStorage
+        return LocalStorage()
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+_STORAGE: Optional[StorageBackend] = None
+_STORAGE_LOCK = threading.Lock()
+
+
+def open_storage(name: str) -> StorageBackend:
+    """Select the process-wide backend used by every extractor created afterwards."""
+    global _STORAGE
+    close_storage()
+    with _STORAGE_LOCK:
+        _STORAGE = _create(name)
+        logging.getLogger(__name__).info(f"Storage backend: {name}")
+        return _STORAGE
+
+
+def get_storage() -> StorageBackend:
+    """Return the process-wide backend (STORAGE_BACKEND unless `open_storage` chose another)."""
+    global _STORAGE
+    with _STORAGE_LOCK:
+        if _STORAGE is None:
+            _STORAGE = _create(STORAGE_BACKEND)
+        return _STORAGE
+
+
+def close_storage() -> Optional[str]:
+    """Close the process-wide backend; returns its final metrics summary (if any)."""
+    global _STORAGE
+    with _STORAGE_LOCK:
+        if _STORAGE is None:
+            return None
+        summary = _STORAGE.summary()
+        _STORAGE.close()
+        _STORAGE = None
+        return summary
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export Oracle → Parquet (Python counterpart of CreateData.R)
+
+Writes, under --out:
+  matches/year=YYYY/part-0.parquet      vw_atp_matches, one partition per tournament year
+  tournaments/year=YYYY/part-0.parquet  atp_tournaments, one partition per year
+  players/part-0.parquet                atp_players
+  sets/year=YYYY/part-0.parquet         one row per set of every atp_matches score (score_parser.py)
+  manifest.json                         rows, sha256 and source version of every file
+
+Examples:
+  python export_parquet.py
+  python export_parquet.py --from 2020 --to 2025 --workers 4
+  python export_parquet.py --incremental
+
+Notes:
+- Rows are streamed with fetchmany (EXPORT_ARRAYSIZE) and written one row group
+  per fetch, so memory stays flat whatever the partition size.
+- Partitions are exported in parallel, one pooled session each (see db_pool.py).
+- Columns are typed from the cursor description (NUMBER(p,0) → int64, other
+  NUMBER → float64, DATE → timestamp, text → dictionary-encoded string).
+- Derived datasets (sets) are computed from the fetched rows with a fixed schema:
+  games, tiebreak points, match-tiebreak flag and set winner per set, so feature
+  scripts read typed columns instead of re-parsing score strings. Matches whose
+  set games do not add up to atp_matches' winner/loser games are counted and
+  logged (with a few examples) at the end of the export.
+- --incremental compares each partition's source version (row count + max batch_id
+  of every joined table) with the manifest and only re-exports the ones that changed.
+- Requires pyarrow.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+EXTRACTOR = HERE.parent / "Extractor"
+if EXTRACTOR.exists() and str(EXTRACTOR) not in sys.path:
+    sys.path.insert(0, str(EXTRACTOR))
+
+import cx_Oracle
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from constants import (
+    DB_POOL_MAX, EXPORT_DIR, EXPORT_ARRAYSIZE, EXPORT_WORKERS,
+    EXPORT_YEAR_FROM, EXPORT_YEAR_TO,
+)
+from db_pool import get_db_pool, close_db_pool
+from score_parser import score_sets_batch, score_sets_summary, set_games_mismatch
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# name → (partitioned by year, query (binds :year when partitioned), version query)
+# Version queries return (year, rows, max batch_id) per partition, or (rows, max batch_id).
+DATASETS: Dict[str, Tuple[bool, str, str]] = {
+    "matches": (
+        True,
+        "SELECT * FROM vw_atp_matches WHERE tournament_year = :year ORDER BY tournament_id, id",
+        """
+        SELECT t.year, COUNT(*),
+               GREATEST(MAX(m.batch_id), NVL(MAX(t.batch_id), 0), MAX(w.batch_id),
+                        MAX(l.batch_id), NVL(MAX(e.batch_id), 0))
+        FROM   atp_matches m
+        JOIN   atp_tournaments t ON t.id = m.tournament_id
+        JOIN   atp_players w ON w.code = m.winner_code
+        JOIN   atp_players l ON l.code = m.loser_code
+        LEFT   JOIN atp_matches_enriched e ON e.id = m.id
+        WHERE  t.year BETWEEN :year_from AND :year_to
+        GROUP  BY t.year
+        """,
+    ),
+    "tournaments": (
+        True,
+        "SELECT * FROM atp_tournaments WHERE year = :year ORDER BY start_dtm, code",
+        """
+        SELECT year, COUNT(*), NVL(MAX(batch_id), 0)
+        FROM   atp_tournaments
+        WHERE  year BETWEEN :year_from AND :year_to
+        GROUP  BY year
+        """,
+    ),
+    "players": (
+        False,
+        "SELECT * FROM atp_players ORDER BY code",
+        "SELECT COUNT(*), NVL(MAX(batch_id), 0) FROM atp_players",
+    ),
+    "sets": (
+        True,
+        """
+        SELECT m.id, m.score, m.winner_games_won, m.loser_games_won
+        FROM   atp_matches m
+        JOIN   atp_tournaments t ON t.id = m.tournament_id
+        WHERE  t.year = :year
+        ORDER  BY m.tournament_id, m.id
+        """,
+        """
+        SELECT t.year, COUNT(*), NVL(MAX(m.batch_id), 0)
+        FROM   atp_matches m
+        JOIN   atp_tournaments t ON t.id = m.tournament_id
+        WHERE  t.year BETWEEN :year_from AND :year_to
+        GROUP  BY t.year
+        """,
+    ),
+}
+
+# Set-level table (score_parser.SET_COLUMNS), one row per set of each (id, score, games) row
+SETS_SCHEMA = pa.schema([
+    pa.field("match_id", pa.string()),
+    pa.field("set_no", pa.int8()),
+    pa.field("winner_games", pa.int16()),
+    pa.field("loser_games", pa.int16()),
+    pa.field("winner_tb_points", pa.int16()),
+    pa.field("loser_tb_points", pa.int16()),
+    pa.field("super_tiebreak", pa.bool_()),
+    pa.field("set_winner", pa.string()),
+])
+
+
+SET_CHECK_SAMPLES = 5
+
+# Matches checked / whose set games differ from the aggregates, with a few examples
+_set_check: Dict[str, Any] = {"checked": 0, "mismatched": 0, "samples": []}
+_set_check_lock = threading.Lock()
+
+
+def _check_set_games(match_ids, scores, winner_games, loser_games) -> None:
+    bad = [
+        f"{match_id}: '{score}' ({w}-{l})"
+        for match_id, score, w, l in zip(match_ids, scores, winner_games, loser_games)
+        if set_games_mismatch(score, w, l)
+    ]
+    with _set_check_lock:
+        _set_check["checked"] += len(match_ids)
+        _set_check["mismatched"] += len(bad)
+        _set_check["samples"].extend(bad[:SET_CHECK_SAMPLES - len(_set_check["samples"])])
+
+
+def set_check_summary() -> Optional[str]:
+    """Set games vs atp_matches aggregates over the exported sets (None if all agree)."""
+    with _set_check_lock:
+        if not _set_check["mismatched"]:
+            return None
+        return (f"{_set_check['mismatched']} of {_set_check['checked']} match(es) whose set games differ "
+                f"from atp_matches winner/loser games; e.g. " + " | ".join(_set_check["samples"]))
+
+
+def _sets_record_batch(schema: pa.Schema, rows: List[Tuple]) -> pa.RecordBatch:
+    match_ids, scores, winner_games, loser_games = zip(*rows)
+    _check_set_games(match_ids, scores, winner_games, loser_games)
+    columns = score_sets_batch(scores, match_ids)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(columns[field.name], type=field.type) for field in schema],
+        schema=schema,
+    )
+
+
+# name → (fixed schema, fetched rows → record batch) of datasets derived in Python
+DERIVED: Dict[str, Tuple[pa.Schema, Callable[[pa.Schema, List[Tuple]], pa.RecordBatch]]] = {
+    "sets": (SETS_SCHEMA, _sets_record_batch),
+}
+
+logger = logging.getLogger("export_parquet")
+
+
+# ---- schema -----------------------------------------------------------------
+
+def arrow_type(db_type: Any, precision: Optional[int], scale: Optional[int]) -> pa.DataType:
+    """Arrow type of an Oracle column (cursor.description entry)."""
+    if db_type in (cx_Oracle.DB_TYPE_NUMBER, cx_Oracle.DB_TYPE_BINARY_INTEGER):
+        # Unconstrained NUMBER (computed view columns) comes back as precision 0, scale -127
+        if scale == 0 and precision:
+            return pa.int64()
+        return pa.float64()
+    if db_type in (cx_Oracle.DB_TYPE_BINARY_DOUBLE, cx_Oracle.DB_TYPE_BINARY_FLOAT):
+        return pa.float64()
+    if db_type in (cx_Oracle.DB_TYPE_DATE, cx_Oracle.DB_TYPE_TIMESTAMP):
+        return pa.timestamp("s")
+    return pa.string()
+
+
+def arrow_schema(description: List[Tuple]) -> pa.Schema:
+    return pa.schema([
+        pa.field(name.lower(), arrow_type(db_type, precision, scale))
+        for name, db_type, _, _, precision, scale, _ in description
+    ])
+
+
+def _output_type_handler(cursor, name, default_type, size, precision, scale):
+    """Fetch NUMBER(p,0) as int and other NUMBER as float (never Decimal)."""
+    if default_type == cx_Oracle.DB_TYPE_NUMBER:
+        return cursor.var(int if scale == 0 and precision else float, arraysize=cursor.arraysize)
+    return None
+
+
+def _record_batch(schema: pa.Schema, rows: List[Tuple]) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ---- export -----------------------------------------------------------------
+
+def partition_path(name: str, year: Optional[int]) -> str:
+    return f"{name}/year={year}/part-0.parquet" if year is not None else f"{name}/part-0.parquet"
+
+
+def export_partition(out: Path, name: str, year: Optional[int]) -> Dict[str, Any]:
+    """
+    Stream one dataset partition to Parquet; returns its manifest entry (without version).
+
+    The file is written next to its target and renamed on success, so a failed
+    export never leaves a truncated partition behind.
+    """
+    _, sql, _ = DATASETS[name]
+    rel = partition_path(name, year)
+    target = out / rel
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".parquet.tmp")
+
+    pool = get_db_pool()
+    con = pool.acquire()
+    start = time.perf_counter()
+    rows = 0
+    try:
+        cur = con.cursor()
+        cur.arraysize = EXPORT_ARRAYSIZE
+        cur.prefetchrows = EXPORT_ARRAYSIZE + 1
+        cur.outputtypehandler = _output_type_handler
+        cur.execute(sql, {"year": year} if year is not None else {})
+        schema, to_batch = DERIVED.get(name) or (arrow_schema(cur.description), _record_batch)
+
+        with pq.ParquetWriter(tmp, schema, compression="zstd", use_dictionary=True) as writer:
+            while True:
+                batch = cur.fetchmany()
+                if not batch:
+                    break
+                record_batch = to_batch(schema, batch)
+                writer.write_batch(record_batch)
+                rows += record_batch.num_rows
+            if rows == 0:
+                writer.write_table(schema.empty_table())
+        cur.close()
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+        pool.release(con)
+
+    logger.info(f"{rel}: {rows} rows in {time.perf_counter() - start:.1f}s")
+    return {"path": rel, "rows": rows, "sha256": _sha256(target)}
+
+
+def source_versions(name: str, year_from: int, year_to: int) -> Dict[str, List[int]]:
+    """Current source version of every partition of `name`: key → [rows, max batch_id]."""
+    partitioned, _, version_sql = DATASETS[name]
+    pool = get_db_pool()
+    con = pool.acquire()
+    try:
+        cur = con.cursor()
+        if partitioned:
+            cur.execute(version_sql, year_from=year_from, year_to=year_to)
+            versions = {str(year): [int(n), int(b)] for year, n, b in cur}
+        else:
+            n, b = cur.execute(version_sql).fetchone()
+            versions = {"": [int(n), int(b)]}
+        cur.close()
+        return versions
+    finally:
+        pool.release(con)
+
+
+def load_manifest(out: Path) -> Dict[str, Any]:
+    path = out / MANIFEST_NAME
+    if not path.exists():
+        return {"format": MANIFEST_FORMAT, "datasets": {}}
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        logger.warning(f"Ignoring manifest with unknown format {manifest.get('format')}; exporting everything.")
+        return {"format": MANIFEST_FORMAT, "datasets": {}}
+    return manifest
+
+
+def save_manifest(out: Path, manifest: Dict[str, Any]) -> None:
+    manifest["exported_at"] = datetime.now().isoformat(timespec="seconds")
+    tmp = out / (MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, out / MANIFEST_NAME)
+
+
+def export(
+    out: Path,
+    datasets: List[str],
+    year_from: int,
+    year_to: int,
+    workers: int,
+    incremental: bool,
+) -> Dict[str, Any]:
+    """Export `datasets` to `out` and update its manifest; returns the manifest."""
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(out)
+
+    # Versions are read before exporting: rows changing mid-export bump them again,
+    # so the next incremental run picks those partitions up.
+    jobs: List[Tuple[str, str, Dict[str, Any]]] = []
+    for name in datasets:
+        partitioned = DATASETS[name][0]
+        entries = manifest["datasets"].setdefault(name, {})
+        versions = source_versions(name, year_from, year_to)
+
+        if partitioned:
+            for key in [k for k in entries if year_from <= int(k) <= year_to and k not in versions]:
+                logger.info(f"{name}/year={key}: no longer in the source, removing")
+                (out / entries.pop(key)["path"]).unlink(missing_ok=True)
+
+        for key, version in sorted(versions.items()):
+            prev = entries.get(key)
+            if incremental and prev and prev.get("version") == version and (out / prev["path"]).exists():
+                continue
+            jobs.append((name, key, {"version": version}))
+
+    logger.info(f"{len(jobs)} partition(s) to export with {workers} worker(s)")
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {
+            ex.submit(export_partition, out, name, int(key) if key else None): (name, key, entry)
+            for name, key, entry in jobs
+        }
+        for fut in as_completed(futures):
+            name, key, entry = futures[fut]
+            try:
+                entry.update(fut.result())
+            except Exception as e:
+                failed += 1
+                logger.error(f"{partition_path(name, int(key) if key else None)} failed: {e}")
+                continue
+            manifest["datasets"][name][key] = entry
+
+    save_manifest(out, manifest)
+    if failed:
+        raise RuntimeError(f"{failed} partition(s) failed to export")
+    return manifest
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export Oracle tables to year-partitioned Parquet")
+    parser.add_argument("--out", default=EXPORT_DIR, help=f"Output directory (default: {EXPORT_DIR})")
+    parser.add_argument("--from", dest="year_from", type=int, default=EXPORT_YEAR_FROM)
+    parser.add_argument("--to", dest="year_to", type=int, default=EXPORT_YEAR_TO or datetime.now().year)
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS,
+                        help=f"Parallel partition exports (capped at DB_POOL_MAX={DB_POOL_MAX})")
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-export partitions whose source changed since the last export")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    workers = max(1, min(args.workers, DB_POOL_MAX))
+    start = time.perf_counter()
+    try:
+        manifest = export(Path(args.out), args.datasets, args.year_from, args.year_to, workers, args.incremental)
+    except Exception as e:
+        logger.error(str(e))
+        return 1
+    finally:
+        summary = close_db_pool()
+        if summary:
+            logger.info(f"Oracle pool: {summary}")
+        if "sets" in args.datasets:
+            logger.info(f"Score sets cache: {score_sets_summary()}")
+            set_check = set_check_summary()
+            if set_check:
+                logger.warning(f"Set games check: {set_check}")
+
+    for name in args.datasets:
+        rows = sum(e["rows"] for e in manifest["datasets"].get(name, {}).values())
+        logger.info(f"{name}: {rows} rows")
+    logger.info(f"Done in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+create or replace type t_list_of_varchar as table of varchar2(4000);
+/
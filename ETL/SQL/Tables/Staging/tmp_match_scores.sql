@@ -0,0 +1,11 @@
+CREATE GLOBAL TEMPORARY TABLE tmp_match_scores (
+  id                    VARCHAR2(64),
+  score                 VARCHAR2(32),
+  match_ret             VARCHAR2(10),
+  winner_sets_won       NUMBER(4),
+  winner_games_won      NUMBER(4),
+  winner_tiebreaks_won  NUMBER(4),
+  loser_sets_won        NUMBER(4),
+  loser_games_won       NUMBER(4),
+  loser_tiebreaks_won   NUMBER(4)
+) ON COMMIT DELETE ROWS;
@@ -0,0 +1,10 @@
+CREATE TABLE etl_anomalies (
+  batch_dtm  DATE            NOT NULL,
+  module     VARCHAR2(100)   NOT NULL,
+  kind       VARCHAR2(40)    NOT NULL,
+  severity   VARCHAR2(10),
+  qty        NUMBER(10),
+  samples    VARCHAR2(4000)
+);
+
+CREATE INDEX ix_etl_anomalies_dtm ON etl_anomalies (batch_dtm, module);